@@ -50,9 +50,13 @@ setup(
     keywords="youtube webhook real-time pipeline mongodb fastapi agentic-ai",
     entry_points={
         "console_scripts": [
-            "youtube-pipeline-load=data_ingestion.initial_load:load_initial_data",
+            "youtube-pipeline-load=data_ingestion.initial_load:main",
+            "youtube-pipeline-refresh-stats=data_ingestion.stats_refresher:main",
             "youtube-pipeline-subscribe=webhook_service.youtube_subscriber:main",
             "youtube-pipeline-query=scripts.query_db:main",
+            "youtube-pipeline-indexes=scripts.manage_indexes:main",
+            "youtube-pipeline-repair-stats=scripts.repair_channel_stats:main",
+            "youtube-pipeline-compact-history=scripts.compact_view_history:main",
         ],
     },
     include_package_data=True,
@@ -1,7 +1,10 @@
 import google.generativeai as genai
 import os
 from typing import Dict, List, Any, Optional
-from database.mongodb_client import get_sync_database
+from database.mongodb_client import get_analytics_database
+from database.text_search import text_search
+from database.query_operations import get_channel_statistics
+from database.channel_directory import get_channel_directory
 
 # Try to import function calling (may not be available in all accounts)
 try:
@@ -19,7 +22,7 @@ class YouTubeADKAgent:
     """Production-grade AI Agent using Google ADK with function calling"""
     
     def __init__(self):
-        self.db = get_sync_database()
+        self.db = get_analytics_database()
         
         # Try to initialize with function calling, fallback to simple mode
         try:
@@ -79,7 +82,7 @@ class YouTubeADKAgent:
         
         search_videos_func = FunctionDeclaration(
             name="search_videos",
-            description="Search for videos by keyword in title or description. Use when user wants to find specific content.",
+            description="Search videos by relevance across title, tags and description. Wrap exact phrases in double quotes. Use when user wants to find specific content.",
             parameters={
                 "type": "object",
                 "properties": {
@@ -204,17 +207,19 @@ class YouTubeADKAgent:
                 }
             
             limit = min(max(limit, 1), 50)
-            videos = list(self.db.videos.find(
-                {"title": {"$regex": keyword, "$options": "i"}}
-            ).limit(limit))
+            videos = text_search(
+                self.db.videos, keyword, limit,
+                {"_id": 0, "title": 1, "channel_title": 1, "view_count": 1, "url": 1}
+            )
             
             results = []
             for v in videos:
                 results.append({
                     "title": v.get("title", "N/A"),
-                    "channel": v.get("channelTitle", "N/A"),
-                    "views": v.get("viewCount", 0),
-                    "url": v.get("url", "")
+                    "channel": v.get("channel_title", "N/A"),
+                    "views": v.get("view_count", 0),
+                    "url": v.get("url", ""),
+                    "score": round(v.get("score", 0), 3)
                 })
             
             return {
@@ -232,29 +237,23 @@ class YouTubeADKAgent:
             if not channel_name:
                 return {"status": "error", "message": "Channel name required"}
             
-            videos = list(self.db.videos.find({"channelTitle": channel_name}))
+            stats = get_channel_statistics(channel_name)
             
-            if not videos:
-                all_channels = self.db.videos.distinct("channelTitle")
-                matches = [c for c in all_channels if channel_name.lower() in c.lower()]
-                
+            if not stats:
                 return {
                     "status": "not_found",
                     "message": f"Channel '{channel_name}' not found",
-                    "suggestions": matches
+                    "suggestions": get_channel_directory().suggest(self.db, channel_name)
                 }
             
-            total_views = sum(v.get("viewCount", 0) for v in videos)
-            total_likes = sum(v.get("likeCount", 0) for v in videos)
-            
             return {
                 "status": "success",
-                "channel": channel_name,
-                "total_videos": len(videos),
-                "total_views": total_views,
-                "total_likes": total_likes,
-                "avg_views": total_views // len(videos) if videos else 0,
-                "avg_likes": total_likes // len(videos) if videos else 0
+                "channel": ", ".join(stats["channels"]),
+                "total_videos": stats["total_videos"],
+                "total_views": stats["total_views"],
+                "total_likes": stats["total_likes"],
+                "avg_views": int(stats["avg_views"] or 0),
+                "avg_likes": int(stats["avg_likes"] or 0)
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -59,13 +59,13 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint - No authentication required"""
-    from database.mongodb_client import get_sync_database
+    from database.mongodb_client import get_database
     try:
-        db = get_sync_database()
-        video_count = db['videos'].count_documents({})
+        db = get_database()
+        video_count = await db['videos'].estimated_document_count()
         
         # Test database connection
-        db.command('ping')
+        await db.command('ping')
         
         return {
             "status": "healthy",
@@ -92,16 +92,27 @@ async def startup_event():
     print("🚀 YouTube Metadata API is starting up...")
     print("📊 Connecting to MongoDB Atlas...")
     try:
-        from database.mongodb_client import get_sync_database
-        db = get_sync_database()
-        video_count = db['videos'].count_documents({})
+        from database.mongodb_client import get_database
+        from database.indexes import ensure_indexes
+        db = get_database()
+        video_count = await db['videos'].estimated_document_count()
         print(f"✅ Database connected! Total videos: {video_count}")
+        await ensure_indexes(db)
     except Exception as e:
         print(f"⚠️  Database connection warning: {e}")
+    try:
+        from database.mongodb_client import get_sync_database
+        from database.change_watcher import start_change_watcher
+        start_change_watcher(get_sync_database())
+        print("🔄 Watching videos for cache invalidation")
+    except Exception as e:
+        print(f"⚠️  Change watcher not started, cached results expire by TTL only: {e}")
     print("✨ API is ready to accept requests!")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Execute on application shutdown"""
     print("🛑 YouTube Metadata API is shutting down...")
+    from database.change_watcher import stop_change_watcher
+    stop_change_watcher()
     print("👋 Goodbye!")
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Query, HTTPException, Depends
-from database.query_operations import (
+from typing import Optional
+from database.async_query_operations import (
     get_recent_videos,
+    get_trending_videos as query_trending_videos,
     count_videos_by_channel,
     search_videos_by_keyword,
     get_channel_statistics,
-    count_videos_in_timerange
+    count_videos_in_timerange,
+    get_upload_summary,
+    get_video_view_history,
+    get_channel_view_history
 )
+from database.pagination import InvalidCursor
 from api.auth import verify_api_key
 
 router = APIRouter(prefix="/api", tags=["videos"])
@@ -13,38 +19,42 @@ router = APIRouter(prefix="/api", tags=["videos"])
 @router.get("/videos/recent")
 async def get_recent(
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     api_key: str = Depends(verify_api_key)
 ):
     """Get most recent videos"""
-    videos = get_recent_videos(limit)
-    return {"status": "success", "count": len(videos), "videos": videos}
+    try:
+        videos, next_cursor = await get_recent_videos(limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "count": len(videos), "videos": videos, "next_cursor": next_cursor}
 
 @router.get("/videos/search")
 async def search_videos(
     keyword: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     api_key: str = Depends(verify_api_key)
 ):
-    """Search videos by keyword"""
-    videos = search_videos_by_keyword(keyword, limit)
-    return {"status": "success", "count": len(videos), "keyword": keyword, "videos": videos}
+    """Search videos by relevance; "quoted phrases" must match exactly and -word excludes a term"""
+    try:
+        videos, next_cursor = await search_videos_by_keyword(keyword, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "count": len(videos), "keyword": keyword, "videos": videos, "next_cursor": next_cursor}
 
 @router.get("/videos/trending")
 async def get_trending_videos(
     limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     api_key: str = Depends(verify_api_key)
 ):
     """Get trending videos sorted by views"""
-    from database.mongodb_client import get_sync_database
-    db = get_sync_database()
-    
-    cursor = db['videos'].find().sort("view_count", -1).limit(limit)
-    videos = list(cursor)
-    
-    for video in videos:
-        video['_id'] = str(video['_id'])
-    
-    return {"status": "success", "count": len(videos), "videos": videos}
+    try:
+        videos, next_cursor = await query_trending_videos(limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "count": len(videos), "videos": videos, "next_cursor": next_cursor}
 
 @router.get("/videos/count/{channel_name}")
 async def count_channel_videos(
@@ -52,7 +62,7 @@ async def count_channel_videos(
     api_key: str = Depends(verify_api_key)
 ):
     """Count total videos from a channel"""
-    count = count_videos_by_channel(channel_name)
+    count = await count_videos_by_channel(channel_name)
     return {"status": "success", "channel": channel_name, "video_count": count}
 
 @router.get("/videos/channel/{channel_name}/stats")
@@ -61,7 +71,7 @@ async def get_channel_stats(
     api_key: str = Depends(verify_api_key)
 ):
     """Get detailed channel statistics"""
-    stats = get_channel_statistics(channel_name)
+    stats = await get_channel_statistics(channel_name)
     if not stats:
         raise HTTPException(status_code=404, detail=f"Channel '{channel_name}' not found")
     return {"status": "success", "channel": channel_name, "statistics": stats}
@@ -73,5 +83,37 @@ async def get_channel_recent_videos(
     api_key: str = Depends(verify_api_key)
 ):
     """Get recent videos from channel in timeframe"""
-    count = count_videos_in_timerange(channel_name, hours)
+    count = await count_videos_in_timerange(channel_name, hours)
     return {"status": "success", "channel": channel_name, "hours": hours, "video_count": count}
+
+@router.get("/videos/channel/{channel_name}/history")
+async def get_channel_history(
+    channel_name: str,
+    days: int = Query(30, ge=1, le=730),
+    api_key: str = Depends(verify_api_key)
+):
+    """Daily views gained across a channel's videos"""
+    history = await get_channel_view_history(channel_name, days)
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"Channel '{channel_name}' not found")
+    return {"status": "success", "channel": channel_name, "days": days, **history}
+
+@router.get("/videos/{video_id}/history")
+async def get_video_history(
+    video_id: str,
+    days: int = Query(30, ge=1, le=730),
+    raw: bool = Query(False, description="Every stored observation instead of one point per day"),
+    api_key: str = Depends(verify_api_key)
+):
+    """View count history of a video"""
+    series = await get_video_view_history(video_id, days, raw)
+    return {"status": "success", "video_id": video_id, "days": days, "count": len(series), "series": series}
+
+@router.get("/videos/uploads")
+async def get_uploads(
+    hours: int = Query(24, ge=1, le=720),
+    api_key: str = Depends(verify_api_key)
+):
+    """Upload counts per channel and per hour across all channels"""
+    summary = await get_upload_summary(hours)
+    return {"status": "success", **summary}
@@ -6,7 +6,7 @@ import streamlit as st
 import google.generativeai as genai
 from dotenv import load_dotenv
 from database.query_operations import get_recent_videos, count_videos_by_channel, get_channel_statistics
-from database.mongodb_client import get_sync_database
+from database.mongodb_client import get_analytics_database, get_sync_database
 
 # Import ADK Agent
 try:
@@ -27,11 +27,22 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def _start_change_watcher():
+    """One watcher per Streamlit server, so cached query results drop as soon as videos change"""
+    from database.change_watcher import start_change_watcher
+    return start_change_watcher(get_sync_database())
+
+try:
+    _start_change_watcher()
+except Exception:
+    pass
+
 # Sidebar with stats and mode selector
 with st.sidebar:
     st.title("📊 Database Stats")
     try:
-        db = get_sync_database()
+        db = get_analytics_database()
         total_videos = db['videos'].count_documents({})
         st.metric("Total Videos", total_videos)
         
@@ -109,7 +120,7 @@ if prompt := st.chat_input("Ask about videos..."):
             # Keyword detection - Video Count
             if any(word in prompt_lower for word in ["how many", "total", "count", "number of"]):
                 try:
-                    db = get_sync_database()
+                    db = get_analytics_database()
                     count = db['videos'].count_documents({})
                     response = f"📊 We have **{count} videos** in our database from various YouTube news channels!"
                 except:
@@ -128,7 +139,7 @@ if prompt := st.chat_input("Ask about videos..."):
             # Trending/Popular Videos
             elif any(word in prompt_lower for word in ["trending", "popular", "most viewed", "top"]):
                 try:
-                    db = get_sync_database()
+                    db = get_analytics_database()
                     cursor = db['videos'].find().sort("view_count", -1).limit(5)
                     videos = list(cursor)
                     
@@ -159,7 +170,7 @@ if prompt := st.chat_input("Ask about videos..."):
             # What kind of videos
             elif any(word in prompt_lower for word in ["what kind", "type", "category", "about videos", "describe"]):
                 try:
-                    db = get_sync_database()
+                    db = get_analytics_database()
                     
                     pipeline = [
                         {"$group": {"_id": "$channel_title", "count": {"$sum": 1}}},
@@ -4,7 +4,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 import streamlit as st
 import pandas as pd
-from database.mongodb_client import get_sync_database
+from database.mongodb_client import get_analytics_database
+from database.analytics_snapshot import get_analytics_snapshot
 import plotly.express as px
 
 st.set_page_config(page_title="Analytics Dashboard", page_icon="📊", layout="wide")
@@ -12,103 +13,124 @@ st.set_page_config(page_title="Analytics Dashboard", page_icon="📊", layout="w
 st.title("📊 YouTube Analytics Dashboard")
 st.caption("Real-time insights from your video database")
 
-# Get data
-db = get_sync_database()
-videos = list(db['videos'].find().limit(100))
+# Get data: the snapshot covers every video and only pulls what changed since the last rerun
+db = get_analytics_database()
+snapshot = get_analytics_snapshot()
+snapshot.refresh_if_due(db)
+
+def video_details(rows: list, value_name: str) -> pd.DataFrame:
+    """Titles and links for the few videos a chart or table shows, in the given order"""
+    ids = [row['video_id'] for row in rows]
+    details = {
+        video['video_id']: video
+        for video in db['videos'].find(
+            {"video_id": {"$in": ids}},
+            {"_id": 0, "video_id": 1, "title": 1, "channel_title": 1, "view_count": 1, "like_count": 1, "upload_date": 1, "url": 1}
+        )
+    }
+    frame = pd.DataFrame([{**details.get(row['video_id'], {"video_id": row['video_id']}), value_name: row['value']} for row in rows])
+    if 'title' not in frame:
+        frame['title'] = frame['video_id']
+    frame['title'] = frame['title'].fillna(frame['video_id'])
+    return frame
+
+if len(snapshot):
+    totals = snapshot.totals()
 
-if videos:
-    # Convert to DataFrame
-    df = pd.DataFrame(videos)
-    df['_id'] = df['_id'].astype(str)
-    
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
-    
+
     with col1:
-        st.metric("Total Videos", len(df))
+        st.metric("Total Videos", f"{totals['total_videos']:,}")
     with col2:
-        st.metric("Total Views", f"{df['view_count'].sum():,.0f}")
+        st.metric("Total Views", f"{totals['total_views']:,.0f}")
     with col3:
-        st.metric("Total Likes", f"{df['like_count'].sum():,.0f}")
+        st.metric("Total Likes", f"{totals['total_likes']:,.0f}")
     with col4:
-        st.metric("Avg Views/Video", f"{df['view_count'].mean():,.0f}")
-    
+        st.metric("Avg Views/Video", f"{totals['avg_views']:,.0f}")
+
     st.divider()
-    
+
     # Charts
     col1, col2 = st.columns(2)
-    
+
     with col1:
         st.subheader("📺 Top Channels by Video Count")
-        channel_counts = df['channel_title'].value_counts().head(10)
+        channel_counts = snapshot.group_by_channel(agg="count", limit=10)
         fig1 = px.bar(
-            x=channel_counts.values,
-            y=channel_counts.index,
+            x=[channel['value'] for channel in channel_counts],
+            y=[channel['channel_title'] for channel in channel_counts],
             orientation='h',
             labels={'x': 'Number of Videos', 'y': 'Channel'},
-            color=channel_counts.values,
+            color=[channel['value'] for channel in channel_counts],
             color_continuous_scale='Blues'
         )
         st.plotly_chart(fig1, use_container_width=True)
-    
+
     with col2:
         st.subheader("🔥 Top Videos by Views")
-        top_videos = df.nlargest(10, 'view_count')[['title', 'view_count']]
+        top_videos = video_details(snapshot.top_n("view_count", 10), 'views')
         top_videos['title_short'] = top_videos['title'].str[:40] + '...'
         fig2 = px.bar(
             top_videos,
-            x='view_count',
+            x='views',
             y='title_short',
             orientation='h',
-            labels={'view_count': 'Views', 'title_short': 'Video'},
-            color='view_count',
+            labels={'views': 'Views', 'title_short': 'Video'},
+            color='views',
             color_continuous_scale='Reds'
         )
         st.plotly_chart(fig2, use_container_width=True)
-    
+
     # Engagement metrics
     st.divider()
     st.subheader("📈 Engagement Analysis")
-    
+
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        # Like rate
-        df['like_rate'] = (df['like_count'] / df['view_count'] * 100).round(2)
-        top_engagement = df.nlargest(10, 'like_rate')[['title', 'like_rate', 'view_count']]
+        # Like rate (videos with at least one view)
+        top_engagement = video_details(snapshot.top_n("like_rate", 10, mask=snapshot.mask(min_views=1)), 'like_rate')
+        top_engagement['like_pct'] = (top_engagement['like_rate'] * 100).round(2)
         st.write("**Top 10 Videos by Like Rate (%)**")
-        st.dataframe(top_engagement, use_container_width=True)
-    
+        st.dataframe(top_engagement.reindex(columns=['title', 'like_pct', 'view_count']), use_container_width=True)
+
     with col2:
-        # Views distribution
-        fig3 = px.histogram(
-            df,
-            x='view_count',
-            nbins=30,
+        # Views distribution (log-spaced bins; view counts span several orders of magnitude)
+        distribution = snapshot.histogram("view_count", bins=30, log=True)
+        edges = distribution['edges']
+        fig3 = px.bar(
+            x=[f"{edges[i]:,.0f}–{edges[i + 1]:,.0f}" for i in range(len(edges) - 1)],
+            y=distribution['counts'],
             title='Views Distribution',
-            labels={'view_count': 'View Count'},
+            labels={'x': 'View Count', 'y': 'Videos'},
             color_discrete_sequence=['#1f77b4']
         )
         st.plotly_chart(fig3, use_container_width=True)
-    
+
     # Data table
     st.divider()
     st.subheader("🗂️ Raw Data Explorer")
-    
+
     # Filters
     col1, col2 = st.columns(2)
     with col1:
-        selected_channel = st.selectbox("Filter by Channel", ["All"] + list(df['channel_title'].unique()))
+        channels = snapshot.group_by_channel(agg="count")
+        channel_titles = {channel['channel_title']: channel['channel_id'] for channel in channels}
+        selected_channel = st.selectbox("Filter by Channel", ["All"] + sorted(channel_titles))
     with col2:
         min_views = st.number_input("Minimum Views", min_value=0, value=0)
-    
-    filtered_df = df.copy()
-    if selected_channel != "All":
-        filtered_df = filtered_df[filtered_df['channel_title'] == selected_channel]
-    filtered_df = filtered_df[filtered_df['view_count'] >= min_views]
-    
-    display_cols = ['title', 'channel_title', 'view_count', 'like_count', 'upload_date']
-    st.dataframe(filtered_df[display_cols].head(50), use_container_width=True)
-    
+
+    mask = snapshot.mask(
+        channel_ids=[channel_titles[selected_channel]] if selected_channel != "All" else None,
+        min_views=min_views
+    )
+    st.caption(f"{int(mask.sum()):,} matching videos; newest 50 shown")
+    newest = snapshot.top_n("upload_date", 50, mask=mask)
+    if newest:
+        filtered_df = video_details(newest, 'upload_ms')
+        display_cols = ['title', 'channel_title', 'view_count', 'like_count', 'upload_date']
+        st.dataframe(filtered_df.reindex(columns=display_cols), use_container_width=True)
+
 else:
     st.warning("No data available. Please run initial data load.")
@@ -0,0 +1,79 @@
+from datetime import datetime
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_COLLECTION = "backfill_checkpoints"
+
+class BackfillCheckpoints:
+    """
+    Per-channel backfill progress stored in MongoDB (motor)
+
+    One document per channel:
+        channel_id
+        status                  in_progress | complete | failed
+        mode                    full | incremental (of the current/last run)
+        page_token              next uploads-playlist page of the current run
+        videos_loaded           videos written by the current run
+        run_newest_published_at newest publishedAt seen by the current run
+        newest_published_at     committed watermark, advanced only when a run completes
+        oldest_published_at     oldest publishedAt ever written
+        started_at, updated_at
+    """
+
+    def __init__(self, db):
+        self.collection = db[CHECKPOINT_COLLECTION]
+
+    async def get(self, channel_id: str) -> dict:
+        """Get the checkpoint for a channel, or None"""
+        return await self.collection.find_one({"channel_id": channel_id}, {"_id": 0})
+
+    async def start_run(self, channel_id: str, mode: str):
+        """Reset per-run state for a fresh (non-resumed) run"""
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"channel_id": channel_id},
+            {
+                "$set": {
+                    "status": "in_progress",
+                    "mode": mode,
+                    "page_token": None,
+                    "videos_loaded": 0,
+                    "started_at": now,
+                    "updated_at": now
+                },
+                "$unset": {"run_newest_published_at": "", "error": ""}
+            },
+            upsert=True
+        )
+
+    async def record_page(self, channel_id: str, page: dict, videos_written: int):
+        """Persist progress once every video on a page has been written or kept for retry"""
+        update = {
+            "$set": {"page_token": page["next_page_token"], "updated_at": datetime.utcnow()},
+            "$inc": {"videos_loaded": videos_written}
+        }
+        if page["newest_published_at"]:
+            update["$max"] = {"run_newest_published_at": page["newest_published_at"]}
+        if page["oldest_published_at"]:
+            update["$min"] = {"oldest_published_at": page["oldest_published_at"]}
+        await self.collection.update_one({"channel_id": channel_id}, update)
+
+    async def finish_run(self, channel_id: str):
+        """Mark the run complete and advance the committed newest watermark"""
+        checkpoint = await self.get(channel_id) or {}
+        update = {
+            "$set": {"status": "complete", "page_token": None, "updated_at": datetime.utcnow()},
+            "$unset": {"error": ""}
+        }
+        if checkpoint.get("run_newest_published_at"):
+            update["$max"] = {"newest_published_at": checkpoint["run_newest_published_at"]}
+        await self.collection.update_one({"channel_id": channel_id}, update)
+
+    async def fail_run(self, channel_id: str, error: str):
+        """Record a failed run; its page_token is kept so --resume can continue"""
+        await self.collection.update_one(
+            {"channel_id": channel_id},
+            {"$set": {"status": "failed", "error": error, "updated_at": datetime.utcnow()}}
+        )
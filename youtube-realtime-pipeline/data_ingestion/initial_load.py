@@ -1,8 +1,21 @@
+import argparse
 import asyncio
-from data_ingestion.youtube_api import fetch_channel_videos
-from database.mongodb_client import get_sync_database
+import time
+from collections import deque
+from data_ingestion.youtube_api import iter_upload_playlist_pages, enrich_video_pages
+from data_ingestion.checkpoints import BackfillCheckpoints
+from data_ingestion.quota import get_quota_scheduler
+from data_ingestion.response_cache import get_response_cache
+from data_ingestion.youtube_client import close_youtube_client, configure_youtube_client
+from database.mongodb_client import get_database
+from database.bulk_writer import AsyncBulkUpserter
+from database.indexes import ensure_indexes
+from database.channel_directory import register_channels
+from database.channel_stats import ChannelStatsObserver
+from database.upload_rollup import UploadRollupObserver
+from database.view_history import ViewHistoryObserver
+from database.enrichment_backlog import record_failed_enrichments
 import logging
-from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,61 +26,293 @@ CHANNELS = {
     "UCFx1nseXKTc1Culiu3neeSQ": "ANI News India",
 }
 
-async def load_initial_data():
-    """Load initial 5000 videos from each target channel"""
+# Pipeline tuning: how far each stage may run ahead of the next
+PAGE_BUFFER_SIZE = 4
+BATCH_BUFFER_SIZE = 4
+# Videos per bulk write; pages are checkpointed as each batch lands, so a crash re-fetches at most this many
+WRITE_BATCH_SIZE = 500
+WRITE_MAX_LATENCY_SECONDS = 2.0
+
+# Global budgets shared by every channel being loaded
+DEFAULT_PARALLEL_CHANNELS = 4
+DEFAULT_WRITE_CONCURRENCY = 4
+
+_END = object()
+
+async def _buffered(source, maxsize: int):
+    """
+    Run an async generator ahead of its consumer through a bounded queue
+
+    The producer blocks once `maxsize` items are waiting, so memory stays flat
+    no matter how many items the source yields. Producer errors are re-raised
+    in the consumer.
+    """
+    queue = asyncio.Queue(maxsize=maxsize)
+
+    async def produce():
+        try:
+            async for item in source:
+                await queue.put((item, None))
+            await queue.put((_END, None))
+        except Exception as e:
+            await queue.put((_END, e))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _END:
+                if error:
+                    raise error
+                return
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+async def load_channel(db, channel_id: str, max_results: int = 5000, write_limiter: asyncio.Semaphore = None, mode: str = "full") -> dict:
+    """
+    Stream one channel into MongoDB: page discovery -> batched enrichment -> bulk write
+    
+    Every playlist page is checkpointed as soon as all of its videos have
+    been written (see _PageProgress); writes themselves are batched.
+    
+    Args:
+        mode: "full" walks from the newest upload, "resume" continues an
+            unfinished run from its saved page token, "incremental" only
+            fetches uploads newer than the stored watermark
+    
+    Returns:
+        dict: Bulk writer summary plus the number of videos streamed and the run mode
+    """
+    checkpoints = BackfillCheckpoints(db)
+    checkpoint = await checkpoints.get(channel_id)
+    
+    run_mode, page_token, published_after, loaded = "full", None, None, 0
+    resuming = mode == "resume" and checkpoint is not None and checkpoint.get("status") != "complete"
+    if mode == "resume" and checkpoint is not None and not resuming:
+        logger.info(f"  [{channel_id}] Last run already complete, nothing to resume")
+        return {"streamed": 0, "inserted": 0, "modified": 0, "errors": 0, "mode": "resume", "status": "skipped"}
+    
+    if resuming:
+        run_mode = checkpoint.get("mode", "full")
+        page_token = checkpoint.get("page_token")
+        loaded = checkpoint.get("videos_loaded", 0)
+        if loaded and not page_token:
+            # Crashed after the last page was written but before completion was recorded
+            await checkpoints.finish_run(channel_id)
+            return {"streamed": 0, "inserted": 0, "modified": 0, "errors": 0, "mode": run_mode, "status": "ok"}
+        logger.info(f"  [{channel_id}] Resuming {run_mode} run after {loaded} videos")
+    elif mode == "incremental" and checkpoint and checkpoint.get("newest_published_at"):
+        run_mode = "incremental"
+    
+    if run_mode == "incremental":
+        published_after = checkpoint["newest_published_at"]
+        logger.info(f"  [{channel_id}] Fetching uploads newer than {published_after}")
+    
+    if not resuming:
+        await checkpoints.start_run(channel_id, run_mode)
+    
+    pages = _buffered(
+        iter_upload_playlist_pages(channel_id, max_results - loaded, published_after, page_token),
+        PAGE_BUFFER_SIZE
+    )
+    batches = _buffered(enrich_video_pages(pages), BATCH_BUFFER_SIZE)
+    
+    progress = _PageProgress(db, checkpoints, channel_id)
+    try:
+        async with AsyncBulkUpserter(
+            db['videos'],
+            max_batch=WRITE_BATCH_SIZE,
+            max_latency=WRITE_MAX_LATENCY_SECONDS,
+            write_limiter=write_limiter,
+            observers=[ChannelStatsObserver(db), UploadRollupObserver(db), ViewHistoryObserver(db), progress]
+        ) as writer:
+            async for page in batches:
+                # Track the page before its videos can be flushed
+                await progress.add(page)
+                for video in page["videos"]:
+                    await writer.upsert(video)
+                logger.info(f"  [{channel_id}] Progress: {loaded + progress.streamed}/{max_results} videos checkpointed")
+        # Retry whatever an observer error left behind before giving up on the run
+        await progress.record_ready()
+        if progress.unrecorded:
+            raise RuntimeError(f"{progress.unrecorded} page(s) were never checkpointed")
+    except Exception as e:
+        await checkpoints.fail_run(channel_id, str(e))
+        raise
+    
+    await checkpoints.finish_run(channel_id)
+    
+    summary = writer.summary()
+    summary["streamed"] = progress.streamed
+    summary["mode"] = run_mode
+    return summary
+
+class _PageProgress:
+    """
+    Bulk writer observer that checkpoints playlist pages, in order, once they are durable
+
+    A page is recorded only after every one of its videos has been written or,
+    for videos whose enrichment or write failed, kept in enrichment_backlog for
+    a later retry. Until then neither page_token nor the run's published-at
+    range moves past it, so a crash or failure resumes at the first page that
+    is not fully accounted for.
+    """
+
+    def __init__(self, db, checkpoints: BackfillCheckpoints, channel_id: str):
+        self.db = db
+        self.checkpoints = checkpoints
+        self.channel_id = channel_id
+        # Pages in playlist order: [page, video IDs not yet written, IDs to retry]
+        self._pages = deque()
+        self._lock = asyncio.Lock()
+        self.streamed = 0
+
+    @property
+    def unrecorded(self) -> int:
+        return len(self._pages)
+
+    async def add(self, page: dict):
+        """Start tracking a page whose videos are about to be written"""
+        written = {video["video_id"] for video in page["videos"]}
+        self._pages.append([page, written, list(page.get("failed_ids", []))])
+        await self.record_ready()
+
+    async def after_flush(self, pending: dict, state, failed_keys: set):
+        for _, unwritten, failed in self._pages:
+            for video_id in unwritten & pending.keys():
+                if video_id in failed_keys:
+                    failed.append(video_id)
+                unwritten.discard(video_id)
+        await self.record_ready()
+
+    async def record_ready(self):
+        """Checkpoint leading pages with nothing left to write (flushes from the timer can race)"""
+        async with self._lock:
+            while self._pages and not self._pages[0][1]:
+                page, _, failed = self._pages[0]
+                videos = [video for video in page["videos"] if video["video_id"] not in failed]
+                if failed:
+                    await record_failed_enrichments(self.db, failed, "initial load: enrichment or write failed")
+                    logger.warning(f"  [{self.channel_id}] Kept {len(failed)} video(s) in the enrichment backlog")
+                await register_channels(self.db, videos)
+                await self.checkpoints.record_page(self.channel_id, page, len(videos))
+                self._pages.popleft()
+                self.streamed += len(videos)
+
+async def _load_channel_timed(db, channel_id: str, channel_name: str, max_results: int, write_limiter: asyncio.Semaphore, mode: str) -> dict:
+    """Load one channel and return its summary with status and timing"""
+    logger.info(f"📺 Processing: {channel_name} ({channel_id})")
+    start_time = time.monotonic()
+    try:
+        summary = await load_channel(db, channel_id, max_results, write_limiter, mode)
+        summary.setdefault("status", "ok" if summary["streamed"] or mode != "full" else "empty")
+    except Exception as e:
+        logger.error(f"Error loading {channel_name}: {str(e)}")
+        logger.exception(e)
+        summary = {"status": "failed", "error": str(e), "mode": mode, "streamed": 0, "inserted": 0, "modified": 0, "errors": 0}
+    summary["seconds"] = round(time.monotonic() - start_time, 2)
+    
+    if summary["status"] == "empty":
+        logger.warning(f"No videos fetched from {channel_name}")
+    logger.info(f"✓ {channel_name} finished: {summary['streamed']} videos in {summary['seconds']:.2f}s")
+    return summary
+
+async def load_initial_data(channels: dict = None, parallel: int = DEFAULT_PARALLEL_CHANNELS, max_results: int = 5000, write_concurrency: int = DEFAULT_WRITE_CONCURRENCY, mode: str = "full") -> dict:
+    """
+    Load up to `max_results` videos from each target channel, `parallel` channels at a time
+    
+    `mode` is passed to load_channel ("full", "resume" or "incremental").
+    
+    API requests are bounded globally by the shared YouTube client and bulk
+    writes by one semaphore, so adding channels never multiplies load. Channel
+    workers take the next channel from a shared queue as they finish, which
+    keeps long and short channels evenly spread.
+    
+    Returns:
+        dict: channel_id -> per-channel summary
+    """
+    channels = channels or CHANNELS
+    
     logger.info("="*60)
-    logger.info("Starting Initial Data Load")
+    logger.info(f"Starting Initial Data Load ({len(channels)} channels, {parallel} in parallel, {mode} mode)")
     logger.info("="*60)
     
-    db = get_sync_database()
+    db = get_database()
+    await ensure_indexes(db)
     collection = db['videos']
+    write_limiter = asyncio.Semaphore(write_concurrency)
+    
+    pending = asyncio.Queue()
+    for channel_id, channel_name in channels.items():
+        pending.put_nowait((channel_id, channel_name))
+    
+    results = {}
     
-    total_loaded = 0
-    
-    for channel_id, channel_name in CHANNELS.items():
-        logger.info(f"\n📺 Processing: {channel_name}")
-        logger.info(f"Channel ID: {channel_id}")
-        
-        start_time = datetime.now()
-        videos = await fetch_channel_videos(channel_id, max_results=5000)
-        
-        if not videos:
-            logger.warning(f"No videos fetched from {channel_name}")
-            continue
-        
-        logger.info(f"Storing {len(videos)} videos in MongoDB...")
-        
-        new_count = 0
-        for i, video in enumerate(videos, 1):
+    async def channel_worker():
+        while True:
             try:
-                result = collection.update_one(
-                    {"video_id": video["video_id"]},
-                    {"$set": video},
-                    upsert=True
-                )
-                
-                if result.upserted_id:
-                    new_count += 1
-                
-                if i % 500 == 0:
-                    logger.info(f"  Progress: {i}/{len(videos)} videos processed")
-                    
-            except Exception as e:
-                logger.error(f"Error storing video {video['video_id']}: {str(e)}")
-        
-        elapsed_time = (datetime.now() - start_time).total_seconds()
-        
-        logger.info(f"\n✓ {channel_name} Summary:")
-        logger.info(f"  New videos: {new_count}")
-        logger.info(f"  Time taken: {elapsed_time:.2f} seconds")
-        
-        total_loaded += new_count
+                channel_id, channel_name = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[channel_id] = await _load_channel_timed(db, channel_id, channel_name, max_results, write_limiter, mode)
+    
+    quota = get_quota_scheduler()
+    quota_sync = asyncio.create_task(quota.run_usage_sync(db))
+    
+    start_time = time.monotonic()
+    await asyncio.gather(*(channel_worker() for _ in range(max(1, min(parallel, len(channels))))))
+    elapsed_time = time.monotonic() - start_time
+    
+    quota_sync.cancel()
+    await asyncio.gather(quota_sync, return_exceptions=True)
     
     logger.info("\n" + "="*60)
     logger.info("Initial Data Load Complete!")
-    logger.info(f"Total new videos: {total_loaded}")
-    logger.info(f"Total videos in database: {collection.count_documents({})}")
+    logger.info(f"{'Channel':<40} {'Mode':<12} {'Status':<7} {'Videos':>7} {'New':>7} {'Updated':>8} {'Secs':>8}")
+    for channel_id, summary in results.items():
+        logger.info(
+            f"{channels[channel_id][:40]:<40} {summary['mode']:<12} {summary['status']:<7} {summary['streamed']:>7} "
+            f"{summary['inserted']:>7} {summary['modified']:>8} {summary['seconds']:>8.2f}"
+        )
+    failed_writes = sum(summary['errors'] for summary in results.values())
+    if failed_writes:
+        logger.warning(f"Failed writes: {failed_writes}")
+    logger.info(f"Total new videos: {sum(summary['inserted'] for summary in results.values())}")
+    logger.info(f"Total videos in database: {await collection.count_documents({})}")
+    logger.info(f"Wall-clock time: {elapsed_time:.2f} seconds")
+    usage = quota.snapshot()
+    logger.info(f"YouTube quota used today: {usage['used']}/{usage['daily_quota']} units (resets {usage['resets_at']})")
+    cache = get_response_cache()
+    if cache is not None:
+        cached = cache.stats()
+        logger.info(f"Response cache: {cached['not_modified']} not modified (304), {cached['hits']} fresh hits, {cached['misses']} misses")
     logger.info("="*60)
+    
+    await close_youtube_client()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill YouTube channel videos into MongoDB")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL_CHANNELS, help="Channels to backfill concurrently")
+    parser.add_argument("--max-results", type=int, default=5000, help="Videos to load per channel")
+    parser.add_argument("--api-concurrency", type=int, help="Max in-flight YouTube API requests across all channels")
+    parser.add_argument("--write-concurrency", type=int, default=DEFAULT_WRITE_CONCURRENCY, help="Max in-flight bulk writes across all channels")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true", help="Continue unfinished runs from their checkpoints")
+    mode.add_argument("--incremental", action="store_true", help="Only fetch videos newer than each channel's stored watermark")
+    args = parser.parse_args()
+    
+    if args.api_concurrency:
+        configure_youtube_client(max_concurrency=args.api_concurrency)
+    
+    asyncio.run(load_initial_data(
+        parallel=args.parallel,
+        max_results=args.max_results,
+        write_concurrency=args.write_concurrency,
+        mode="resume" if args.resume else "incremental" if args.incremental else "full"
+    ))
 
 if __name__ == "__main__":
-    asyncio.run(load_initial_data())
+    main()
@@ -0,0 +1,110 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_DESCRIPTION_LENGTH = 500
+MAX_TAGS = 10
+
+# ISO-8601 durations as used by the Data API, e.g. PT4M13S, PT1H2M, P1DT3H
+_DURATION_PATTERN = r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+_DURATION_UNITS = np.array([86400, 3600, 60, 1])
+
+# Fields every stored item must have; rows missing any of them are dropped
+_REQUIRED_COLUMNS = ["id", "snippet.title", "snippet.publishedAt", "snippet.channelId", "snippet.channelTitle"]
+
+def _column(frame: pd.DataFrame, name: str, default=None) -> pd.Series:
+    if name in frame:
+        return frame[name]
+    return pd.Series(default, index=frame.index, dtype=object)
+
+def _counts(frame: pd.DataFrame, name: str) -> pd.Series:
+    """Statistics arrive as numeric strings (or not at all when hidden)"""
+    return pd.to_numeric(_column(frame, name), errors="coerce").fillna(0).astype("int64")
+
+def _duration_seconds(durations: pd.Series) -> pd.Series:
+    parts = durations.fillna("").astype(str).str.extract(_DURATION_PATTERN)
+    parts = parts.apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype="int64")
+    return pd.Series(parts @ _DURATION_UNITS, index=durations.index)
+
+def _normalize_tags(tags: pd.Series) -> pd.Series:
+    """Lower-case, trim and de-duplicate each row's tags, keeping the first MAX_TAGS"""
+    exploded = tags.apply(lambda value: value if isinstance(value, list) else []).explode()
+    cleaned = exploded.dropna().astype(str).str.strip().str.lower()
+    cleaned = cleaned[cleaned != ""]
+    cleaned = cleaned[~cleaned.reset_index().duplicated().to_numpy()]
+    grouped = cleaned.groupby(level=0).agg(lambda values: list(values)[:MAX_TAGS])
+    return grouped.reindex(tags.index).apply(lambda value: value if isinstance(value, list) else [])
+
+def parse_timestamps(values) -> list:
+    """Parse ISO-8601 strings (with or without a zone) to naive UTC datetimes; unparseable values become None"""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), utc=True, errors="coerce", format="ISO8601").dt.tz_localize(None)
+    return [None if pd.isna(value) else value.to_pydatetime() for value in parsed]
+
+def normalize_video_batch(items: list) -> list:
+    """
+    Convert a batch of raw videos.list items into stored metadata documents
+
+    Every column is parsed in one vectorized pass over the batch. Besides the
+    raw fields, each document gets:
+        upload_date       publishedAt as a datetime (UTC)
+        duration_seconds  contentDetails.duration as integer seconds
+        like_rate         like_count / view_count (0 when there are no views)
+        title_length      characters in the title
+        tags              lower-cased, trimmed, de-duplicated (first 10)
+
+    Items missing an ID, title, publish time or channel are logged and dropped.
+
+    Args:
+        items: videos.list items requested with part=snippet,statistics,contentDetails
+
+    Returns:
+        list: Metadata documents, in input order
+    """
+    if not items:
+        return []
+
+    frame = pd.json_normalize(items)
+    for name in _REQUIRED_COLUMNS:
+        if name not in frame:
+            frame[name] = None
+    malformed = frame[_REQUIRED_COLUMNS].isna().any(axis=1)
+    if malformed.any():
+        for video_id in frame.loc[malformed, "id"]:
+            logger.error(f"Malformed metadata for video {video_id}: missing required fields")
+        frame = frame[~malformed]
+        if frame.empty:
+            return []
+
+    view_count = _counts(frame, "statistics.viewCount")
+    like_count = _counts(frame, "statistics.likeCount")
+    views = view_count.to_numpy(dtype="float64")
+    like_rate = np.divide(like_count.to_numpy(dtype="float64"), views, out=np.zeros_like(views), where=views > 0)
+    titles = frame["snippet.title"].astype(str)
+    durations = _column(frame, "contentDetails.duration", "").fillna("")
+
+    columns = {
+        "video_id": frame["id"].tolist(),
+        "title": titles.tolist(),
+        "url": ("https://www.youtube.com/watch?v=" + frame["id"]).tolist(),
+        "upload_date": parse_timestamps(frame["snippet.publishedAt"]),
+        "view_count": view_count.tolist(),
+        "like_count": like_count.tolist(),
+        "like_rate": np.round(like_rate, 6).tolist(),
+        "description": _column(frame, "snippet.description", "").fillna("").astype(str).str.slice(0, MAX_DESCRIPTION_LENGTH).tolist(),
+        "channel_id": frame["snippet.channelId"].tolist(),
+        "channel_title": frame["snippet.channelTitle"].tolist(),
+        "tags": _normalize_tags(_column(frame, "snippet.tags")).tolist(),
+        "title_length": titles.str.len().tolist(),
+        "duration": durations.tolist(),
+        "duration_seconds": _duration_seconds(durations).tolist(),
+    }
+
+    ingested_at = datetime.utcnow()
+    documents = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    for document in documents:
+        document["ingested_at"] = ingested_at
+    return documents
@@ -0,0 +1,220 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+import logging
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Quota units charged per call, by Data API resource
+QUOTA_COSTS = {
+    "search": 100,
+    "videos": 1,
+    "playlistItems": 1,
+    "channels": 1,
+}
+
+YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+YOUTUBE_QUOTA_RATE_PER_SECOND = float(os.getenv("YOUTUBE_QUOTA_RATE_PER_SECOND", "20"))
+YOUTUBE_QUOTA_BURST = float(os.getenv("YOUTUBE_QUOTA_BURST", "100"))
+# Share of the daily quota each class may spend, so lower classes leave headroom
+YOUTUBE_BACKFILL_QUOTA_SHARE = float(os.getenv("YOUTUBE_BACKFILL_QUOTA_SHARE", "0.8"))
+YOUTUBE_STATS_QUOTA_SHARE = float(os.getenv("YOUTUBE_STATS_QUOTA_SHARE", "0.7"))
+YOUTUBE_QUOTA_SYNC_SECONDS = float(os.getenv("YOUTUBE_QUOTA_SYNC_SECONDS", "10"))
+
+# Shared per-day usage ledger so separate processes see each other's spend
+QUOTA_USAGE_COLLECTION = "api_quota_usage"
+
+class Priority(IntEnum):
+    """Scheduling classes; lower values are served first"""
+    WEBHOOK = 0
+    BACKFILL = 1
+    STATS = 2
+
+class QuotaExhaustedError(Exception):
+    """Raised when a call would exceed the daily quota available to its priority"""
+
+def _pacific_midnight_after(moment: datetime) -> datetime:
+    """Next midnight in US Pacific time, when the Data API quota resets"""
+    try:
+        from zoneinfo import ZoneInfo
+        pacific = ZoneInfo("America/Los_Angeles")
+    except Exception:
+        pacific = timezone(timedelta(hours=-8))
+    local = moment.astimezone(pacific)
+    next_day = (local + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return next_day.astimezone(timezone.utc)
+
+class QuotaScheduler:
+    """
+    Central gate for every YouTube Data API call
+
+    Each call is charged its unit cost against a daily budget that resets at
+    Pacific midnight. Lower priority classes may only use a share of that budget,
+    keeping headroom for webhook enrichment. A token bucket paces bursts, and
+    when callers have to wait for tokens they are released in priority order.
+    """
+
+    def __init__(
+        self,
+        daily_quota: int = YOUTUBE_DAILY_QUOTA,
+        rate_per_second: float = YOUTUBE_QUOTA_RATE_PER_SECOND,
+        burst: float = YOUTUBE_QUOTA_BURST,
+        shares: dict = None
+    ):
+        self.daily_quota = daily_quota
+        self.rate = rate_per_second
+        self.burst = burst
+        self.shares = shares or {
+            Priority.WEBHOOK: 1.0,
+            Priority.BACKFILL: YOUTUBE_BACKFILL_QUOTA_SHARE,
+            Priority.STATS: YOUTUBE_STATS_QUOTA_SHARE,
+        }
+        self._tokens = burst
+        self._refilled_at = time.monotonic()
+        self._sequence = itertools.count()
+        self._waiters = []
+        self._condition = None
+        self._loop = None
+        self._reset_day(datetime.now(timezone.utc))
+
+    def _reset_day(self, now: datetime):
+        self.used = 0
+        self._unsynced = 0
+        self.exhausted = False
+        self.resets_at = _pacific_midnight_after(now)
+        self.units_by_priority = {priority.name.lower(): 0 for priority in Priority}
+        self.calls_by_resource = {}
+        self.rejected_by_priority = {priority.name.lower(): 0 for priority in Priority}
+
+    def _maybe_reset(self):
+        now = datetime.now(timezone.utc)
+        if now >= self.resets_at:
+            logger.info(f"Daily YouTube quota reset ({self.used} units used)")
+            self._reset_day(now)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _check_budget(self, cost: int, priority: Priority):
+        self._maybe_reset()
+        ceiling = self.daily_quota * self.shares.get(priority, 1.0)
+        if self.exhausted or self.used + cost > ceiling:
+            self.rejected_by_priority[priority.name.lower()] += 1
+            raise QuotaExhaustedError(
+                f"YouTube quota unavailable for {priority.name.lower()} calls "
+                f"({self.used}/{self.daily_quota} units used, resets {self.resets_at.isoformat()})"
+            )
+
+    async def acquire(self, resource: str, priority: Priority = Priority.BACKFILL):
+        """Wait for permission to make one call to `resource`; charges its unit cost"""
+        cost = QUOTA_COSTS.get(resource, 1)
+        self._check_budget(cost, priority)
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._waiters = []
+
+        entry = (int(priority), next(self._sequence))
+        async with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    self._refill()
+                    at_front = self._waiters[0] == entry
+                    if at_front and self._tokens >= min(cost, self.burst):
+                        break
+                    timeout = (min(cost, self.burst) - self._tokens) / self.rate if at_front else None
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                # The day may have rolled over or other callers spent the budget while we waited
+                self._check_budget(cost, priority)
+                self._tokens -= cost
+                self.used += cost
+                self._unsynced += cost
+                self.units_by_priority[priority.name.lower()] += cost
+                self.calls_by_resource[resource] = self.calls_by_resource.get(resource, 0) + 1
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def has_budget(self, priority: Priority, cost: int = 1) -> bool:
+        """Whether a call of `cost` units at `priority` would currently be allowed"""
+        self._maybe_reset()
+        return not self.exhausted and self.used + cost <= self.daily_quota * self.shares.get(priority, 1.0)
+
+    def mark_exhausted(self):
+        """Stop all calls until the next reset (the API reported quotaExceeded)"""
+        if not self.exhausted:
+            logger.error(f"YouTube API reported quota exhausted; pausing calls until {self.resets_at.isoformat()}")
+        self.exhausted = True
+
+    async def sync_usage(self, collection):
+        """Publish this process's new usage to the shared ledger and adopt the global total"""
+        self._maybe_reset()
+        delta, self._unsynced = self._unsynced, 0
+        try:
+            ledger = await collection.find_one_and_update(
+                {"day": self.resets_at.date().isoformat()},
+                {"$inc": {"units": delta}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception:
+            self._unsynced += delta
+            raise
+        self.used = max(self.used, ledger["units"])
+
+    async def run_usage_sync(self, db, interval: float = YOUTUBE_QUOTA_SYNC_SECONDS):
+        """Sync with the shared ledger every `interval` seconds until cancelled"""
+        collection = db[QUOTA_USAGE_COLLECTION]
+        try:
+            while True:
+                try:
+                    await self.sync_usage(collection)
+                except Exception as e:
+                    logger.error(f"Quota usage sync failed: {str(e)}")
+                await asyncio.sleep(interval)
+        finally:
+            if self._unsynced:
+                await self.sync_usage(collection)
+
+    def snapshot(self) -> dict:
+        """Live quota usage counters"""
+        self._maybe_reset()
+        return {
+            "daily_quota": self.daily_quota,
+            "used": self.used,
+            "remaining": max(self.daily_quota - self.used, 0),
+            "exhausted": self.exhausted,
+            "resets_at": self.resets_at.isoformat(),
+            "units_by_priority": dict(self.units_by_priority),
+            "calls_by_resource": dict(self.calls_by_resource),
+            "rejected_by_priority": dict(self.rejected_by_priority),
+            "waiting": len(self._waiters)
+        }
+
+# Process-wide scheduler
+_scheduler = None
+
+def get_quota_scheduler() -> QuotaScheduler:
+    """Get the process-wide quota scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = QuotaScheduler()
+    return _scheduler
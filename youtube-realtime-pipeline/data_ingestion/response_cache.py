@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from dotenv import load_dotenv
+import logging
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+YOUTUBE_CACHE_ENABLED = os.getenv("YOUTUBE_CACHE_ENABLED", "true").lower() == "true"
+YOUTUBE_CACHE_PATH = os.getenv("YOUTUBE_CACHE_PATH", ".cache/youtube_responses.sqlite3")
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "5000"))
+YOUTUBE_CACHE_MAX_MB = float(os.getenv("YOUTUBE_CACHE_MAX_MB", "64"))
+YOUTUBE_CACHE_DISK_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_DISK_MAX_ENTRIES", "50000"))
+# Serve entries younger than this without revalidating (0 = always send If-None-Match)
+YOUTUBE_CACHE_FRESH_SECONDS = float(os.getenv("YOUTUBE_CACHE_FRESH_SECONDS", "0"))
+# Disk writes are batched this long behind the memory tier; the disk is trimmed at most this often
+YOUTUBE_CACHE_FLUSH_SECONDS = float(os.getenv("YOUTUBE_CACHE_FLUSH_SECONDS", "2"))
+YOUTUBE_CACHE_EVICT_SECONDS = float(os.getenv("YOUTUBE_CACHE_EVICT_SECONDS", "300"))
+
+def cache_key(resource: str, params: dict) -> str:
+    """Stable key for a Data API request (the API key is never part of it)"""
+    items = sorted((k, str(v)) for k, v in params.items() if k != "key" and v is not None)
+    return resource + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+class ResponseCache:
+    """
+    ETag-keyed cache of YouTube Data API response bodies
+
+    Recently used responses are kept decoded in a size-bounded in-memory LRU;
+    every entry is also written to a SQLite file so the cache survives restarts.
+    SQLite is only touched off the event loop: disk reads run in a worker
+    thread, and writes (new bodies and access times) are batched behind the
+    memory tier and flushed together every `flush_seconds`. The disk is trimmed
+    to its least recently used `disk_max_entries` at most every
+    `evict_seconds`. Returned bodies are shared and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        path: str = YOUTUBE_CACHE_PATH,
+        max_entries: int = YOUTUBE_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(YOUTUBE_CACHE_MAX_MB * 1024 * 1024),
+        disk_max_entries: int = YOUTUBE_CACHE_DISK_MAX_ENTRIES,
+        fresh_seconds: float = YOUTUBE_CACHE_FRESH_SECONDS,
+        flush_seconds: float = YOUTUBE_CACHE_FLUSH_SECONDS,
+        evict_seconds: float = YOUTUBE_CACHE_EVICT_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_entries = disk_max_entries
+        self.fresh_seconds = fresh_seconds
+        self.flush_seconds = flush_seconds
+        self.evict_seconds = evict_seconds
+        # key -> (etag, body, size, stored_at)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.changed = 0
+        self.evictions = 0
+        self.disk_flushes = 0
+
+        # Pending disk writes: key -> (etag, text, stored_at) for new bodies, key -> accessed_at for uses
+        self._pending_rows = {}
+        self._pending_touches = {}
+        self._flush_task = None
+        self._evicted_at = time.monotonic()
+        self._db_lock = threading.Lock()
+
+        self._db = None
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, etag TEXT, body TEXT, stored_at REAL, accessed_at REAL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache disk store unavailable ({str(e)}), using memory only")
+                self._db = None
+
+    def _remember(self, key: str, etag: str, body: dict, size: int, stored_at: float):
+        """Insert into the memory LRU, evicting least recently used entries"""
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[2]
+        self._memory[key] = (etag, body, size, stored_at)
+        self._memory_bytes += size
+        while self._memory and (len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted[2]
+            self.evictions += 1
+
+    def _read(self, key: str):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT etag, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    async def lookup(self, key: str):
+        """
+        Get the cached entry for a request key
+
+        Memory hits return without leaving the event loop; misses fall through
+        to the disk in a worker thread. Either way the use is recorded, so disk
+        eviction drops the least recently used entries.
+
+        Returns:
+            tuple: (etag, body, fresh) or None; `fresh` means the body may be
+            used without revalidation
+        """
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        elif self._db is not None:
+            pending = self._pending_rows.get(key)
+            row = pending or await asyncio.to_thread(self._read, key)
+            if row:
+                etag, text, stored_at = row
+                entry = (etag, json.loads(text), len(text), stored_at)
+                self._remember(key, *entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._touch(key, time.time())
+        etag, body, _, stored_at = entry
+        fresh = self.fresh_seconds > 0 and time.time() - stored_at < self.fresh_seconds
+        if fresh:
+            self.hits += 1
+        return etag, body, fresh
+
+    def store(self, key: str, etag: str, body: dict):
+        """Cache a 200 response body under its ETag (written to disk with the next flush)"""
+        if not etag:
+            return
+        if key in self._memory:
+            self.changed += 1
+        text = json.dumps(body, separators=(",", ":"))
+        now = time.time()
+        self._remember(key, etag, body, len(text), now)
+        if self._db is not None:
+            self._pending_rows[key] = (etag, text, now)
+            self._touch(key, now)
+
+    def revalidated(self, key: str, etag: str, body: dict) -> dict:
+        """Record a 304 Not Modified for the entry returned by lookup() and return its body"""
+        self.not_modified += 1
+        entry = self._memory.get(key)
+        size = entry[2] if entry is not None else len(json.dumps(body, separators=(",", ":")))
+        now = time.time()
+        self._remember(key, etag, body, size, now)
+        pending = self._pending_rows.get(key)
+        if pending is not None:
+            self._pending_rows[key] = (pending[0], pending[1], now)
+        # Otherwise only the freshness stamp changes on disk
+        self._touch(key, now, stored_at=now)
+        return body
+
+    def _touch(self, key: str, accessed_at: float, stored_at: float = None):
+        """Queue a new access time (and optionally freshness stamp) for the disk copy"""
+        if self._db is None:
+            return
+        if stored_at is None:
+            stored_at = self._pending_touches.get(key, (None, None))[0]
+        self._pending_touches[key] = (stored_at, accessed_at)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (a synchronous caller): nothing to block, write now
+            self._write(*self._take_pending())
+            return
+        task = self._flush_task
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+
+    def _take_pending(self) -> tuple:
+        rows, touches = self._pending_rows, self._pending_touches
+        self._pending_rows, self._pending_touches = {}, {}
+        return rows, touches
+
+    def _write(self, rows: dict, touches: dict):
+        """Apply a batch of pending writes in one transaction, trimming the disk when due"""
+        if self._db is None or not (rows or touches):
+            return
+        evict = time.monotonic() - self._evicted_at >= self.evict_seconds
+        try:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO responses (key, etag, body, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    [(key, etag, text, stored_at, stored_at) for key, (etag, text, stored_at) in rows.items()]
+                )
+                self._db.executemany(
+                    "UPDATE responses SET stored_at = COALESCE(?, stored_at), accessed_at = ? WHERE key = ?",
+                    [(stored_at, accessed_at, key) for key, (stored_at, accessed_at) in touches.items()]
+                )
+                if evict:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_max_entries,)
+                    )
+                    self._evicted_at = time.monotonic()
+                self._db.commit()
+            self.disk_flushes += 1
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist cached responses: {str(e)}")
+
+    async def flush(self):
+        """Write pending bodies and access times to disk now (in a worker thread)"""
+        rows, touches = self._take_pending()
+        if rows or touches:
+            await asyncio.to_thread(self._write, rows, touches)
+
+    def stats(self) -> dict:
+        """Hit, miss and 304 counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "changed": self.changed,
+            "evictions": self.evictions,
+            "disk_flushes": self.disk_flushes,
+            "disk_pending": len(self._pending_rows) + len(self._pending_touches),
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_backed": self._db is not None
+        }
+
+    def close(self):
+        """Write anything pending and close the disk store"""
+        if self._db is not None:
+            self._write(*self._take_pending())
+            self._db.close()
+            self._db = None
+
+# Process-wide cache shared by every client instance
+_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache, or None when disabled"""
+    global _cache
+    if _cache is None and YOUTUBE_CACHE_ENABLED:
+        _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from data_ingestion.youtube_api import fetch_videos_statistics, MAX_IDS_PER_REQUEST
+from data_ingestion.quota import Priority, QuotaExhaustedError, get_quota_scheduler
+from data_ingestion.youtube_client import close_youtube_client
+from database.mongodb_client import get_database
+from database.bulk_writer import AsyncBulkUpserter
+from database.channel_stats import ChannelStatsObserver
+from database.view_history import ViewHistoryObserver, compact_view_history_async
+import logging
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Refresh cadence per tier, in minutes (override via environment)
+STATS_HOT_INTERVAL_MINUTES = float(os.getenv("STATS_HOT_INTERVAL_MINUTES", "5"))
+STATS_WARM_INTERVAL_MINUTES = float(os.getenv("STATS_WARM_INTERVAL_MINUTES", "60"))
+STATS_COLD_INTERVAL_MINUTES = float(os.getenv("STATS_COLD_INTERVAL_MINUTES", "1440"))
+
+# IDs gathered per round of videos.list calls (fetched concurrently in 50-ID batches)
+STATS_IDS_PER_ROUND = MAX_IDS_PER_REQUEST * 10
+STATS_POLL_SECONDS = 30
+# View history retention is applied at most this often
+HISTORY_COMPACTION_INTERVAL = timedelta(days=1)
+
+REFRESH_STATE_COLLECTION = "stats_refresh_state"
+
+# name, youngest age (inclusive), oldest age (exclusive, None = unbounded), interval
+TIERS = [
+    ("hot", timedelta(0), timedelta(hours=24), STATS_HOT_INTERVAL_MINUTES),
+    ("warm", timedelta(hours=24), timedelta(days=7), STATS_WARM_INTERVAL_MINUTES),
+    ("cold", timedelta(days=7), None, STATS_COLD_INTERVAL_MINUTES),
+]
+
+def _tier_query(now: datetime, youngest: timedelta, oldest: timedelta) -> dict:
+    upload_date = {"$lte": now - youngest}
+    if oldest is not None:
+        upload_date["$gt"] = now - oldest
+    return {"upload_date": upload_date}
+
+class StatsRefresher:
+    """
+    Keeps view_count/like_count fresh with a tiered polling schedule
+
+    Videos are split by age into hot (<24h), warm (<7d) and cold tiers, and each
+    tier gets a full pass on its own interval. A pass re-polls statistics in
+    50-ID videos.list batches at STATS quota priority and writes only the
+    videos whose counts changed, so write volume follows churn rather than
+    collection size. When each tier last ran is kept in MongoDB, so a restart
+    does not repeat a cold pass that already ran today. Count changes are
+    appended to view_history by the writer's ViewHistoryObserver, and the history's
+    retention is applied once a day.
+    """
+
+    def __init__(self, db, tiers: list = None):
+        self.db = db
+        self.collection = db['videos']
+        self.state = db[REFRESH_STATE_COLLECTION]
+        self.tiers = tiers or TIERS
+        self._compacted_at = None
+        self.writer = AsyncBulkUpserter(
+            self.collection, max_batch=500, max_latency=2.0, observers=[ChannelStatsObserver(db), ViewHistoryObserver(db)]
+        )
+
+    async def _last_pass(self, tier: str):
+        state = await self.state.find_one({"tier": tier})
+        return state["last_pass_at"] if state else None
+
+    async def refresh_tier(self, name: str, youngest: timedelta, oldest: timedelta) -> dict:
+        """Run one pass over a tier; returns counts of polled, changed and missing videos"""
+        started_at = datetime.utcnow()
+        counts = {"polled": 0, "changed": 0, "missing": 0, "api_calls": 0}
+        cursor = self.collection.find(
+            _tier_query(started_at, youngest, oldest),
+            {"_id": 0, "video_id": 1, "view_count": 1, "like_count": 1}
+        )
+
+        async def refresh_round(stored: dict):
+            fresh = await fetch_videos_statistics(stored.keys(), priority=Priority.STATS)
+            counts["polled"] += len(stored)
+            counts["api_calls"] += -(-len(stored) // MAX_IDS_PER_REQUEST)
+            counts["missing"] += len(stored) - len(fresh)
+            for video_id, statistics in fresh.items():
+                changed = {
+                    field: value for field, value in statistics.items()
+                    if stored[video_id].get(field) != value
+                }
+                if changed:
+                    views = statistics["view_count"]
+                    changed["like_rate"] = round(statistics["like_count"] / views, 6) if views else 0.0
+                    changed["stats_updated_at"] = started_at
+                    await self.writer.update(video_id, changed)
+                    counts["changed"] += 1
+
+        stored = {}
+        async for video in cursor:
+            stored[video["video_id"]] = video
+            if len(stored) >= STATS_IDS_PER_ROUND:
+                await refresh_round(stored)
+                stored = {}
+        if stored:
+            await refresh_round(stored)
+        await self.writer.flush()
+
+        await self.state.update_one(
+            {"tier": name},
+            {"$set": {"last_pass_at": started_at, **counts}},
+            upsert=True
+        )
+        return counts
+
+    async def run_due(self) -> dict:
+        """Refresh every tier whose interval has elapsed; returns per-tier counts"""
+        results = {}
+        for name, youngest, oldest, interval_minutes in self.tiers:
+            last_pass = await self._last_pass(name)
+            if last_pass and datetime.utcnow() - last_pass < timedelta(minutes=interval_minutes):
+                continue
+            start = time.monotonic()
+            try:
+                counts = await self.refresh_tier(name, youngest, oldest)
+            except QuotaExhaustedError as e:
+                # The tier stays due and is picked up again once quota is available
+                await self.writer.flush()
+                logger.warning(f"Stats refresh of {name} tier paused: {str(e)}")
+                break
+            results[name] = counts
+            logger.info(
+                f"Refreshed {name} tier: {counts['polled']} polled, {counts['changed']} changed, "
+                f"{counts['missing']} missing, {counts['api_calls']} API calls in {time.monotonic() - start:.1f}s"
+            )
+        if self._compacted_at is None or datetime.utcnow() - self._compacted_at >= HISTORY_COMPACTION_INTERVAL:
+            await compact_view_history_async(self.db)
+            self._compacted_at = datetime.utcnow()
+        return results
+
+    async def run_forever(self, poll_seconds: float = STATS_POLL_SECONDS):
+        """Check for due tiers every `poll_seconds` until cancelled"""
+        try:
+            while True:
+                try:
+                    await self.run_due()
+                except Exception as e:
+                    logger.error(f"Stats refresh failed: {str(e)}")
+                await asyncio.sleep(poll_seconds)
+        finally:
+            await self.writer.close()
+
+async def refresh_statistics(once: bool = False):
+    """Run the refresher (a single pass over due tiers when `once`)"""
+    db = get_database()
+    refresher = StatsRefresher(db)
+    quota_sync = asyncio.create_task(get_quota_scheduler().run_usage_sync(db))
+    try:
+        if once:
+            await refresher.run_due()
+            await refresher.writer.close()
+        else:
+            await refresher.run_forever()
+    finally:
+        quota_sync.cancel()
+        await asyncio.gather(quota_sync, return_exceptions=True)
+        await close_youtube_client()
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep stored view/like counts fresh on a tiered schedule")
+    parser.add_argument("--once", action="store_true", help="Refresh due tiers once and exit")
+    args = parser.parse_args()
+    asyncio.run(refresh_statistics(once=args.once))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
-from googleapiclient.discovery import build
-from datetime import datetime
+from data_ingestion.youtube_client import get_youtube_client
+from data_ingestion.quota import Priority, QuotaExhaustedError
+from data_ingestion.metadata_processor import normalize_video_batch
+from typing import Iterable
+import asyncio
 import os
 from dotenv import load_dotenv
 import logging
@@ -14,99 +17,245 @@ YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 if not YOUTUBE_API_KEY:
     raise ValueError("YOUTUBE_API_KEY not found in .env file!")
 
-youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+# videos.list accepts at most 50 comma-separated IDs per request
+MAX_IDS_PER_REQUEST = 50
 
-def fetch_video_metadata_sync(video_id: str) -> dict:
-    """Fetch complete metadata for a single video (synchronous)"""
+def _chunked(video_ids: Iterable[str], size: int = MAX_IDS_PER_REQUEST):
+    """Yield de-duplicated video IDs in lists of at most `size`"""
+    seen = set()
+    chunk = []
+    for video_id in video_ids:
+        if not video_id or video_id in seen:
+            continue
+        seen.add(video_id)
+        chunk.append(video_id)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class MetadataFetchError(Exception):
+    """
+    One or more videos.list batches failed as a whole (timeout, 5xx, ...)
+
+    Attributes:
+        video_ids: IDs from the failed batches; they were never looked up
+        results: Metadata (or None) for the IDs whose batches succeeded
+    """
+
+    def __init__(self, video_ids: list, results: dict, cause: Exception):
+        super().__init__(f"Metadata lookup failed for {len(video_ids)} video(s): {str(cause)}")
+        self.video_ids = video_ids
+        self.results = results
+
+async def _fetch_metadata_chunk(chunk: list, priority: Priority) -> dict:
+    """Fetch one videos.list batch (at most 50 IDs)"""
+    response = await get_youtube_client().videos_list(
+        priority=priority,
+        part="snippet,statistics,contentDetails",
+        id=",".join(chunk),
+        maxResults=MAX_IDS_PER_REQUEST
+    )
+
+    found = {video["video_id"]: video for video in normalize_video_batch(response.get('items', []))}
+
+    results = {}
+    for video_id in chunk:
+        if video_id not in found:
+            logger.warning(f"No metadata found for video: {video_id} (missing or private)")
+        results[video_id] = found.get(video_id)
+    return results
+
+async def fetch_videos_metadata(video_ids: Iterable[str], priority: Priority = Priority.BACKFILL) -> dict:
+    """
+    Fetch metadata for many videos using one videos.list call per 50 IDs
+
+    Batches run concurrently, bounded by the shared client's concurrency limit.
+
+    Args:
+        video_ids: Any iterable of YouTube video IDs (duplicates are ignored)
+        priority: Quota scheduling class for the calls
+
+    Returns:
+        dict: Maps every requested video ID to its metadata, or to None when
+        the API did not return the video (missing, private or deleted)
+
+    Raises:
+        QuotaExhaustedError: The daily quota for `priority` is used up
+        MetadataFetchError: A batch failed; the error carries its IDs and the
+            results of the batches that succeeded
+    """
+    chunks = list(_chunked(video_ids))
+    batches = await asyncio.gather(
+        *(_fetch_metadata_chunk(chunk, priority) for chunk in chunks),
+        return_exceptions=True
+    )
+
+    results = {}
+    failed = []
+    error = None
+    for chunk, batch in zip(chunks, batches):
+        if isinstance(batch, QuotaExhaustedError):
+            # Not a per-video failure; let callers retry later
+            raise batch
+        if isinstance(batch, Exception):
+            logger.error(f"Error fetching batch of {len(chunk)} videos: {str(batch)}")
+            failed.extend(chunk)
+            error = batch
+            continue
+        results.update(batch)
+
+    if failed:
+        raise MetadataFetchError(failed, results, error)
+    return results
+
+async def _fetch_statistics_chunk(chunk: list, priority: Priority) -> dict:
+    """Fetch view/like counts for one videos.list batch (at most 50 IDs)"""
     try:
-        request = youtube.videos().list(
-            part="snippet,statistics,contentDetails",
-            id=video_id
+        response = await get_youtube_client().videos_list(
+            priority=priority,
+            part="statistics",
+            id=",".join(chunk),
+            maxResults=MAX_IDS_PER_REQUEST
         )
-        response = request.execute()
-        
-        if not response.get('items'):
-            logger.warning(f"No metadata found for video: {video_id}")
-            return None
-        
-        item = response['items'][0]
-        snippet = item['snippet']
-        statistics = item.get('statistics', {})
-        
-        metadata = {
-            "video_id": video_id,
-            "title": snippet['title'],
-            "url": f"https://www.youtube.com/watch?v={video_id}",
-            "upload_date": snippet['publishedAt'],
-            "view_count": int(statistics.get('viewCount', 0)),
-            "like_count": int(statistics.get('likeCount', 0)),
-            "description": snippet.get('description', '')[:500],  # Limit description length
-            "channel_id": snippet['channelId'],
-            "channel_title": snippet['channelTitle'],
-            "tags": snippet.get('tags', [])[:10],  # Limit tags
-            "duration": item['contentDetails'].get('duration', ''),
-            "ingested_at": datetime.utcnow().isoformat()
-        }
-        
-        return metadata
-        
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching video {video_id}: {str(e)}")
-        return None
-
-async def fetch_video_metadata(video_id: str) -> dict:
-    """Async wrapper for fetch_video_metadata_sync"""
-    return fetch_video_metadata_sync(video_id)
-
-async def fetch_channel_videos(channel_id: str, max_results: int = 5000) -> list:
-    """Fetch most recent videos from a channel"""
-    videos = []
-    next_page_token = None
-    
-    try:
-        logger.info(f"Starting to fetch videos for channel: {channel_id}")
-        
-        while len(videos) < max_results:
-            logger.info(f"Fetching videos... Current count: {len(videos)}/{max_results}")
-            
-            request = youtube.search().list(
-                part="id,snippet",
-                channelId=channel_id,
-                maxResults=min(50, max_results - len(videos)),
-                order="date",
-                type="video",
-                pageToken=next_page_token
-            )
-            
-            response = request.execute()
-            
-            if not response.get('items'):
-                logger.warning(f"No items returned from YouTube API for channel {channel_id}")
-                break
-            
-            # Extract video IDs
-            video_ids = [item['id']['videoId'] for item in response['items'] if item['id']['kind'] == 'youtube#video']
-            
-            logger.info(f"Fetched {len(video_ids)} video IDs from this page")
-            
-            # Fetch detailed metadata for each video
-            for video_id in video_ids:
-                metadata = fetch_video_metadata_sync(video_id)
-                if metadata:
-                    videos.append(metadata)
-                    
-                if len(videos) % 100 == 0:
-                    logger.info(f"✓ Progress: {len(videos)}/{max_results} videos processed")
-            
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
-                logger.info("No more pages available")
+        logger.error(f"Error fetching statistics for batch of {len(chunk)} videos: {str(e)}")
+        return {}
+
+    results = {}
+    for item in response.get('items', []):
+        statistics = item.get('statistics', {})
+        try:
+            results[item['id']] = {
+                "view_count": int(statistics.get('viewCount', 0)),
+                "like_count": int(statistics.get('likeCount', 0))
+            }
+        except (KeyError, ValueError) as e:
+            logger.error(f"Malformed statistics for video {item.get('id')}: {str(e)}")
+    return results
+
+async def fetch_videos_statistics(video_ids: Iterable[str], priority: Priority = Priority.STATS) -> dict:
+    """
+    Fetch only view_count/like_count for many videos (one call per 50 IDs)
+
+    Returns:
+        dict: Maps video ID to {"view_count", "like_count"}; videos that are
+        missing, private or in a failed batch are left out
+
+    Raises:
+        QuotaExhaustedError: The daily quota for `priority` is used up
+    """
+    results = {}
+    batches = await asyncio.gather(*(_fetch_statistics_chunk(chunk, priority) for chunk in _chunked(video_ids)))
+    for batch in batches:
+        results.update(batch)
+    return results
+
+async def fetch_video_metadata(video_id: str, priority: Priority = Priority.BACKFILL) -> dict:
+    """Fetch complete metadata for a single video (None if the API does not return it)"""
+    return (await fetch_videos_metadata([video_id], priority)).get(video_id)
+
+async def get_uploads_playlist_id(channel_id: str) -> str:
+    """Resolve the "uploads" playlist that lists every public video of a channel"""
+    response = await get_youtube_client().channels_list(
+        part="contentDetails",
+        id=channel_id
+    )
+
+    items = response.get('items', [])
+    if items:
+        return items[0]['contentDetails']['relatedPlaylists']['uploads']
+
+    # Uploads playlists share the channel ID suffix (UCxxxx -> UUxxxx)
+    if channel_id.startswith("UC"):
+        logger.warning(f"channels.list returned nothing for {channel_id}, deriving uploads playlist ID")
+        return "UU" + channel_id[2:]
+
+    raise ValueError(f"Could not resolve uploads playlist for channel {channel_id}")
+
+async def iter_upload_playlist_pages(channel_id: str, max_results: int = 5000, published_after: str = None, page_token: str = None):
+    """
+    Walk a channel's uploads playlist newest-first, one page at a time
+
+    playlistItems.list costs 1 quota unit per page (search.list costs 100) and is
+    not capped at ~500 results, so it can reach the full upload history.
+
+    Args:
+        channel_id: YouTube channel ID
+        max_results: Stop after this many video IDs
+        published_after: ISO-8601 watermark; walking stops at the first video
+            published at or before it
+        page_token: Resume from this playlistItems page token
+
+    Yields:
+        dict: One page with keys video_ids, page_token (the token that fetched
+        it), next_page_token (None on the last page), newest_published_at and
+        oldest_published_at
+    """
+    playlist_id = await get_uploads_playlist_id(channel_id)
+    next_page_token = page_token
+    seen = 0
+
+    while seen < max_results:
+        response = await get_youtube_client().playlist_items_list(
+            part="contentDetails",
+            playlistId=playlist_id,
+            maxResults=MAX_IDS_PER_REQUEST,
+            pageToken=next_page_token
+        )
+
+        video_ids = []
+        published = []
+        reached_watermark = False
+        for item in response.get('items', []):
+            details = item.get('contentDetails', {})
+            published_at = details.get('videoPublishedAt')
+            if published_after and published_at and published_at <= published_after:
+                reached_watermark = True
                 break
-        
-        logger.info(f"Successfully fetched {len(videos)} videos from channel {channel_id}")
-        return videos[:max_results]
-        
-    except Exception as e:
-        logger.error(f"Error fetching channel videos: {str(e)}")
-        logger.exception(e)  # Print full traceback
-        return videos
+            if details.get('videoId') and seen + len(video_ids) < max_results:
+                video_ids.append(details['videoId'])
+                if published_at:
+                    published.append(published_at)
+
+        seen += len(video_ids)
+        page = {
+            "video_ids": video_ids,
+            "page_token": next_page_token,
+            "next_page_token": response.get('nextPageToken'),
+            "newest_published_at": max(published) if published else None,
+            "oldest_published_at": min(published) if published else None
+        }
+
+        if reached_watermark:
+            page["next_page_token"] = None
+            logger.info(f"Reached publishedAfter watermark {published_after} for channel {channel_id}")
+        elif not page["next_page_token"]:
+            logger.info("No more pages available")
+
+        yield page
+
+        next_page_token = page["next_page_token"]
+        if not next_page_token:
+            break
+
+async def enrich_video_pages(pages):
+    """
+    Enrich an async stream of pages from iter_upload_playlist_pages
+
+    Each page is enriched with one batched videos.list call and re-yielded with
+    a "videos" list of metadata and a "failed_ids" list of videos whose lookup
+    failed and should be retried; unavailable videos are dropped.
+    """
+    async for page in pages:
+        try:
+            metadata_by_id = await fetch_videos_metadata(page["video_ids"])
+            page["failed_ids"] = []
+        except MetadataFetchError as e:
+            metadata_by_id = e.results
+            page["failed_ids"] = e.video_ids
+        page["videos"] = [metadata for metadata in metadata_by_id.values() if metadata]
+        yield page
@@ -0,0 +1,186 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+import httpx
+import logging
+from data_ingestion.quota import Priority, get_quota_scheduler
+from data_ingestion.response_cache import cache_key, get_response_cache
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# httpx logs full request URLs at INFO, which would leak the API key
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+YOUTUBE_API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+# Tunables (override via environment)
+YOUTUBE_MAX_CONCURRENCY = int(os.getenv("YOUTUBE_MAX_CONCURRENCY", "8"))
+YOUTUBE_MAX_CONNECTIONS = int(os.getenv("YOUTUBE_MAX_CONNECTIONS", "20"))
+YOUTUBE_KEEPALIVE_SECONDS = float(os.getenv("YOUTUBE_KEEPALIVE_SECONDS", "30"))
+YOUTUBE_TIMEOUT_SECONDS = float(os.getenv("YOUTUBE_TIMEOUT_SECONDS", "10"))
+
+class YouTubeAPIError(Exception):
+    """Raised when the YouTube Data API returns a non-success response"""
+
+    def __init__(self, status_code: int, reason: str, message: str):
+        super().__init__(f"YouTube API error {status_code} ({reason}): {message}")
+        self.status_code = status_code
+        self.reason = reason
+
+class AsyncYouTubeClient:
+    """
+    Non-blocking YouTube Data API v3 client
+
+    One pooled keep-alive HTTP connection set is shared by every caller, and a
+    semaphore bounds how many requests are in flight at once, so a slow call
+    only occupies one slot instead of blocking the event loop. Every request is
+    first cleared (and charged) by the process-wide QuotaScheduler. Responses are
+    kept in the shared ResponseCache and revalidated with If-None-Match, so an
+    unchanged resource comes back as a body-less 304.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        max_concurrency: int = YOUTUBE_MAX_CONCURRENCY,
+        max_connections: int = YOUTUBE_MAX_CONNECTIONS,
+        keepalive_seconds: float = YOUTUBE_KEEPALIVE_SECONDS,
+        timeout_seconds: float = YOUTUBE_TIMEOUT_SECONDS
+    ):
+        self.api_key = api_key
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=YOUTUBE_API_BASE_URL,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_seconds
+            ),
+            timeout=httpx.Timeout(timeout_seconds)
+        )
+
+    async def _get(self, resource: str, params: dict, priority: Priority = Priority.BACKFILL) -> dict:
+        """Issue a GET against a Data API resource and return the decoded body"""
+        query = {key: value for key, value in params.items() if value is not None}
+
+        cache = get_response_cache()
+        cache_entry = None
+        headers = {}
+        if cache is not None:
+            request_key = cache_key(resource, query)
+            cache_entry = await cache.lookup(request_key)
+            if cache_entry is not None:
+                etag, body, fresh = cache_entry
+                if fresh:
+                    return body
+                headers["If-None-Match"] = etag
+
+        query["key"] = self.api_key
+        await get_quota_scheduler().acquire(resource, priority)
+        async with self._semaphore:
+            response = await self._http.get(f"/{resource}", params=query, headers=headers)
+
+        if response.status_code == 304 and cache_entry is not None:
+            return cache.revalidated(request_key, cache_entry[0], cache_entry[1])
+
+        if response.status_code != 200:
+            reason, message = "unknown", response.text[:200]
+            try:
+                error = response.json()["error"]
+                message = error.get("message", message)
+                reason = error.get("errors", [{}])[0].get("reason", reason)
+            except (ValueError, KeyError, IndexError):
+                pass
+            if reason in ("quotaExceeded", "dailyLimitExceeded"):
+                get_quota_scheduler().mark_exhausted()
+            raise YouTubeAPIError(response.status_code, reason, message)
+
+        body = response.json()
+        if cache is not None:
+            cache.store(request_key, response.headers.get("ETag") or body.get("etag"), body)
+        return body
+
+    async def videos_list(self, priority: Priority = Priority.BACKFILL, **params) -> dict:
+        """videos.list"""
+        return await self._get("videos", params, priority)
+
+    async def playlist_items_list(self, priority: Priority = Priority.BACKFILL, **params) -> dict:
+        """playlistItems.list"""
+        return await self._get("playlistItems", params, priority)
+
+    async def channels_list(self, priority: Priority = Priority.BACKFILL, **params) -> dict:
+        """channels.list"""
+        return await self._get("channels", params, priority)
+
+    async def aclose(self):
+        """Close pooled connections"""
+        await self._http.aclose()
+
+# Shared client, created lazily on the event loop that first uses it
+_client = None
+_client_loop = None
+_client_options = {}
+# Closes of clients left behind by an earlier event loop, referenced until they finish
+_retiring = set()
+
+def configure_youtube_client(**options):
+    """Override AsyncYouTubeClient settings (e.g. max_concurrency) before first use"""
+    _client_options.update(options)
+
+async def _close_quietly(client: AsyncYouTubeClient):
+    try:
+        await client.aclose()
+    except Exception as e:
+        # Connections opened on a loop that has since closed cannot be shut down cleanly; they are dead already
+        logger.debug(f"Closing a YouTube client from an earlier event loop failed: {str(e)}")
+
+def _retire(client: AsyncYouTubeClient, client_loop):
+    """Close a client created on another event loop without blocking this one"""
+    if client_loop.is_running():
+        # Still serving another thread: close it there, where its connections live
+        asyncio.run_coroutine_threadsafe(_close_quietly(client), client_loop)
+        return
+    task = asyncio.get_running_loop().create_task(_close_quietly(client))
+    _retiring.add(task)
+    task.add_done_callback(_retiring.discard)
+
+def get_youtube_client() -> AsyncYouTubeClient:
+    """
+    Get the process-wide async YouTube client
+
+    The client is bound to the event loop that created it; a call from another
+    loop closes the old client's connection pool and builds a fresh one.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        api_key = os.getenv("YOUTUBE_API_KEY")
+        if not api_key:
+            raise ValueError("YOUTUBE_API_KEY not found in .env file!")
+        if _client is not None:
+            _retire(_client, _client_loop)
+        _client = AsyncYouTubeClient(api_key, **_client_options)
+        _client_loop = loop
+        max_concurrency = _client_options.get("max_concurrency", YOUTUBE_MAX_CONCURRENCY)
+        logger.info(f"YouTube client ready (max {max_concurrency} concurrent requests)")
+    return _client
+
+async def close_youtube_client():
+    """Flush pending response cache writes and close the shared YouTube client (and any it replaced), if one was created"""
+    global _client, _client_loop
+    cache = get_response_cache()
+    if cache is not None:
+        # Persist cached responses still waiting for their batched disk write
+        await cache.flush()
+    loop = asyncio.get_running_loop()
+    retiring = [task for task in _retiring if task.get_loop() is loop]
+    if retiring:
+        await asyncio.gather(*retiring)
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
+        logger.info("YouTube client closed")
@@ -0,0 +1,321 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from dotenv import load_dotenv
+from database.change_watcher import changed_since_filter
+import logging
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pull changes at most this often; reload everything this often (catches deletes)
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "30"))
+ANALYTICS_FULL_RELOAD_SECONDS = float(os.getenv("ANALYTICS_FULL_RELOAD_SECONDS", "3600"))
+
+# Writers stamp documents before their batch is flushed, so each pull looks back a little
+_WATERMARK_OVERLAP = timedelta(seconds=10)
+# upload_date is held as int64 milliseconds since the epoch; NaT's value marks a missing date
+MISSING_DATE = np.iinfo(np.int64).min
+_DAY_MS = 86400 * 1000
+
+_PROJECTION = {
+    "_id": 0, "video_id": 1, "channel_id": 1, "channel_title": 1, "view_count": 1, "like_count": 1,
+    "upload_date": 1, "duration_seconds": 1, "ingested_at": 1, "stats_updated_at": 1
+}
+
+# Numeric columns a query can aggregate over
+METRICS = ("view_count", "like_count", "like_rate", "duration_seconds", "upload_date")
+
+class _Columns:
+    """One immutable generation of the snapshot; refreshes build a new one and swap it in"""
+
+    def __init__(self, video_ids, view_count, like_count, upload_date, duration_seconds, channel):
+        self.video_ids = video_ids
+        self.view_count = view_count
+        self.like_count = like_count
+        self.upload_date = upload_date
+        self.duration_seconds = duration_seconds
+        self.channel = channel
+        # like_count / view_count, as stored on video documents; 0 where there are no views
+        self.like_rate = np.divide(
+            like_count.astype(np.float64), view_count, out=np.zeros(len(view_count)), where=view_count > 0
+        )
+
+    def __len__(self):
+        return len(self.video_ids)
+
+    def metric(self, name: str) -> np.ndarray:
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric '{name}', expected one of {', '.join(METRICS)}")
+        return getattr(self, name)
+
+def _empty_columns() -> _Columns:
+    return _Columns(
+        np.array([], dtype=object), np.array([], dtype=np.int64), np.array([], dtype=np.int64),
+        np.array([], dtype=np.int64), np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+    )
+
+def _upload_ms(values: list) -> np.ndarray:
+    """datetimes (None where missing) -> int64 ms since the epoch, MISSING_DATE where missing"""
+    dates = np.array([value if isinstance(value, datetime) else None for value in values], dtype="datetime64[ms]")
+    return dates.astype(np.int64)
+
+class AnalyticsSnapshot:
+    """
+    Columnar copy of the videos collection for dashboard queries
+
+    view_count, like_count, upload_date (int64 ms), duration_seconds and
+    channel_id (dictionary-encoded as int32 codes into `channel_ids`) are held
+    as NumPy arrays for every video. refresh() pulls only videos whose
+    ingested_at or stats_updated_at moved past the watermark, updates their
+    rows in place of the old ones and appends new rows; a periodic full reload
+    drops deleted videos. Queries run on one consistent generation of the
+    arrays, so they never block on a refresh and are safe from any thread.
+
+    Results identify videos by video_id; callers fetch titles and URLs for the
+    handful they display.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float = ANALYTICS_REFRESH_SECONDS,
+        full_reload_seconds: float = ANALYTICS_FULL_RELOAD_SECONDS
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self.channel_ids = []
+        self.channel_titles = []
+        self._codes = {}
+        self._rows = {}
+        self._columns = _empty_columns()
+        self._watermark = None
+        self._refreshed_at = None
+        self._reloaded_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._columns)
+
+    def _code(self, channel_id: str, title: str) -> int:
+        code = self._codes.get(channel_id)
+        if code is None:
+            code = self._codes[channel_id] = len(self.channel_ids)
+            self.channel_ids.append(channel_id)
+            self.channel_titles.append(title or channel_id)
+        elif title:
+            self.channel_titles[code] = title
+        return code
+
+    def _stamp(self, video: dict):
+        for stamp in (video.get("ingested_at"), video.get("stats_updated_at")):
+            if isinstance(stamp, datetime) and (self._watermark is None or stamp > self._watermark):
+                self._watermark = stamp
+
+    def _apply(self, videos: list, full: bool):
+        """Merge fetched documents into a new generation of the columns"""
+        if full:
+            self._rows = {}
+            columns = _empty_columns()
+        else:
+            columns = self._columns
+        video_ids = [video["video_id"] for video in videos if video.get("video_id")]
+        videos = [video for video in videos if video.get("video_id")]
+        fields = {
+            "view_count": np.array([video.get("view_count") or 0 for video in videos], dtype=np.int64),
+            "like_count": np.array([video.get("like_count") or 0 for video in videos], dtype=np.int64),
+            "upload_date": _upload_ms([video.get("upload_date") for video in videos]),
+            "duration_seconds": np.array([video.get("duration_seconds") or 0 for video in videos], dtype=np.int32),
+            "channel": np.array(
+                [self._code(video.get("channel_id") or "", video.get("channel_title")) for video in videos],
+                dtype=np.int32
+            ),
+        }
+        for video in videos:
+            self._stamp(video)
+
+        # Rows that already exist are overwritten; the rest are appended
+        positions = np.array([self._rows.get(video_id, -1) for video_id in video_ids], dtype=np.int64)
+        existing = positions >= 0
+        # A video fetched twice in one batch keeps its last copy
+        fresh_ids = {}
+        for index, video_id in enumerate(video_ids):
+            if not existing[index]:
+                fresh_ids[video_id] = index
+        appended = np.array(sorted(fresh_ids.values()), dtype=np.int64)
+
+        merged = {}
+        for name, values in fields.items():
+            column = getattr(columns, name).copy()
+            column[positions[existing]] = values[existing]
+            merged[name] = np.concatenate([column, values[appended]])
+        start = len(columns)
+        merged_ids = np.concatenate([columns.video_ids, np.array([video_ids[index] for index in appended], dtype=object)])
+        for offset, index in enumerate(appended):
+            self._rows[video_ids[index]] = start + offset
+        self._columns = _Columns(merged_ids, **merged)
+
+    def refresh(self, db, full: bool = False) -> int:
+        """
+        Pull changes since the watermark (or everything) from a pymongo database
+
+        Returns:
+            int: Documents fetched
+        """
+        with self._lock:
+            full = full or self._reloaded_at is None or time.monotonic() - self._reloaded_at > self.full_reload_seconds
+            query = {}
+            if not full and self._watermark:
+                query = changed_since_filter(self._watermark - _WATERMARK_OVERLAP)
+            started = time.perf_counter()
+            videos = list(db['videos'].find(query, _PROJECTION).batch_size(10000))
+            self._apply(videos, full)
+            now = time.monotonic()
+            self._refreshed_at = now
+            if full:
+                self._reloaded_at = now
+            logger.info(
+                f"Analytics snapshot {'reloaded' if full else 'refreshed'}: {len(videos)} fetched, "
+                f"{len(self._columns)} videos, {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            return len(videos)
+
+    def refresh_if_due(self, db) -> bool:
+        """refresh() when the last one is older than refresh_seconds"""
+        if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return False
+        self.refresh(db)
+        return True
+
+    def mask(self, channel_ids: list = None, min_views: int = 0, since: datetime = None) -> np.ndarray:
+        """Boolean row filter shared by the queries below"""
+        columns = self._columns
+        selected = columns.view_count >= min_views
+        if channel_ids:
+            codes = [self._codes[channel_id] for channel_id in channel_ids if channel_id in self._codes]
+            selected &= np.isin(columns.channel, codes)
+        if since is not None:
+            selected &= columns.upload_date >= _upload_ms([since])[0]
+        return selected
+
+    def totals(self, mask: np.ndarray = None) -> dict:
+        """Video count, total and average views and likes"""
+        columns = self._columns
+        selected = mask if mask is not None else slice(None)
+        views = columns.view_count[selected]
+        likes = columns.like_count[selected]
+        count = len(views)
+        return {
+            "total_videos": count,
+            "total_views": int(views.sum()),
+            "total_likes": int(likes.sum()),
+            "avg_views": float(views.mean()) if count else 0.0,
+            "avg_likes": float(likes.mean()) if count else 0.0,
+        }
+
+    def group_by_channel(self, metric: str = "view_count", agg: str = "sum", limit: int = None, mask: np.ndarray = None) -> list:
+        """
+        Aggregate a metric per channel (agg: count, sum or mean), largest first
+
+        Returns:
+            list: dicts with channel_id, channel_title and value
+        """
+        columns = self._columns
+        channel = columns.channel if mask is None else columns.channel[mask]
+        counts = np.bincount(channel, minlength=len(self.channel_ids))
+        if agg == "count":
+            values = counts
+        else:
+            weights = columns.metric(metric) if mask is None else columns.metric(metric)[mask]
+            sums = np.bincount(channel, weights=weights, minlength=len(self.channel_ids))
+            if agg == "sum":
+                values = sums.round().astype(np.int64) if weights.dtype.kind == "i" else sums
+            elif agg == "mean":
+                values = np.divide(sums, counts, out=np.zeros(len(sums)), where=counts > 0)
+            else:
+                raise ValueError(f"Unknown aggregation '{agg}', expected count, sum or mean")
+        present = np.flatnonzero(counts)
+        order = present[np.argsort(-values[present], kind="stable")][:limit]
+        return [
+            {"channel_id": self.channel_ids[code], "channel_title": self.channel_titles[code], "value": values[code].item()}
+            for code in order
+        ]
+
+    def top_n(self, metric: str = "view_count", n: int = 10, mask: np.ndarray = None, ascending: bool = False) -> list:
+        """
+        The n videos with the highest (or lowest) value of a metric
+
+        Returns:
+            list: dicts with video_id, channel_id and value, best first
+        """
+        columns = self._columns
+        rows = np.arange(len(columns)) if mask is None else np.flatnonzero(mask)
+        if metric == "upload_date":
+            # Undated videos have no place in either order
+            rows = rows[columns.upload_date[rows] != MISSING_DATE]
+        values = columns.metric(metric)[rows]
+        n = min(n, len(rows))
+        if n == 0:
+            return []
+        # Partial selection first, so only n values are fully sorted (values are not
+        # negated for descending order: negating int64's minimum overflows)
+        if ascending:
+            best = np.argpartition(values, n - 1)[:n]
+            best = best[np.argsort(values[best], kind="stable")]
+        else:
+            best = np.argpartition(values, len(values) - n)[len(values) - n:]
+            best = best[np.argsort(values[best], kind="stable")[::-1]]
+        return [
+            {
+                "video_id": columns.video_ids[rows[index]],
+                "channel_id": self.channel_ids[columns.channel[rows[index]]],
+                "value": columns.metric(metric)[rows[index]].item()
+            }
+            for index in best
+        ]
+
+    def histogram(self, metric: str = "view_count", bins: int = 30, log: bool = False, mask: np.ndarray = None) -> dict:
+        """
+        Distribution of a metric; log spaces the bins evenly in log10(value + 1)
+
+        Returns:
+            dict: edges (bins + 1 values) and counts (bins values)
+        """
+        values = self._columns.metric(metric)
+        if mask is not None:
+            values = values[mask]
+        if metric == "upload_date":
+            values = values[values != MISSING_DATE]
+        if log:
+            counts, edges = np.histogram(np.log10(values.astype(np.float64) + 1), bins=bins)
+            edges = 10 ** edges - 1
+        else:
+            counts, edges = np.histogram(values, bins=bins)
+        return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+    def uploads_per_day(self, mask: np.ndarray = None) -> dict:
+        """
+        Videos per upload day
+
+        Returns:
+            dict: days (datetime, ascending) and counts
+        """
+        dates = self._columns.upload_date if mask is None else self._columns.upload_date[mask]
+        dates = dates[dates != MISSING_DATE]
+        days, counts = np.unique(dates // _DAY_MS, return_counts=True)
+        return {
+            "days": (days * _DAY_MS).astype("datetime64[ms]").astype(datetime).tolist(),
+            "counts": counts.tolist()
+        }
+
+_snapshot = None
+
+def get_analytics_snapshot() -> AnalyticsSnapshot:
+    """Process-wide snapshot (empty until the first refresh)"""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = AnalyticsSnapshot()
+    return _snapshot
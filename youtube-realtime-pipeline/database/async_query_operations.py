@@ -0,0 +1,193 @@
+from database.mongodb_client import get_database
+from database.query_operations import channel_query, channel_stats_pipeline
+from database.text_search import text_search_async
+from database.channel_directory import get_channel_directory
+from database.channel_stats import read_channel_stats_async
+from database.upload_rollup import count_uploads_in_window_async, upload_summary_async
+from database.view_history import video_view_series_async, channel_view_series_async
+from database.pagination import (
+    RECENT_SORT, RECENT_LEAD_TYPE, TRENDING_SORT, TRENDING_LEAD_TYPE, SEARCH_SORT, decode_cursor, page_of, page_query
+)
+from database.query_cache import (
+    MISS, RECENT, TRENDING, SEARCH, UPLOADS, CHANNEL_COUNT, CHANNEL_STATS, CHANNEL_WINDOW, get_query_cache
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Async (motor) counterparts of database.query_operations for the FastAPI routes,
+# so a slow query waits on the network instead of blocking the event loop.
+# Results are kept in the process-wide query cache until a change to videos
+# (see database.change_watcher) or the cache TTL invalidates them.
+
+async def _page(kind: str, sort: list, lead_type: str, limit: int, cursor: str = None) -> tuple:
+    db = get_database()
+    query = page_query(sort, lead_type, decode_cursor(kind, sort, cursor) if cursor else None)
+    documents = await db['videos'].find(query).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+    return page_of(kind, sort, documents, limit)
+
+async def get_recent_videos(limit: int = 10, cursor: str = None) -> tuple:
+    """
+    Get most recent videos from database, one keyset page at a time
+
+    Returns:
+        tuple: (videos, next_cursor); next_cursor is None on the last page
+
+    Raises:
+        InvalidCursor: If cursor was not issued by this listing
+    """
+    cache = get_query_cache()
+    cached = cache.get(RECENT, (limit, cursor))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    
+    videos, next_cursor = await _page("recent", RECENT_SORT, RECENT_LEAD_TYPE, limit, cursor)
+    
+    # Convert ObjectId to string
+    for video in videos:
+        video['_id'] = str(video['_id'])
+    
+    cache.put(RECENT, (limit, cursor), (videos, next_cursor), generation=generation)
+    return videos, next_cursor
+
+async def get_trending_videos(limit: int = 10, cursor: str = None) -> tuple:
+    """Get most viewed videos, one keyset page at a time (see get_recent_videos)"""
+    cache = get_query_cache()
+    cached = cache.get(TRENDING, (limit, cursor))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    
+    videos, next_cursor = await _page("trending", TRENDING_SORT, TRENDING_LEAD_TYPE, limit, cursor)
+    
+    for video in videos:
+        video['_id'] = str(video['_id'])
+    
+    cache.put(TRENDING, (limit, cursor), (videos, next_cursor), generation=generation)
+    return videos, next_cursor
+
+async def search_videos_by_keyword(keyword: str, limit: int = 10, cursor: str = None) -> tuple:
+    """Search title, tags and description, best matches first (supports "phrases" and -exclusions), paged like get_recent_videos"""
+    cache = get_query_cache()
+    cached = cache.get(SEARCH, (keyword, limit, cursor))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_database()
+    
+    after = decode_cursor("search", SEARCH_SORT, cursor) if cursor else None
+    videos = await text_search_async(db['videos'], keyword, limit + 1, after=after)
+    videos, next_cursor = page_of("search", SEARCH_SORT, videos, limit)
+    
+    for video in videos:
+        video['_id'] = str(video['_id'])
+    
+    logger.info(f"Found {len(videos)} videos matching keyword: {keyword}")
+    cache.put(SEARCH, (keyword, limit, cursor), (videos, next_cursor), generation=generation)
+    return videos, next_cursor
+
+async def _resolve(db, channel_name: str) -> list:
+    channel_ids = await get_channel_directory().resolve_async(db, channel_name)
+    if not channel_ids:
+        logger.info(f"No channel matches: {channel_name}")
+    return channel_ids
+
+async def count_videos_by_channel(channel_name: str) -> int:
+    """Count videos by channel name, alias or ID"""
+    cache = get_query_cache()
+    cached = cache.get(CHANNEL_COUNT, channel_name)
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_database()
+    
+    channel_ids = await _resolve(db, channel_name)
+    if not channel_ids:
+        return 0
+    count = await db['videos'].count_documents(channel_query(channel_ids))
+    
+    logger.info(f"Found {count} videos for channel: {channel_name}")
+    cache.put(CHANNEL_COUNT, channel_name, count, channel_ids, generation=generation)
+    return count
+
+async def get_channel_statistics(channel_name: str) -> dict:
+    """Get aggregate statistics for a channel (combined if the name matches several)"""
+    cache = get_query_cache()
+    cached = cache.get(CHANNEL_STATS, channel_name)
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_database()
+    
+    channel_ids = await _resolve(db, channel_name)
+    if not channel_ids:
+        return None
+    
+    # Single lookup in the materialized totals; aggregate only if they were never built
+    stats = await read_channel_stats_async(db, channel_ids)
+    if stats is None:
+        result = await db['videos'].aggregate(channel_stats_pipeline(channel_ids)).to_list(length=1)
+        if not result:
+            return None
+        stats = result[0]
+        stats.pop('_id', None)  # Remove _id field
+    
+    stats['channels'] = [get_channel_directory().title(channel_id) for channel_id in stats['channel_ids']]
+    logger.info(f"Statistics for {channel_name}: {stats}")
+    cache.put(CHANNEL_STATS, channel_name, stats, channel_ids, generation=generation)
+    return stats
+
+async def count_videos_in_timerange(channel_name: str, hours: int) -> int:
+    """Count videos uploaded in last X hours for a channel (from the hourly rollup)"""
+    cache = get_query_cache()
+    cached = cache.get(CHANNEL_WINDOW, (channel_name, hours))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_database()
+    
+    channel_ids = await _resolve(db, channel_name)
+    if not channel_ids:
+        return 0
+    
+    count = await count_uploads_in_window_async(db, channel_ids, hours)
+    logger.info(f"Found {count} videos in last {hours} hours for {channel_name}")
+    cache.put(CHANNEL_WINDOW, (channel_name, hours), count, channel_ids, generation=generation)
+    return count
+
+async def get_upload_summary(hours: int) -> dict:
+    """Uploads per channel and per hour across all channels in the last X hours"""
+    cache = get_query_cache()
+    cached = cache.get(UPLOADS, hours)
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_database()
+    
+    summary = await upload_summary_async(db, hours)
+    titles = await get_channel_directory().titles_async(db, [channel['channel_id'] for channel in summary['channels']])
+    for channel, title in zip(summary['channels'], titles):
+        channel['channel_title'] = title
+    
+    cache.put(UPLOADS, hours, summary, generation=generation)
+    return summary
+
+async def get_video_view_history(video_id: str, days: int = 30, raw: bool = False) -> list:
+    """Daily (or raw) view history of one video, oldest first"""
+    db = get_database()
+    return await video_view_series_async(db, video_id, days, raw)
+
+async def get_channel_view_history(channel_name: str, days: int = 30) -> dict:
+    """Daily views gained across a channel's videos; None if the channel is unknown"""
+    db = get_database()
+    
+    channel_ids = await _resolve(db, channel_name)
+    if not channel_ids:
+        return None
+    
+    return {
+        "channels": await get_channel_directory().titles_async(db, channel_ids),
+        "series": await channel_view_series_async(db, channel_ids, days)
+    }
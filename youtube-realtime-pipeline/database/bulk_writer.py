@@ -0,0 +1,282 @@
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _BulkBuffer:
+    """Buffering and bookkeeping shared by the sync and async bulk writers"""
+
+    def __init__(self, key: str, max_batch: int, max_latency: float):
+        self.key = key
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        # key value -> [fields to $set, upsert flag]; repeated keys are merged
+        self._pending = {}
+        self._first_buffered_at = None
+        self.inserted = 0
+        self.modified = 0
+        self.matched = 0
+        self.errors = 0
+        self.flushes = 0
+
+    def _buffer(self, key_value, fields: dict, upsert: bool):
+        """Add or merge a pending write for one document"""
+        entry = self._pending.get(key_value)
+        if entry is None:
+            self._pending[key_value] = [dict(fields), upsert]
+        else:
+            entry[0].update(fields)
+            entry[1] = entry[1] or upsert
+        if self._first_buffered_at is None:
+            self._first_buffered_at = time.monotonic()
+
+    def _should_flush(self) -> bool:
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.max_batch:
+            return True
+        return time.monotonic() - self._first_buffered_at >= self.max_latency
+
+    def _take_pending(self) -> dict:
+        """Swap out the buffer"""
+        pending, self._pending = self._pending, {}
+        self._first_buffered_at = None
+        return pending
+
+    def _restore(self, pending: dict):
+        """Put a batch that could not be written back in front of newer buffered writes"""
+        for key_value, (fields, upsert) in pending.items():
+            newer = self._pending.get(key_value)
+            if newer is not None:
+                fields = {**fields, **newer[0]}
+                upsert = upsert or newer[1]
+            self._pending[key_value] = [fields, upsert]
+        if self._pending and self._first_buffered_at is None:
+            self._first_buffered_at = time.monotonic()
+
+    def _build_operations(self, pending: dict) -> list:
+        return [
+            UpdateOne({self.key: key_value}, {"$set": fields}, upsert=upsert)
+            for key_value, (fields, upsert) in pending.items()
+        ]
+
+    def _record(self, result) -> dict:
+        """Fold a BulkWriteResult (or BulkWriteError details) into the totals"""
+        if isinstance(result, dict):
+            counts = {
+                "inserted": result.get("nUpserted", 0),
+                "modified": result.get("nModified", 0),
+                "matched": result.get("nMatched", 0),
+                "errors": len(result.get("writeErrors", []))
+            }
+        else:
+            counts = {
+                "inserted": result.upserted_count,
+                "modified": result.modified_count,
+                "matched": result.matched_count,
+                "errors": 0
+            }
+        self.inserted += counts["inserted"]
+        self.modified += counts["modified"]
+        self.matched += counts["matched"]
+        self.errors += counts["errors"]
+        self.flushes += 1
+        return counts
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def summary(self) -> dict:
+        """Totals across every flush so far"""
+        return {
+            "inserted": self.inserted,
+            "modified": self.modified,
+            "matched": self.matched,
+            "errors": self.errors,
+            "flushes": self.flushes,
+            "pending": self.pending
+        }
+
+class BulkUpserter(_BulkBuffer):
+    """
+    Buffers upserts for a pymongo collection and flushes them with unordered
+    bulk_write once `max_batch` documents are pending or the oldest has waited
+    `max_latency` seconds (checked whenever a write is added).
+
+    Optional `observers` see every flush, in order: `observer.before_flush(pending)`
+    runs before the write and its return value is passed to
+    `observer.after_flush(pending, state, failed_keys)` afterwards, where
+    `pending` maps key value -> [fields, upsert]. Either hook may be left out.
+    Observer errors are logged and never fail the write or the other observers.
+    """
+
+    def __init__(self, collection, key: str = "video_id", max_batch: int = 500, max_latency: float = 1.0, observers: list = None):
+        super().__init__(key, max_batch, max_latency)
+        self.collection = collection
+        self.observers = list(observers or [])
+
+    def upsert(self, document: dict):
+        """Queue an insert-or-update of `document`, matched on the key field"""
+        self._buffer(document[self.key], document, upsert=True)
+        if self._should_flush():
+            self.flush()
+
+    def update(self, key_value, fields: dict):
+        """Queue a $set of `fields` on an existing document (no upsert)"""
+        self._buffer(key_value, fields, upsert=False)
+        if self._should_flush():
+            self.flush()
+
+    def _notify(self, observer, hook: str, *args):
+        if not hasattr(observer, hook):
+            return None
+        try:
+            return getattr(observer, hook)(*args)
+        except Exception as e:
+            logger.error(f"Bulk writer observer {type(observer).__name__}.{hook} failed: {str(e)}")
+            return None
+
+    def flush(self) -> dict:
+        """Write everything buffered; returns this flush's counts"""
+        pending = self._take_pending()
+        if not pending:
+            return {"inserted": 0, "modified": 0, "matched": 0, "errors": 0}
+        operations = self._build_operations(pending)
+        states = [self._notify(observer, "before_flush", pending) for observer in self.observers]
+        failed_keys = set()
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            counts = self._record(result)
+        except BulkWriteError as e:
+            counts = self._record(e.details)
+            keys = list(pending)
+            failed_keys = {keys[error["index"]] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Bulk write to {self.collection.name} had {counts['errors']} failed operation(s)")
+        except Exception as e:
+            # Nothing is known to be written (e.g. the server was unreachable); keep the whole batch
+            self._restore(pending)
+            logger.error(f"Bulk write to {self.collection.name} failed, keeping {len(pending)} document(s) for the next flush: {str(e)}")
+            raise
+        for observer, state in zip(self.observers, states):
+            self._notify(observer, "after_flush", pending, state, failed_keys)
+        return counts
+
+    def close(self) -> dict:
+        """Flush remaining writes and return the overall summary"""
+        self.flush()
+        return self.summary()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class AsyncBulkUpserter(_BulkBuffer):
+    """
+    Motor variant of BulkUpserter; observer hooks are awaited
+
+    Call start() to also flush on a timer, so a trickle of writes is never held
+    longer than `max_latency` even when no further writes arrive. Writers that
+    share a `write_limiter` semaphore share one budget of in-flight bulk writes.
+    """
+
+    def __init__(
+        self,
+        collection,
+        key: str = "video_id",
+        max_batch: int = 500,
+        max_latency: float = 1.0,
+        write_limiter: asyncio.Semaphore = None,
+        observers: list = None
+    ):
+        super().__init__(key, max_batch, max_latency)
+        self.collection = collection
+        self.write_limiter = write_limiter
+        self.observers = list(observers or [])
+        self._timer_task = None
+
+    async def upsert(self, document: dict):
+        """Queue an insert-or-update of `document`, matched on the key field"""
+        self._buffer(document[self.key], document, upsert=True)
+        if self._should_flush():
+            await self.flush()
+
+    async def update(self, key_value, fields: dict):
+        """Queue a $set of `fields` on an existing document (no upsert)"""
+        self._buffer(key_value, fields, upsert=False)
+        if self._should_flush():
+            await self.flush()
+
+    async def _notify(self, observer, hook: str, *args):
+        if not hasattr(observer, hook):
+            return None
+        try:
+            return await getattr(observer, hook)(*args)
+        except Exception as e:
+            logger.error(f"Bulk writer observer {type(observer).__name__}.{hook} failed: {str(e)}")
+            return None
+
+    async def flush(self) -> dict:
+        """Write everything buffered; returns this flush's counts"""
+        pending = self._take_pending()
+        if not pending:
+            return {"inserted": 0, "modified": 0, "matched": 0, "errors": 0}
+        operations = self._build_operations(pending)
+        states = [await self._notify(observer, "before_flush", pending) for observer in self.observers]
+        failed_keys = set()
+        try:
+            if self.write_limiter is not None:
+                async with self.write_limiter:
+                    result = await self.collection.bulk_write(operations, ordered=False)
+            else:
+                result = await self.collection.bulk_write(operations, ordered=False)
+            counts = self._record(result)
+        except BulkWriteError as e:
+            counts = self._record(e.details)
+            keys = list(pending)
+            failed_keys = {keys[error["index"]] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Bulk write to {self.collection.name} had {counts['errors']} failed operation(s)")
+        except Exception as e:
+            # Nothing is known to be written (e.g. the server was unreachable); keep the whole batch
+            self._restore(pending)
+            logger.error(f"Bulk write to {self.collection.name} failed, keeping {len(pending)} document(s) for the next flush: {str(e)}")
+            raise
+        for observer, state in zip(self.observers, states):
+            await self._notify(observer, "after_flush", pending, state, failed_keys)
+        return counts
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.max_latency)
+            try:
+                if self._should_flush():
+                    await self.flush()
+            except Exception as e:
+                logger.error(f"Timed bulk flush failed: {str(e)}")
+
+    def start(self):
+        """Begin time-based flushing in the background"""
+        if self._timer_task is None:
+            self._timer_task = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> dict:
+        """Stop the flush timer, write remaining operations and return the summary"""
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            await asyncio.gather(self._timer_task, return_exceptions=True)
+            self._timer_task = None
+        await self.flush()
+        return self.summary()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,240 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from pymongo.errors import OperationFailure, PyMongoError
+from dotenv import load_dotenv
+from database.query_cache import (
+    FAMILIES, RECENT, TRENDING, SEARCH, UPLOADS, CHANNEL_COUNT, CHANNEL_STATS, CHANNEL_WINDOW,
+    publish_invalidations
+)
+import logging
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# auto: change stream, falling back to polling where the server has none; stream; poll
+CHANGE_WATCH_MODE = os.getenv("CHANGE_WATCH_MODE", "auto").lower()
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "5"))
+
+# Server errors meaning change streams are unavailable (standalone mongod) or the resume point is gone
+_NO_CHANGE_STREAMS = 40573
+_HISTORY_LOST = 286
+
+_POLL_OVERLAP = timedelta(seconds=10)
+
+_STREAM_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete", "drop", "rename", "invalidate"]}}},
+    {"$project": {
+        "operationType": 1,
+        "fullDocument.channel_id": 1,
+        "updateDescription.updatedFields": 1,
+        "updateDescription.removedFields": 1
+    }}
+]
+
+def changed_since_filter(since: datetime) -> dict:
+    """
+    Videos ingested or given refreshed statistics after `since`
+
+    Both stamps are BSON datetimes; documents still holding the old ISO
+    strings are not matched until scripts/migrate_upload_dates.py converts them.
+    """
+    return {"$or": [{"ingested_at": {"$gt": since}}, {"stats_updated_at": {"$gt": since}}]}
+
+def _everything() -> set:
+    return {(family, None) for family in FAMILIES}
+
+def _new_video(channel_id: str) -> set:
+    """A video appeared (or was replaced): every listing and its channel's figures may change"""
+    invalidations = {(RECENT, None), (TRENDING, None), (SEARCH, None), (UPLOADS, None)}
+    if channel_id:
+        invalidations |= {(CHANNEL_COUNT, channel_id), (CHANNEL_STATS, channel_id), (CHANNEL_WINDOW, channel_id)}
+    else:
+        invalidations |= {(CHANNEL_COUNT, None), (CHANNEL_STATS, None), (CHANNEL_WINDOW, None)}
+    return invalidations
+
+def invalidations_for_change(change: dict) -> set:
+    """
+    Map one change event on videos to the cached queries it can affect
+
+    Only changes to what decides membership, order or aggregates are mapped
+    (e.g. view_count reorders trending and moves channel totals); anything
+    else, like refreshed counts shown inside a recent listing, is left to the
+    cache TTL.
+
+    Returns:
+        set: (family, channel_id) pairs; channel_id None means the whole family
+    """
+    operation = change.get("operationType")
+    channel_id = (change.get("fullDocument") or {}).get("channel_id")
+    if operation in ("insert", "replace"):
+        return _new_video(channel_id)
+    if operation != "update":
+        # Deletes carry no channel; drops and renames affect everything
+        return _everything()
+
+    description = change.get("updateDescription") or {}
+    fields = {field.split(".")[0] for field in description.get("updatedFields", {})}
+    fields |= {field.split(".")[0] for field in description.get("removedFields", [])}
+    if "channel_id" in fields:
+        # The previous channel is unknown, so its figures cannot be targeted
+        return _everything()
+
+    # channel_id is None if the video was deleted before the lookup; that widens to the whole family
+    invalidations = set()
+    if "upload_date" in fields:
+        invalidations |= {(RECENT, None), (UPLOADS, None), (CHANNEL_WINDOW, channel_id)}
+    if fields & {"view_count", "like_count"}:
+        invalidations |= {(TRENDING, None), (CHANNEL_STATS, channel_id)}
+    if fields & {"title", "description", "tags"}:
+        invalidations.add((SEARCH, None))
+    return invalidations
+
+class ChangeWatcher:
+    """
+    Turns writes to videos into cache invalidations for this process
+
+    Runs in a daemon thread on a pymongo database. It follows a change stream
+    on videos, batching events that arrive together and publishing them to
+    every cache registered with database.query_cache. Lost connections resume
+    from the last token; if the resume point has aged out, caches are cleared.
+    Without change streams (a standalone mongod in local development) it polls
+    for videos whose ingested_at or stats_updated_at moved forward instead;
+    polled changes cannot be told apart, so each is treated as a new video.
+    """
+
+    def __init__(self, db, mode: str = CHANGE_WATCH_MODE, poll_seconds: float = CHANGE_POLL_SECONDS, batch_size: int = 100):
+        self.collection = db['videos']
+        self.mode = mode
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.active_mode = None
+        self.events = 0
+        self.publishes = 0
+        self._resume_token = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="change-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"mode": self.active_mode, "events": self.events, "publishes": self.publishes}
+
+    def _publish(self, invalidations: set, everything: bool = False):
+        if invalidations or everything:
+            publish_invalidations(invalidations, everything=everything)
+            self.publishes += 1
+
+    def _run(self):
+        if self.mode in ("auto", "stream"):
+            try:
+                self._watch_stream()
+                return
+            except OperationFailure as e:
+                if self.mode == "stream" or e.code != _NO_CHANGE_STREAMS:
+                    logger.error(f"Change stream on videos stopped: {str(e)}")
+                    return
+                logger.info("Change streams need a replica set; polling videos for changes instead")
+        self._poll()
+
+    def _watch_stream(self):
+        self.active_mode = "stream"
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with self.collection.watch(
+                    _STREAM_PIPELINE, full_document="updateLookup",
+                    resume_after=self._resume_token, max_await_time_ms=1000
+                ) as stream:
+                    logger.info("Watching videos for changes")
+                    backoff = 1.0
+                    while not self._stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        invalidations = set()
+                        batch = 0
+                        while change is not None:
+                            self.events += 1
+                            invalidations |= invalidations_for_change(change)
+                            batch += 1
+                            if batch >= self.batch_size:
+                                break
+                            change = stream.try_next()
+                        self._resume_token = stream.resume_token
+                        self._publish(invalidations)
+            except OperationFailure as e:
+                if e.code == _NO_CHANGE_STREAMS:
+                    raise
+                if e.code == _HISTORY_LOST:
+                    # Events were missed; nothing cached can be trusted
+                    logger.warning("Change stream resume point expired; clearing caches")
+                    self._resume_token = None
+                    self._publish(set(), everything=True)
+                    continue
+                logger.error(f"Change stream error, retrying in {backoff:.0f}s: {str(e)}")
+            except PyMongoError as e:
+                logger.error(f"Change stream error, retrying in {backoff:.0f}s: {str(e)}")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _poll(self):
+        self.active_mode = "poll"
+        since = datetime.utcnow()
+        # video_id -> timestamps already handled inside the overlap window
+        seen = None
+        count = None
+        while not self._stop.is_set():
+            try:
+                invalidations = set()
+                # Writers stamp documents before their batch is flushed, so look back a little
+                cursor = self.collection.find(
+                    changed_since_filter(since - _POLL_OVERLAP),
+                    {"_id": 0, "video_id": 1, "channel_id": 1, "ingested_at": 1, "stats_updated_at": 1}
+                )
+                current_seen = {}
+                for video in cursor:
+                    stamps = (video.get("ingested_at"), video.get("stats_updated_at"))
+                    current_seen[video.get("video_id")] = stamps
+                    if seen is None or seen.get(video.get("video_id")) == stamps:
+                        # The first pass only records what already happened before the watcher started
+                        continue
+                    self.events += 1
+                    invalidations |= _new_video(video.get("channel_id"))
+                    since = max([since] + [stamp for stamp in stamps if isinstance(stamp, datetime)])
+                seen = current_seen
+                # Deletes leave no trace to find; a shrinking collection is the only sign
+                current = self.collection.estimated_document_count()
+                if count is not None and current < count:
+                    invalidations |= _everything()
+                count = current
+                self._publish(invalidations)
+            except PyMongoError as e:
+                logger.error(f"Polling videos for changes failed: {str(e)}")
+            self._stop.wait(self.poll_seconds)
+
+_watcher = None
+
+def start_change_watcher(db) -> ChangeWatcher:
+    """Start the process-wide watcher (once) on a pymongo database"""
+    global _watcher
+    if _watcher is None:
+        _watcher = ChangeWatcher(db)
+    _watcher.start()
+    return _watcher
+
+def stop_change_watcher():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
@@ -0,0 +1,207 @@
+from difflib import get_close_matches
+from pymongo import UpdateOne
+import re
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHANNELS_COLLECTION = "channels"
+
+# Extra names users call the tracked channels by; more can be added per channel
+# through an `aliases` array on its document in the channels collection
+CHANNEL_ALIASES = {
+    "UCnKJeK_r90jDdIuzHXC0Org": ["bloomberg", "bloomberg tv", "bloomberg television", "markets"],
+    "UCFx1nseXKTc1Culiu3neeSQ": ["ani", "ani news", "ani india"],
+}
+
+# How long a loaded directory is trusted before re-reading the channels collection
+DIRECTORY_TTL_SECONDS = 60
+
+# One group per channel, used to seed the channels collection from existing videos
+_SEED_PIPELINE = [{"$group": {"_id": "$channel_id", "channel_title": {"$last": "$channel_title"}}}]
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+def _normalize(name: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", (name or "").lower()).split())
+
+class ChannelDirectory:
+    """
+    In-memory map from user-supplied channel names to canonical channel_ids
+
+    Backed by the `channels` collection (one document per channel with its
+    current title and optional aliases), which ingest keeps up to date through
+    register_channels(). Lookups never touch MongoDB except to reload the map
+    once it is older than DIRECTORY_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: float = DIRECTORY_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._titles = {}
+        self._names = {}
+        self._loaded_at = None
+
+    def load(self, channels: list):
+        """Rebuild the lookup tables from channel documents"""
+        titles = {}
+        names = {}
+        for channel in channels:
+            channel_id = channel["channel_id"]
+            titles[channel_id] = channel.get("channel_title", channel_id)
+            for name in [titles[channel_id], *channel.get("aliases", []), *CHANNEL_ALIASES.get(channel_id, [])]:
+                key = _normalize(name)
+                if key:
+                    names.setdefault(key, [])
+                    if channel_id not in names[key]:
+                        names[key].append(channel_id)
+        self._titles = titles
+        self._names = names
+        self._loaded_at = time.monotonic()
+
+    def _seed_operations(self, groups: list) -> tuple:
+        channels = [
+            {"channel_id": group["_id"], "channel_title": group["channel_title"]}
+            for group in groups
+            if group["_id"]
+        ]
+        operations = [
+            UpdateOne({"channel_id": channel["channel_id"]}, {"$set": channel}, upsert=True)
+            for channel in channels
+        ]
+        return channels, operations
+
+    def refresh(self, db):
+        """Reload from the channels collection, seeding it from videos on first use (pymongo)"""
+        channels = list(db[CHANNELS_COLLECTION].find({}, {"_id": 0}))
+        if not channels:
+            channels, operations = self._seed_operations(list(db['videos'].aggregate(_SEED_PIPELINE)))
+            if operations:
+                db[CHANNELS_COLLECTION].bulk_write(operations, ordered=False)
+        self.load(channels)
+        logger.info(f"Channel directory loaded ({len(self._titles)} channels)")
+
+    async def refresh_async(self, db):
+        """refresh for a motor database"""
+        channels = await db[CHANNELS_COLLECTION].find({}, {"_id": 0}).to_list(length=None)
+        if not channels:
+            groups = await db['videos'].aggregate(_SEED_PIPELINE).to_list(length=None)
+            channels, operations = self._seed_operations(groups)
+            if operations:
+                await db[CHANNELS_COLLECTION].bulk_write(operations, ordered=False)
+        self.load(channels)
+        logger.info(f"Channel directory loaded ({len(self._titles)} channels)")
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def resolve(self, db, name: str) -> list:
+        """Resolve a channel name against a pymongo database; see lookup()"""
+        if self._is_stale():
+            self.refresh(db)
+        return self.lookup(name)
+
+    async def resolve_async(self, db, name: str) -> list:
+        """Resolve a channel name against a motor database; see lookup()"""
+        if self._is_stale():
+            await self.refresh_async(db)
+        return self.lookup(name)
+
+    def lookup(self, name: str) -> list:
+        """
+        Resolve a channel name, alias, ID or fragment to channel_ids, best match first
+
+        Tries, in order: a channel ID, an exact title/alias, titles/aliases that
+        contain every word of `name`, then close spellings. Returns [] when
+        nothing matches.
+        """
+        if name in self._titles:
+            return [name]
+        key = _normalize(name)
+        if not key:
+            return []
+        if key in self._names:
+            return list(self._names[key])
+
+        words = key.split()
+        matches = []
+        for candidate, channel_ids in self._names.items():
+            candidate_words = candidate.split()
+            if all(any(word_ == word or word_.startswith(word) for word_ in candidate_words) for word in words):
+                matches.extend(channel_id for channel_id in channel_ids if channel_id not in matches)
+        if matches:
+            return matches
+
+        for candidate in get_close_matches(key, list(self._names), n=3, cutoff=0.8):
+            matches.extend(channel_id for channel_id in self._names[candidate] if channel_id not in matches)
+        return matches
+
+    def invalidate(self):
+        """Reload on the next lookup"""
+        self._loaded_at = None
+
+    def title(self, channel_id: str) -> str:
+        return self._titles.get(channel_id, channel_id)
+
+    async def titles_async(self, db, channel_ids: list) -> list:
+        """Titles for channel_ids, reloading a stale directory from a motor database"""
+        if self._is_stale():
+            await self.refresh_async(db)
+        return [self.title(channel_id) for channel_id in channel_ids]
+
+    def _suggestions(self, name: str, limit: int) -> list:
+        return get_close_matches(name, list(self._titles.values()), n=limit, cutoff=0.3)
+
+    def suggest(self, db, name: str, limit: int = 5) -> list:
+        """Channel titles that look like `name`, for "did you mean" replies (pymongo)"""
+        if self._is_stale():
+            self.refresh(db)
+        return self._suggestions(name, limit)
+
+    async def suggest_async(self, db, name: str, limit: int = 5) -> list:
+        """suggest for a motor database"""
+        if self._is_stale():
+            await self.refresh_async(db)
+        return self._suggestions(name, limit)
+
+# Process-wide directory
+_directory = ChannelDirectory()
+# channel_id -> title this process has already written to the channels collection
+_registered = {}
+
+def get_channel_directory() -> ChannelDirectory:
+    """Get the process-wide channel directory"""
+    return _directory
+
+async def register_channels(db, videos: list):
+    """
+    Record the channels of freshly ingested videos (motor)
+
+    Only channels that are new to this process, or whose title changed, cause a
+    write, so steady-state ingest adds no database traffic.
+    """
+    operations = []
+    channel_ids = []
+    for video in videos:
+        channel_id = video.get("channel_id")
+        title = video.get("channel_title")
+        if not channel_id or _registered.get(channel_id) == title:
+            continue
+        _registered[channel_id] = title
+        channel_ids.append(channel_id)
+        operations.append(UpdateOne(
+            {"channel_id": channel_id},
+            {"$set": {"channel_id": channel_id, "channel_title": title}},
+            upsert=True
+        ))
+    if operations:
+        try:
+            await db[CHANNELS_COLLECTION].bulk_write(operations, ordered=False)
+        except Exception as e:
+            for channel_id in channel_ids:
+                _registered.pop(channel_id, None)
+            logger.error(f"Could not register channels: {str(e)}")
+            return
+        # Makes the new names resolvable here right away; other processes pick them up on reload
+        _directory.invalidate()
@@ -0,0 +1,192 @@
+from datetime import datetime
+from pymongo import UpdateOne
+from database.bulk_writer import BulkUpserter
+from database.rollup_state import CHANNEL_STATS_BUILT, is_built, is_built_async, mark_built
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHANNEL_STATS_COLLECTION = "channel_stats"
+
+# Totals kept per channel
+_TOTAL_FIELDS = ("video_count", "total_views", "total_likes")
+
+def _contribution(video: dict) -> dict:
+    """What one stored video adds to its channel's totals"""
+    return {
+        "video_count": 1,
+        "total_views": video.get("view_count") or 0,
+        "total_likes": video.get("like_count") or 0,
+    }
+
+class ChannelStatsObserver:
+    """
+    Keeps the channel_stats collection in step with writes to videos
+
+    Attach to an AsyncBulkUpserter (observers=[...]). Before each flush it reads the
+    stored counts of the videos about to be written, in one indexed query; after
+    the flush it turns old-vs-new into per-channel $inc deltas (plus $min/$max
+    on upload dates for new videos) and applies them in one bulk write.
+    Concurrent writers can race on the same video, so totals may drift slightly;
+    repair_channel_stats() recomputes them exactly.
+    """
+
+    def __init__(self, db, key: str = "video_id"):
+        self.videos = db['videos']
+        self.stats = db[CHANNEL_STATS_COLLECTION]
+        self.key = key
+
+    async def before_flush(self, pending: dict) -> dict:
+        previous = {}
+        cursor = self.videos.find(
+            {self.key: {"$in": list(pending)}},
+            {"_id": 0, self.key: 1, "channel_id": 1, "view_count": 1, "like_count": 1, "upload_date": 1}
+        )
+        async for video in cursor:
+            previous[video[self.key]] = video
+        return previous
+
+    async def after_flush(self, pending: dict, previous: dict, failed_keys: set):
+        if previous is None:
+            # The pre-flush read failed; deltas cannot be computed for this batch
+            return
+        deltas = {}
+        now = datetime.utcnow()
+
+        def add(channel_id: str, changes: dict):
+            delta = deltas.setdefault(channel_id, {"inc": {}, "first": None, "last": None, "title": None})
+            for field, value in changes.items():
+                delta["inc"][field] = delta["inc"].get(field, 0) + value
+
+        for key_value, (fields, upsert) in pending.items():
+            if key_value in failed_keys:
+                continue
+            old = previous.get(key_value)
+            if old is None and not upsert:
+                continue
+            new = {**(old or {}), **fields}
+            channel_id = new.get("channel_id")
+            if not channel_id:
+                continue
+            if old is not None and old.get("channel_id") == channel_id:
+                before = _contribution(old)
+                after = _contribution(new)
+                add(channel_id, {field: after[field] - before[field] for field in _TOTAL_FIELDS})
+            else:
+                if old is not None and old.get("channel_id"):
+                    add(old["channel_id"], {field: -value for field, value in _contribution(old).items()})
+                add(channel_id, _contribution(new))
+                upload_date = new.get("upload_date")
+                if isinstance(upload_date, datetime):
+                    delta = deltas[channel_id]
+                    delta["first"] = min(filter(None, [delta["first"], upload_date]))
+                    delta["last"] = max(filter(None, [delta["last"], upload_date]))
+            if fields.get("channel_title"):
+                deltas[channel_id]["title"] = fields["channel_title"]
+
+        operations = []
+        for channel_id, delta in deltas.items():
+            increments = {field: value for field, value in delta["inc"].items() if value}
+            update = {"$set": {"updated_at": now}}
+            if increments:
+                update["$inc"] = increments
+            if delta["first"]:
+                update["$min"] = {"first_upload": delta["first"]}
+                update["$max"] = {"last_upload": delta["last"]}
+            if delta["title"]:
+                update["$set"]["channel_title"] = delta["title"]
+            if increments or delta["first"] or delta["title"]:
+                operations.append(UpdateOne({"channel_id": channel_id}, update, upsert=True))
+        if operations:
+            await self.stats.bulk_write(operations, ordered=False)
+
+def _combine(documents: list) -> dict:
+    if not documents:
+        return None
+    total_videos = sum(document.get("video_count", 0) for document in documents)
+    total_views = sum(document.get("total_views", 0) for document in documents)
+    total_likes = sum(document.get("total_likes", 0) for document in documents)
+    firsts = [document["first_upload"] for document in documents if document.get("first_upload")]
+    lasts = [document["last_upload"] for document in documents if document.get("last_upload")]
+    return {
+        "channel_ids": [document["channel_id"] for document in documents],
+        "total_videos": total_videos,
+        "total_views": total_views,
+        "total_likes": total_likes,
+        "avg_views": total_views / total_videos if total_videos else 0,
+        "avg_likes": total_likes / total_videos if total_videos else 0,
+        "first_upload": min(firsts) if firsts else None,
+        "last_upload": max(lasts) if lasts else None
+    }
+
+def read_channel_stats(db, channel_ids: list) -> dict:
+    """
+    Combined totals for channels from the channel_stats collection (pymongo)
+
+    Returns:
+        dict: channel_ids, total_videos, total_views, total_likes, avg_views,
+        avg_likes, first_upload, last_upload; None if no channel has stats yet
+        or the totals have never been built from the videos collection (they
+        would only cover videos written since deploy), so callers aggregate
+    """
+    if not is_built(db, CHANNEL_STATS_BUILT):
+        return None
+    return _combine(list(db[CHANNEL_STATS_COLLECTION].find({"channel_id": {"$in": channel_ids}}, {"_id": 0})))
+
+async def read_channel_stats_async(db, channel_ids: list) -> dict:
+    """read_channel_stats for a motor database"""
+    if not await is_built_async(db, CHANNEL_STATS_BUILT):
+        return None
+    cursor = db[CHANNEL_STATS_COLLECTION].find({"channel_id": {"$in": channel_ids}}, {"_id": 0})
+    return _combine(await cursor.to_list(length=None))
+
+def repair_channel_stats(db, apply: bool = True) -> list:
+    """
+    Recompute channel_stats from the videos collection and report drift (pymongo)
+
+    Returns:
+        list: One entry per channel whose stored totals differed, with the
+        stored and recomputed values
+    """
+    pipeline = [
+        {"$group": {
+            "_id": "$channel_id",
+            "channel_title": {"$last": "$channel_title"},
+            "video_count": {"$sum": 1},
+            "total_views": {"$sum": "$view_count"},
+            "total_likes": {"$sum": "$like_count"},
+            "first_upload": {"$min": "$upload_date"},
+            "last_upload": {"$max": "$upload_date"}
+        }}
+    ]
+    actual = {group.pop("_id"): group for group in db['videos'].aggregate(pipeline) if group["_id"]}
+    stored = {document["channel_id"]: document for document in db[CHANNEL_STATS_COLLECTION].find({}, {"_id": 0})}
+
+    drift = []
+    channel_ids = set(actual) | set(stored)
+    writer = BulkUpserter(db[CHANNEL_STATS_COLLECTION], key="channel_id") if apply else None
+    now = datetime.utcnow()
+    for channel_id in channel_ids:
+        expected = actual.get(channel_id, {"video_count": 0, "total_views": 0, "total_likes": 0})
+        current = stored.get(channel_id, {})
+        differences = {
+            field: {"stored": current.get(field, 0), "actual": expected.get(field, 0)}
+            for field in _TOTAL_FIELDS
+            if current.get(field, 0) != expected.get(field, 0)
+        }
+        if differences or channel_id not in stored:
+            drift.append({"channel_id": channel_id, "channel_title": expected.get("channel_title"), "fields": differences})
+        if writer is None:
+            continue
+        if channel_id in actual:
+            writer.upsert({"channel_id": channel_id, **expected, "updated_at": now})
+        else:
+            # Channels with no videos left keep their document, zeroed
+            writer.update(channel_id, {**expected, "updated_at": now})
+
+    if writer is not None:
+        writer.close()
+        mark_built(db, CHANNEL_STATS_BUILT)
+    logger.info(f"Channel stats repair: {len(drift)} of {len(channel_ids)} channels drifted")
+    return drift
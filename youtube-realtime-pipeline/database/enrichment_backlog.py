@@ -0,0 +1,50 @@
+from datetime import datetime
+from pymongo import UpdateOne
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_BACKLOG_COLLECTION = "enrichment_backlog"
+
+async def record_failed_enrichments(db, video_ids: list, error: str) -> int:
+    """
+    Keep acknowledged webhook notifications whose enrichment kept failing (motor)
+
+    One document per video_id; a video that fails again only has its attempt
+    count and last error updated.
+
+    Returns:
+        int: Videos newly added to the backlog
+    """
+    if not video_ids:
+        return 0
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"video_id": video_id},
+            {
+                "$set": {"last_error": error[:500], "failed_at": now},
+                "$inc": {"failures": 1},
+                "$setOnInsert": {"first_failed_at": now}
+            },
+            upsert=True
+        )
+        for video_id in dict.fromkeys(video_ids)
+    ]
+    result = await db[ENRICHMENT_BACKLOG_COLLECTION].bulk_write(operations, ordered=False)
+    return result.upserted_count
+
+async def backlog_video_ids(db, limit: int) -> list:
+    """Oldest failed video_ids first, at most `limit` (motor)"""
+    if limit <= 0:
+        return []
+    cursor = db[ENRICHMENT_BACKLOG_COLLECTION].find({}, {"_id": 0, "video_id": 1}).sort("failed_at", 1).limit(limit)
+    return [document["video_id"] async for document in cursor]
+
+async def clear_backlog(db, video_ids: list) -> int:
+    """Remove video_ids that were handed back for another attempt (motor)"""
+    if not video_ids:
+        return 0
+    result = await db[ENRICHMENT_BACKLOG_COLLECTION].delete_many({"video_id": {"$in": list(video_ids)}})
+    return result.deleted_count
@@ -0,0 +1,126 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from database.text_search import TEXT_INDEX
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Error codes for an index that exists with the same name/keys but other options
+_INDEX_CONFLICT_CODES = {85, 86}
+
+# collection -> indexes every query path relies on
+INDEXES = {
+    "videos": [
+        # Upsert key for the loader, webhook and stats refresher
+        IndexModel([("video_id", ASCENDING)], name="video_id_unique", unique=True),
+        # Channel filters (resolved to channel_id) and per-channel time ranges, newest first
+        IndexModel([("channel_id", ASCENDING), ("upload_date", DESCENDING)], name="channel_upload_date"),
+        # Recent videos (keyset pages on upload_date, video_id) and the stats refresher's age tiers
+        IndexModel([("upload_date", DESCENDING), ("video_id", DESCENDING)], name="upload_date_video_id"),
+        # Trending (keyset pages on view_count, video_id)
+        IndexModel([("view_count", DESCENDING), ("video_id", DESCENDING)], name="view_count_video_id"),
+        # Change watermarks for the analytics snapshot and the change watcher's polling fallback
+        IndexModel([("ingested_at", ASCENDING)], name="ingested_at"),
+        IndexModel([("stats_updated_at", ASCENDING)], name="stats_updated_at", sparse=True),
+        # Weighted full-text search over title, tags and description
+        TEXT_INDEX,
+    ],
+    "upload_counts_hourly": [
+        # Upsert key for ingest, and per-channel windows
+        IndexModel([("channel_id", ASCENDING), ("hour", DESCENDING)], name="channel_hour_unique", unique=True),
+        # All-channel windows for dashboards
+        IndexModel([("hour", DESCENDING)], name="hour"),
+    ],
+    "view_history": [
+        # One bucket per video per day; also serves per-video series
+        IndexModel([("video_id", ASCENDING), ("day", ASCENDING)], name="video_day_unique", unique=True),
+        # Per-channel series
+        IndexModel([("channel_id", ASCENDING), ("day", ASCENDING)], name="channel_day"),
+        # Retention compaction
+        IndexModel([("day", ASCENDING)], name="day"),
+    ],
+    "channels": [
+        IndexModel([("channel_id", ASCENDING)], name="channel_id_unique", unique=True),
+    ],
+    "channel_stats": [
+        IndexModel([("channel_id", ASCENDING)], name="channel_id_unique", unique=True),
+    ],
+    "enrichment_backlog": [
+        # Upsert key for failed webhook enrichments; retries take the oldest first
+        IndexModel([("video_id", ASCENDING)], name="video_id_unique", unique=True),
+        IndexModel([("failed_at", ASCENDING)], name="failed_at"),
+    ],
+    "backfill_checkpoints": [
+        IndexModel([("channel_id", ASCENDING)], name="channel_id_unique", unique=True),
+    ],
+    "api_quota_usage": [
+        IndexModel([("day", ASCENDING)], name="day_unique", unique=True),
+    ],
+    "stats_refresh_state": [
+        IndexModel([("tier", ASCENDING)], name="tier_unique", unique=True),
+    ],
+    "migrations": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+}
+
+def _log_failure(collection_name: str, error: OperationFailure):
+    if error.code in _INDEX_CONFLICT_CODES:
+        logger.warning(f"Index on {collection_name} exists with different options, leaving it as is: {error}")
+    else:
+        logger.error(f"Could not create indexes on {collection_name}: {error}")
+
+async def ensure_indexes(db) -> dict:
+    """
+    Create every index in INDEXES on a motor database (idempotent)
+
+    Existing indexes are left alone; failures (e.g. duplicate video_ids blocking
+    the unique index) are logged instead of stopping the service.
+
+    Returns:
+        dict: collection name -> names of indexes created or confirmed
+    """
+    created = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            _log_failure(collection_name, e)
+            created[collection_name] = []
+    logger.info(f"Indexes ensured on {len(INDEXES)} collections")
+    return created
+
+def ensure_indexes_sync(db) -> dict:
+    """ensure_indexes for a pymongo (sync) database"""
+    created = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            _log_failure(collection_name, e)
+            created[collection_name] = []
+    logger.info(f"Indexes ensured on {len(INDEXES)} collections")
+    return created
+
+def index_usage(db, collection_names: list = None) -> list:
+    """
+    Usage counters from $indexStats for a pymongo (sync) database
+
+    Returns:
+        list: One dict per index with collection, name, key, ops, since and
+        unused (no recorded operations since `since`; _id_ never counts)
+    """
+    report = []
+    for collection_name in collection_names or list(INDEXES):
+        for stats in db[collection_name].aggregate([{"$indexStats": {}}]):
+            ops = stats.get("accesses", {}).get("ops", 0)
+            report.append({
+                "collection": collection_name,
+                "name": stats["name"],
+                "key": dict(stats.get("key", {})),
+                "ops": ops,
+                "since": stats.get("accesses", {}).get("since"),
+                "unused": ops == 0 and stats["name"] != "_id_"
+            })
+    return report
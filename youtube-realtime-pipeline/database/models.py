@@ -1,15 +1,20 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class VideoMetadata(BaseModel):
     video_id: str = Field(..., description="YouTube video ID")
     title: str
     url: str
-    upload_date: str
+    upload_date: datetime
     view_count: int
     like_count: int
+    like_rate: float = 0.0
     description: Optional[str] = ""
     channel_id: str
     channel_title: str
-    ingested_at: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
+    title_length: int = 0
+    tags: List[str] = []
+    duration: str = ""
+    duration_seconds: int = 0
+    ingested_at: datetime = Field(default_factory=datetime.utcnow)
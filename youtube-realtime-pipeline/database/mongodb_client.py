@@ -1,5 +1,9 @@
 from pymongo import MongoClient
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
 from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
+import importlib.util
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -12,45 +16,97 @@ load_dotenv(dotenv_path=env_path)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-MONGODB_URL = os.getenv("MONGODB_URL")
+# Python module each wire compressor needs (zlib ships with Python)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
 
-if not MONGODB_URL:
-    logger.error("MONGODB_URL not found in environment variables!")
-    raise ValueError("MONGODB_URL environment variable is not set. Check your .env file.")
+class MongoSettings(BaseSettings):
+    """MongoDB connection settings, read from MONGODB_* environment variables"""
 
-logger.info(f"MongoDB URL loaded: {MONGODB_URL[:30]}...")  # Show first 30 chars for debugging
+    model_config = SettingsConfigDict(env_prefix="MONGODB_", extra="ignore")
 
-# Async client for FastAPI
-async_client = None
-async_db = None
+    url: Optional[str] = None
+    database: str = "youtube_pipeline"
+    app_name: str = "youtube-pipeline"
+    max_pool_size: int = 50
+    min_pool_size: int = 0
+    max_idle_time_ms: int = 300000
+    server_selection_timeout_ms: int = 10000
+    connect_timeout_ms: int = 10000
+    socket_timeout_ms: int = 30000
+    # Preference order; compressors whose library is not installed are skipped
+    compressors: str = "zstd,snappy,zlib"
+    # Read preference for analytics and agent reads, which tolerate slight lag
+    analytics_read_preference: str = "secondaryPreferred"
+
+    def client_options(self) -> dict:
+        """Keyword arguments shared by the pymongo and motor clients"""
+        options = {
+            "appname": self.app_name,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+        }
+        compressors = [
+            name.strip() for name in self.compressors.split(",")
+            if name.strip() in _COMPRESSOR_MODULES and importlib.util.find_spec(_COMPRESSOR_MODULES[name.strip()])
+        ]
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+        return options
+
+_settings = None
+# Clients belong to the process that created them; after a fork they are rebuilt
+_clients = {}
+_clients_pid = None
+
+def get_settings() -> MongoSettings:
+    """Get the process-wide MongoDB settings"""
+    global _settings
+    if _settings is None:
+        _settings = MongoSettings()
+    return _settings
+
+def _client(kind: str):
+    """Create (once per process) the sync or async client"""
+    global _clients, _clients_pid
+    if _clients_pid != os.getpid():
+        # Inherited clients share sockets with the parent and must not be reused
+        _clients = {}
+        _clients_pid = os.getpid()
+    if kind not in _clients:
+        settings = get_settings()
+        if not settings.url:
+            logger.error("MONGODB_URL not found in environment variables!")
+            raise ValueError("MONGODB_URL environment variable is not set. Check your .env file.")
+        client_class = AsyncIOMotorClient if kind == "async" else MongoClient
+        _clients[kind] = client_class(settings.url, **settings.client_options())
+        logger.info(
+            f"MongoDB {kind} client created (pool {settings.max_pool_size}, "
+            f"compressors {settings.client_options().get('compressors', 'none')})"
+        )
+    return _clients[kind]
 
 def get_database():
     """Get async MongoDB database for FastAPI"""
-    global async_client, async_db
-    if async_db is None:
-        async_client = AsyncIOMotorClient(MONGODB_URL)
-        async_db = async_client['youtube_pipeline']
-        logger.info("Connected to MongoDB (async)")
-    return async_db
-
-# Sync client for scripts
-sync_client = None
-sync_db = None
+    return _client("async")[get_settings().database]
 
 def get_sync_database():
     """Get synchronous MongoDB database for scripts"""
-    global sync_client, sync_db
-    if sync_db is None:
-        sync_client = MongoClient(MONGODB_URL)
-        sync_db = sync_client['youtube_pipeline']
-        logger.info("Connected to MongoDB Atlas (sync)")
-    return sync_db
+    return _client("sync")[get_settings().database]
+
+def get_analytics_database():
+    """Get a synchronous database that prefers secondaries, for analytics and agent reads"""
+    mode = read_pref_mode_from_name(get_settings().analytics_read_preference)
+    return _client("sync").get_database(get_settings().database, read_preference=make_read_preference(mode, None))
 
 def close_connections():
     """Close all database connections"""
-    global async_client, sync_client
-    if async_client:
-        async_client.close()
-    if sync_client:
-        sync_client.close()
+    global _clients
+    if _clients_pid == os.getpid():
+        for client in _clients.values():
+            client.close()
+    _clients = {}
     logger.info("Database connections closed")
@@ -0,0 +1,92 @@
+from datetime import datetime
+import base64
+import binascii
+import json
+
+# Sort keys per paged listing; the trailing video_id makes every position unique
+RECENT_SORT = [("upload_date", -1), ("video_id", -1)]
+TRENDING_SORT = [("view_count", -1), ("video_id", -1)]
+SEARCH_SORT = [("score", -1), ("upload_date", -1), ("video_id", -1)]
+
+# BSON type the leading key must have to be listed. Range matches only compare
+# values of the same type, so a document with a missing lead (or an upload_date
+# still stored as a string) would otherwise show up on the first page and never
+# after it.
+RECENT_LEAD_TYPE = "date"
+TRENDING_LEAD_TYPE = "number"
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another listing"""
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+def encode_cursor(kind: str, sort: list, document: dict) -> str:
+    """Opaque cursor pointing just past `document` in a listing sorted by `sort`"""
+    payload = {"k": kind, "v": [_encode_value(document.get(field)) for field, _ in sort]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(kind: str, sort: list, cursor: str) -> list:
+    """
+    Sort-key values stored in a cursor
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded or was issued for another listing
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload["v"]]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor("Malformed cursor")
+    if payload.get("k") != kind or len(values) != len(sort):
+        raise InvalidCursor(f"Cursor was not issued for the {kind} listing")
+    return values
+
+def keyset_filter(sort: list, values: list) -> dict:
+    """
+    Match documents strictly after `values` in `sort` order
+
+    For [(a, -1), (b, -1)] this is a < A or (a == A and b < B). The leading
+    key also gets a plain range so the planner can bound its index scan
+    instead of walking the index from the start.
+    """
+    branches = []
+    for position, (field, direction) in enumerate(sort):
+        branch = {sort[index][0]: values[index] for index in range(position)}
+        branch[field] = {"$lt" if direction < 0 else "$gt": values[position]}
+        branches.append(branch)
+    lead_field, lead_direction = sort[0]
+    return {
+        lead_field: {"$lte" if lead_direction < 0 else "$gte": values[0]},
+        "$or": branches
+    }
+
+def page_query(sort: list, lead_type: str, values: list = None) -> dict:
+    """
+    Query for one page: documents whose leading key has `lead_type`, strictly
+    after `values` when continuing from a cursor
+    """
+    query = keyset_filter(sort, values) if values is not None else {sort[0][0]: {}}
+    query[sort[0][0]]["$type"] = lead_type
+    return query
+
+def page_of(kind: str, sort: list, documents: list, limit: int) -> tuple:
+    """
+    Split a fetch of limit + 1 documents into the page and its next cursor
+
+    Returns:
+        tuple: (documents, next_cursor); next_cursor is None on the last page
+    """
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor(kind, sort, documents[-1])
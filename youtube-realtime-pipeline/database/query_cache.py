@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+import logging
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+# Upper bound on staleness for anything an invalidation does not cover (e.g. counts shown in listings)
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "30"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "2048"))
+
+# Query families; channel-scoped families are also invalidated per channel_id
+RECENT = "recent"
+TRENDING = "trending"
+SEARCH = "search"
+UPLOADS = "uploads"
+CHANNEL_COUNT = "channel_count"
+CHANNEL_STATS = "channel_stats"
+CHANNEL_WINDOW = "channel_window"
+FAMILIES = (RECENT, TRENDING, SEARCH, UPLOADS, CHANNEL_COUNT, CHANNEL_STATS, CHANNEL_WINDOW)
+
+# Returned by QueryCache.get on a miss (None is a valid cached result)
+MISS = object()
+
+class QueryCache:
+    """
+    In-process cache of query results, invalidated by family and channel
+
+    Entries are stored under (family, key) and tagged with the channel_ids they
+    depend on. invalidate(family) drops the whole family; invalidate(family,
+    channel_ids) only drops entries tagged with one of those channels. Every
+    entry also expires after `ttl_seconds`. Safe to share between threads;
+    cached values are shared and must be treated as read-only.
+    """
+
+    def __init__(self, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS, max_entries: int = QUERY_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (family, key) -> (value, channel_ids, stored_at)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; put() discards results computed across one
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @property
+    def generation(self) -> int:
+        """Take before running a query and pass to put()"""
+        return self._generation
+
+    def get(self, family: str, key):
+        """Cached value for (family, key), or MISS"""
+        with self._lock:
+            entry = self._entries.get((family, key))
+            if entry is None or time.monotonic() - entry[2] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[(family, key)]
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end((family, key))
+            self.hits += 1
+            return entry[0]
+
+    def put(self, family: str, key, value, channel_ids=(), generation: int = None):
+        """
+        Store a result; skipped if an invalidation happened after `generation`,
+        since the result may predate the change that triggered it
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[(family, key)] = (value, frozenset(channel_ids), time.monotonic())
+            self._entries.move_to_end((family, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, family: str, channel_ids=None) -> int:
+        """Drop a family, or only its entries for `channel_ids`; returns entries dropped"""
+        with self._lock:
+            self._generation += 1
+            channel_ids = set(channel_ids) if channel_ids else None
+            doomed = [
+                entry_key for entry_key, (_, tags, _) in self._entries.items()
+                if entry_key[0] == family and (channel_ids is None or tags & channel_ids)
+            ]
+            for entry_key in doomed:
+                del self._entries[entry_key]
+            self.invalidated += len(doomed)
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated
+        }
+
+_registered = []
+_registry_lock = threading.Lock()
+_query_cache = None
+
+def register_cache(cache):
+    """Subscribe a cache (anything with invalidate(family, channel_ids) and clear()) to change notifications"""
+    with _registry_lock:
+        if cache not in _registered:
+            _registered.append(cache)
+
+def unregister_cache(cache):
+    with _registry_lock:
+        if cache in _registered:
+            _registered.remove(cache)
+
+def publish_invalidations(invalidations: set, everything: bool = False):
+    """
+    Deliver invalidations to every registered cache
+
+    Args:
+        invalidations: (family, channel_id) pairs; channel_id None means the whole family
+        everything: Clear the caches outright (e.g. after a gap in the change feed)
+    """
+    by_family = {}
+    for family, channel_id in invalidations:
+        channels = by_family.setdefault(family, set())
+        if channel_id is None or channels is None:
+            by_family[family] = None
+        else:
+            channels.add(channel_id)
+    with _registry_lock:
+        caches = list(_registered)
+    for cache in caches:
+        try:
+            if everything:
+                cache.clear()
+                continue
+            for family, channels in by_family.items():
+                cache.invalidate(family, channels)
+        except Exception as e:
+            logger.error(f"Cache invalidation failed: {str(e)}")
+
+def get_query_cache() -> QueryCache:
+    """Process-wide query cache (holds nothing when QUERY_CACHE_ENABLED is false)"""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryCache(max_entries=QUERY_CACHE_MAX_ENTRIES if QUERY_CACHE_ENABLED else 0)
+        register_cache(_query_cache)
+    return _query_cache
@@ -1,5 +1,9 @@
-from database.mongodb_client import get_sync_database
-from datetime import datetime, timedelta
+from database.mongodb_client import get_analytics_database
+from database.text_search import text_search
+from database.channel_directory import get_channel_directory
+from database.channel_stats import read_channel_stats
+from database.upload_rollup import count_uploads_in_window
+from database.query_cache import MISS, RECENT, TRENDING, SEARCH, CHANNEL_COUNT, CHANNEL_STATS, CHANNEL_WINDOW, get_query_cache
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -7,7 +11,12 @@ logger = logging.getLogger(__name__)
 
 def get_recent_videos(limit: int = 10) -> list:
     """Get most recent videos from database"""
-    db = get_sync_database()
+    cache = get_query_cache()
+    cached = cache.get(RECENT, ("list", limit))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_analytics_database()
     cursor = db['videos'].find().sort("upload_date", -1).limit(limit)
     videos = list(cursor)
     
@@ -15,54 +24,58 @@ def get_recent_videos(limit: int = 10) -> list:
     for video in videos:
         video['_id'] = str(video['_id'])
     
+    cache.put(RECENT, ("list", limit), videos, generation=generation)
     return videos
 
-def search_videos_by_keyword(keyword: str, limit: int = 10) -> list:
-    """Search videos by keyword in title or description"""
-    db = get_sync_database()
-    
-    # Case-insensitive search in title and description
-    query = {
-        "$or": [
-            {"title": {"$regex": keyword, "$options": "i"}},
-            {"description": {"$regex": keyword, "$options": "i"}},
-            {"tags": {"$regex": keyword, "$options": "i"}}
-        ]
-    }
-    
-    cursor = db['videos'].find(query).sort("upload_date", -1).limit(limit)
+def get_trending_videos(limit: int = 10) -> list:
+    """Get most viewed videos"""
+    cache = get_query_cache()
+    cached = cache.get(TRENDING, ("list", limit))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_analytics_database()
+    cursor = db['videos'].find().sort("view_count", -1).limit(limit)
     videos = list(cursor)
     
     for video in videos:
         video['_id'] = str(video['_id'])
     
-    logger.info(f"Found {len(videos)} videos matching keyword: {keyword}")
+    cache.put(TRENDING, ("list", limit), videos, generation=generation)
     return videos
 
-def count_videos_by_channel(channel_name: str) -> int:
-    """Count videos by channel name (partial match)"""
-    db = get_sync_database()
+def search_videos_by_keyword(keyword: str, limit: int = 10) -> list:
+    """Search title, tags and description, best matches first (supports "phrases" and -exclusions)"""
+    cache = get_query_cache()
+    cached = cache.get(SEARCH, ("list", keyword, limit))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_analytics_database()
     
-    # Case-insensitive partial match on channel_title
-    query = {"channel_title": {"$regex": channel_name, "$options": "i"}}
-    count = db['videos'].count_documents(query)
+    videos = text_search(db['videos'], keyword, limit)
     
-    logger.info(f"Found {count} videos for channel: {channel_name}")
-    return count
-
-def get_channel_statistics(channel_name: str) -> dict:
-    """Get aggregate statistics for a channel"""
-    db = get_sync_database()
+    for video in videos:
+        video['_id'] = str(video['_id'])
     
-    pipeline = [
-        {
-            "$match": {
-                "channel_title": {"$regex": channel_name, "$options": "i"}
-            }
-        },
+    logger.info(f"Found {len(videos)} videos matching keyword: {keyword}")
+    cache.put(SEARCH, ("list", keyword, limit), videos, generation=generation)
+    return videos
+
+def channel_query(channel_ids: list) -> dict:
+    """Indexed channel_id equality (one channel) or $in match (several)"""
+    if len(channel_ids) == 1:
+        return {"channel_id": channel_ids[0]}
+    return {"channel_id": {"$in": channel_ids}}
+
+def channel_stats_pipeline(channel_ids: list) -> list:
+    """Aggregation computing combined channel statistics straight from videos"""
+    return [
+        {"$match": channel_query(channel_ids)},
         {
             "$group": {
-                "_id": "$channel_title",
+                "_id": None,
+                "channel_ids": {"$addToSet": "$channel_id"},
                 "total_videos": {"$sum": 1},
                 "total_views": {"$sum": "$view_count"},
                 "total_likes": {"$sum": "$like_count"},
@@ -71,29 +84,69 @@ def get_channel_statistics(channel_name: str) -> dict:
             }
         }
     ]
+
+def count_videos_by_channel(channel_name: str) -> int:
+    """Count videos by channel name, alias or ID"""
+    cache = get_query_cache()
+    cached = cache.get(CHANNEL_COUNT, channel_name)
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_analytics_database()
+    
+    channel_ids = get_channel_directory().resolve(db, channel_name)
+    if not channel_ids:
+        logger.info(f"No channel matches: {channel_name}")
+        return 0
+    count = db['videos'].count_documents(channel_query(channel_ids))
     
-    result = list(db['videos'].aggregate(pipeline))
-    
-    if not result:
+    logger.info(f"Found {count} videos for channel: {channel_name}")
+    cache.put(CHANNEL_COUNT, channel_name, count, channel_ids, generation=generation)
+    return count
+
+def get_channel_statistics(channel_name: str) -> dict:
+    """Get aggregate statistics for a channel (combined if the name matches several)"""
+    cache = get_query_cache()
+    cached = cache.get(CHANNEL_STATS, channel_name)
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_analytics_database()
+    
+    channel_ids = get_channel_directory().resolve(db, channel_name)
+    if not channel_ids:
+        logger.info(f"No channel matches: {channel_name}")
         return None
     
-    stats = result[0]
-    stats.pop('_id', None)  # Remove _id field
+    # Single lookup in the materialized totals; aggregate only if they were never built
+    stats = read_channel_stats(db, channel_ids)
+    if stats is None:
+        result = list(db['videos'].aggregate(channel_stats_pipeline(channel_ids)))
+        if not result:
+            return None
+        stats = result[0]
+        stats.pop('_id', None)  # Remove _id field
     
+    stats['channels'] = [get_channel_directory().title(channel_id) for channel_id in stats['channel_ids']]
     logger.info(f"Statistics for {channel_name}: {stats}")
+    cache.put(CHANNEL_STATS, channel_name, stats, channel_ids, generation=generation)
     return stats
 
 def count_videos_in_timerange(channel_name: str, hours: int) -> int:
-    """Count videos uploaded in last X hours for a channel"""
-    db = get_sync_database()
-    
-    time_threshold = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
-    
-    query = {
-        "channel_title": {"$regex": channel_name, "$options": "i"},
-        "upload_date": {"$gte": time_threshold}
-    }
-    
-    count = db['videos'].count_documents(query)
+    """Count videos uploaded in last X hours for a channel (from the hourly rollup)"""
+    cache = get_query_cache()
+    cached = cache.get(CHANNEL_WINDOW, (channel_name, hours))
+    if cached is not MISS:
+        return cached
+    generation = cache.generation
+    db = get_analytics_database()
+    
+    channel_ids = get_channel_directory().resolve(db, channel_name)
+    if not channel_ids:
+        logger.info(f"No channel matches: {channel_name}")
+        return 0
+    
+    count = count_uploads_in_window(db, channel_ids, hours)
     logger.info(f"Found {count} videos in last {hours} hours for {channel_name}")
+    cache.put(CHANNEL_WINDOW, (channel_name, hours), count, channel_ids, generation=generation)
     return count
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Markers live beside the data migrations' progress documents
+MIGRATIONS_COLLECTION = "migrations"
+
+# Set once a full rebuild has seeded the materialized totals from every stored video
+CHANNEL_STATS_BUILT = "channel_stats_built"
+UPLOAD_ROLLUP_BUILT = "upload_rollup_built"
+
+# A missing marker is looked up again after this long; a present one is trusted for good
+_RECHECK_SECONDS = 60
+
+_built = set()
+_checked_at = {}
+
+def _due(name: str) -> bool:
+    checked_at = _checked_at.get(name)
+    return checked_at is None or time.monotonic() - checked_at > _RECHECK_SECONDS
+
+def _remember(name: str, document) -> bool:
+    _checked_at[name] = time.monotonic()
+    if document is not None:
+        _built.add(name)
+    return document is not None
+
+def is_built(db, name: str) -> bool:
+    """
+    Whether a rollup has been built from the videos collection (pymongo)
+
+    Ingest only applies deltas for the videos it writes, so until a rebuild has
+    run, a rollup covers post-deploy writes only and readers must aggregate.
+    """
+    if name in _built:
+        return True
+    if not _due(name):
+        return False
+    return _remember(name, db[MIGRATIONS_COLLECTION].find_one({"name": name, "completed_at": {"$exists": True}}, {"_id": 1}))
+
+async def is_built_async(db, name: str) -> bool:
+    """is_built for a motor database"""
+    if name in _built:
+        return True
+    if not _due(name):
+        return False
+    document = await db[MIGRATIONS_COLLECTION].find_one({"name": name, "completed_at": {"$exists": True}}, {"_id": 1})
+    return _remember(name, document)
+
+def mark_built(db, name: str):
+    """Record that a rebuild covering every stored video finished (pymongo)"""
+    db[MIGRATIONS_COLLECTION].update_one(
+        {"name": name},
+        {"$set": {"completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+    _built.add(name)
+    logger.info(f"Marked {name}")
@@ -0,0 +1,81 @@
+from pymongo import TEXT, IndexModel
+from database.pagination import SEARCH_SORT, keyset_filter
+import re
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Field weights: a match in the title counts ten times one in the description
+TEXT_WEIGHTS = {"title": 10, "tags": 5, "description": 1}
+
+# A collection can have only one text index; it covers every searchable field
+TEXT_INDEX = IndexModel(
+    [(field, TEXT) for field in TEXT_WEIGHTS],
+    name="video_text",
+    weights=TEXT_WEIGHTS,
+    default_language="english"
+)
+
+_PHRASE = re.compile(r'"([^"]+)"')
+# Characters with no meaning to $text that would otherwise become part of a term
+_NOISE = re.compile(r'[^\w\s\-"\']+')
+
+def build_text_query(keyword: str) -> str:
+    """
+    Turn user input into a $text search string
+
+    Plain words are matched after English stemming and stop-word removal, and
+    any of them may match. "Quoted phrases" must appear verbatim, and a leading
+    minus excludes a term. An unbalanced trailing quote is dropped.
+    """
+    keyword = _NOISE.sub(" ", keyword or "")
+    if keyword.count('"') % 2:
+        head, _, tail = keyword.rpartition('"')
+        keyword = head + " " + tail
+    phrases = [phrase.strip() for phrase in _PHRASE.findall(keyword) if phrase.strip()]
+    words = _PHRASE.sub(" ", keyword).split()
+    words = [word for word in words if word.strip("-'")]
+    return " ".join([f'"{phrase}"' for phrase in phrases] + words)
+
+def text_search_pipeline(keyword: str, limit: int, projection: dict = None, after: list = None) -> list:
+    """
+    Aggregation for a ranked text search page (None if the keyword has no terms)
+
+    Results are ordered by SEARCH_SORT (textScore, then newest, then video_id);
+    `after` holds the sort values of the previous page's last result.
+    """
+    search = build_text_query(keyword)
+    if not search:
+        return None
+    pipeline = [
+        {"$match": {"$text": {"$search": search}}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if after is not None:
+        pipeline.append({"$match": keyset_filter(SEARCH_SORT, after)})
+    pipeline += [{"$sort": dict(SEARCH_SORT)}, {"$limit": limit}]
+    if projection:
+        projection = dict(projection)
+        if any(value for field, value in projection.items() if field != "_id"):
+            projection["score"] = 1
+        pipeline.append({"$project": projection})
+    return pipeline
+
+def text_search(collection, keyword: str, limit: int = 10, projection: dict = None, after: list = None) -> list:
+    """
+    Relevance-ranked search over title, tags and description (pymongo)
+
+    Uses the video_text index; results are ordered by MongoDB's weighted
+    textScore, newest first among equal scores, and carry a `score` field.
+
+    Returns:
+        list: Matching documents, best first
+    """
+    pipeline = text_search_pipeline(keyword, limit, projection, after)
+    return list(collection.aggregate(pipeline)) if pipeline is not None else []
+
+async def text_search_async(collection, keyword: str, limit: int = 10, projection: dict = None, after: list = None) -> list:
+    """text_search for a motor collection"""
+    pipeline = text_search_pipeline(keyword, limit, projection, after)
+    return await collection.aggregate(pipeline).to_list(length=limit) if pipeline is not None else []
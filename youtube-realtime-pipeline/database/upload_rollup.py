@@ -0,0 +1,257 @@
+from datetime import datetime, timedelta
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from database.rollup_state import UPLOAD_ROLLUP_BUILT, is_built, is_built_async, mark_built
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPLOAD_ROLLUP_COLLECTION = "upload_counts_hourly"
+
+_HOUR = timedelta(hours=1)
+
+def hour_bucket(moment: datetime) -> datetime:
+    """Start of the UTC hour containing `moment`"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def rollup_operations(deltas: dict) -> list:
+    """$inc upserts for {(channel_id, hour): change in upload count}"""
+    now = datetime.utcnow()
+    return [
+        UpdateOne(
+            {"channel_id": channel_id, "hour": hour},
+            {"$inc": {"video_count": change}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for (channel_id, hour), change in deltas.items()
+        if change
+    ]
+
+def _bucket_deltas(pending: dict, previous: dict, failed_keys: set) -> dict:
+    """{(channel_id, hour): change} for one flush of the videos bulk writer"""
+    deltas = {}
+
+    def move(video: dict, change: int):
+        if video.get("channel_id") and isinstance(video.get("upload_date"), datetime):
+            bucket = (video["channel_id"], hour_bucket(video["upload_date"]))
+            deltas[bucket] = deltas.get(bucket, 0) + change
+
+    for key_value, (fields, upsert) in pending.items():
+        if key_value in failed_keys:
+            continue
+        old = previous.get(key_value)
+        if old is None and not upsert:
+            continue
+        new = {**(old or {}), **fields}
+        if old is not None:
+            if (old.get("channel_id"), old.get("upload_date")) == (new.get("channel_id"), new.get("upload_date")):
+                continue
+            move(old, -1)
+        move(new, 1)
+    return deltas
+
+class UploadRollupObserver:
+    """
+    Keeps upload_counts_hourly in step with writes to videos
+
+    Attach to an AsyncBulkUpserter (observers=[...]). Before each flush it reads
+    the stored channel and upload date of the videos about to be written; after
+    the flush a new video adds one to its (channel, hour) bucket and a video
+    whose channel or upload date changed moves from its old bucket to the new
+    one, in a single bulk write. rebuild_upload_rollup() recomputes every bucket.
+    """
+
+    def __init__(self, db, key: str = "video_id"):
+        self.videos = db['videos']
+        self.rollup = db[UPLOAD_ROLLUP_COLLECTION]
+        self.key = key
+
+    async def before_flush(self, pending: dict) -> dict:
+        previous = {}
+        cursor = self.videos.find(
+            {self.key: {"$in": list(pending)}},
+            {"_id": 0, self.key: 1, "channel_id": 1, "upload_date": 1}
+        )
+        async for video in cursor:
+            previous[video[self.key]] = video
+        return previous
+
+    async def after_flush(self, pending: dict, previous: dict, failed_keys: set):
+        if previous is None:
+            # The pre-flush read failed; rebuild_upload_rollup() repairs the buckets
+            return
+        operations = rollup_operations(_bucket_deltas(pending, previous, failed_keys))
+        if operations:
+            await self.rollup.bulk_write(operations, ordered=False)
+
+def _window(hours: int, now: datetime = None) -> tuple:
+    """
+    Split "the last `hours` hours" into a partial first hour and whole buckets
+
+    Returns:
+        tuple: (start, boundary); uploads in [start, boundary) are counted from
+        videos, everything from boundary on is summed from the rollup
+    """
+    start = (now or datetime.utcnow()) - timedelta(hours=hours)
+    return start, hour_bucket(start) + _HOUR
+
+def _bucket_sum_pipeline(match: dict, by_channel: bool) -> list:
+    return [
+        {"$match": match},
+        {"$group": {"_id": "$channel_id" if by_channel else None, "video_count": {"$sum": "$video_count"}}}
+    ]
+
+def _edge_pipeline(start: datetime, boundary: datetime) -> list:
+    return [
+        {"$match": {"upload_date": {"$gte": start, "$lt": boundary}}},
+        {"$group": {"_id": "$channel_id", "video_count": {"$sum": 1}}}
+    ]
+
+def _hourly_pipeline(boundary: datetime) -> list:
+    return [
+        {"$match": {"hour": {"$gte": boundary}}},
+        {"$group": {"_id": "$hour", "video_count": {"$sum": "$video_count"}}},
+        {"$sort": {"_id": 1}}
+    ]
+
+# Uploads grouped by UTC hour straight from videos (rebuilds, and reads before the first one)
+_HOUR_KEY = {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$upload_date"}}
+
+def _videos_hourly_pipeline(boundary: datetime) -> list:
+    return [
+        {"$match": {"upload_date": {"$gte": boundary}}},
+        {"$group": {"_id": _HOUR_KEY, "video_count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}}
+    ]
+
+def _parse_hours(groups: list) -> list:
+    return [{"_id": datetime.strptime(group["_id"], "%Y-%m-%dT%H"), "video_count": group["video_count"]} for group in groups]
+
+def _channel_match(channel_ids: list) -> dict:
+    if len(channel_ids) == 1:
+        return {"channel_id": channel_ids[0]}
+    return {"channel_id": {"$in": channel_ids}}
+
+def count_uploads_in_window(db, channel_ids: list, hours: int) -> int:
+    """
+    Videos uploaded by these channels in the last `hours` hours (pymongo)
+
+    Sums at most `hours` hourly buckets plus an indexed count of the first,
+    partial hour, so the answer is exact. Counts videos instead until the
+    rollup has been built from the videos collection (until then its buckets
+    only hold uploads written since deploy).
+    """
+    start, boundary = _window(hours)
+    match = _channel_match(channel_ids)
+    if not is_built(db, UPLOAD_ROLLUP_BUILT):
+        return db['videos'].count_documents({**match, "upload_date": {"$gte": start}})
+    buckets = list(db[UPLOAD_ROLLUP_COLLECTION].aggregate(
+        _bucket_sum_pipeline({**match, "hour": {"$gte": boundary}}, by_channel=False)
+    ))
+    edge = db['videos'].count_documents({**match, "upload_date": {"$gte": start, "$lt": boundary}})
+    return edge + (buckets[0]["video_count"] if buckets else 0)
+
+async def count_uploads_in_window_async(db, channel_ids: list, hours: int) -> int:
+    """count_uploads_in_window for a motor database"""
+    start, boundary = _window(hours)
+    match = _channel_match(channel_ids)
+    if not await is_built_async(db, UPLOAD_ROLLUP_BUILT):
+        return await db['videos'].count_documents({**match, "upload_date": {"$gte": start}})
+    buckets = await db[UPLOAD_ROLLUP_COLLECTION].aggregate(
+        _bucket_sum_pipeline({**match, "hour": {"$gte": boundary}}, by_channel=False)
+    ).to_list(length=1)
+    edge = await db['videos'].count_documents({**match, "upload_date": {"$gte": start, "$lt": boundary}})
+    return edge + (buckets[0]["video_count"] if buckets else 0)
+
+def _summary(hours: int, buckets: list, edge: list, hourly: list) -> dict:
+    counts = {}
+    for group in buckets + edge:
+        if group["_id"]:
+            counts[group["_id"]] = counts.get(group["_id"], 0) + group["video_count"]
+    channels = sorted(
+        ({"channel_id": channel_id, "video_count": count} for channel_id, count in counts.items() if count),
+        key=lambda channel: channel["video_count"],
+        reverse=True
+    )
+    return {
+        "hours": hours,
+        "total_videos": sum(channel["video_count"] for channel in channels),
+        "channels": channels,
+        "hourly": [{"hour": group["_id"], "video_count": group["video_count"]} for group in hourly if group["video_count"]]
+    }
+
+def upload_summary(db, hours: int) -> dict:
+    """
+    Uploads per channel and per hour across all channels in the last `hours` hours (pymongo)
+
+    Returns:
+        dict: hours, total_videos, channels (channel_id, video_count; busiest
+        first) and hourly (hour, video_count for every whole hour with uploads)
+    """
+    start, boundary = _window(hours)
+    if not is_built(db, UPLOAD_ROLLUP_BUILT):
+        # Aggregate videos for the whole window until the rollup has been built
+        channels = list(db['videos'].aggregate(_edge_pipeline(start, datetime.max)))
+        hourly = _parse_hours(list(db['videos'].aggregate(_videos_hourly_pipeline(boundary))))
+        return _summary(hours, [], channels, hourly)
+    buckets = list(db[UPLOAD_ROLLUP_COLLECTION].aggregate(_bucket_sum_pipeline({"hour": {"$gte": boundary}}, by_channel=True)))
+    edge = list(db['videos'].aggregate(_edge_pipeline(start, boundary)))
+    hourly = list(db[UPLOAD_ROLLUP_COLLECTION].aggregate(_hourly_pipeline(boundary)))
+    return _summary(hours, buckets, edge, hourly)
+
+async def upload_summary_async(db, hours: int) -> dict:
+    """upload_summary for a motor database"""
+    start, boundary = _window(hours)
+    if not await is_built_async(db, UPLOAD_ROLLUP_BUILT):
+        channels = await db['videos'].aggregate(_edge_pipeline(start, datetime.max)).to_list(length=None)
+        hourly = await db['videos'].aggregate(_videos_hourly_pipeline(boundary)).to_list(length=None)
+        return _summary(hours, [], channels, _parse_hours(hourly))
+    buckets = await db[UPLOAD_ROLLUP_COLLECTION].aggregate(
+        _bucket_sum_pipeline({"hour": {"$gte": boundary}}, by_channel=True)
+    ).to_list(length=None)
+    edge = await db['videos'].aggregate(_edge_pipeline(start, boundary)).to_list(length=None)
+    hourly = await db[UPLOAD_ROLLUP_COLLECTION].aggregate(_hourly_pipeline(boundary)).to_list(length=None)
+    return _summary(hours, buckets, edge, hourly)
+
+def rebuild_upload_rollup(db, apply: bool = True) -> dict:
+    """
+    Recompute every hourly bucket from the videos collection (pymongo)
+
+    Returns:
+        dict: buckets (recomputed), changed (differed from the stored count)
+        and removed (stored buckets with no videos left)
+    """
+    pipeline = [
+        {"$match": {"upload_date": {"$type": "date"}, "channel_id": {"$exists": True}}},
+        {"$group": {
+            "_id": {"channel_id": "$channel_id", "hour": _HOUR_KEY},
+            "video_count": {"$sum": 1}
+        }}
+    ]
+    actual = {
+        (group["_id"]["channel_id"], datetime.strptime(group["_id"]["hour"], "%Y-%m-%dT%H")): group["video_count"]
+        for group in db['videos'].aggregate(pipeline)
+    }
+    stored = {
+        (bucket["channel_id"], bucket["hour"]): bucket.get("video_count", 0)
+        for bucket in db[UPLOAD_ROLLUP_COLLECTION].find({}, {"_id": 0, "channel_id": 1, "hour": 1, "video_count": 1})
+    }
+
+    now = datetime.utcnow()
+    changed = [key for key, count in actual.items() if stored.get(key) != count]
+    removed = [key for key in stored if key not in actual]
+    if apply:
+        operations = [
+            ReplaceOne(
+                {"channel_id": channel_id, "hour": hour},
+                {"channel_id": channel_id, "hour": hour, "video_count": actual[(channel_id, hour)], "updated_at": now},
+                upsert=True
+            )
+            for channel_id, hour in changed
+        ]
+        operations += [DeleteOne({"channel_id": channel_id, "hour": hour}) for channel_id, hour in removed]
+        if operations:
+            db[UPLOAD_ROLLUP_COLLECTION].bulk_write(operations, ordered=False)
+        mark_built(db, UPLOAD_ROLLUP_BUILT)
+    logger.info(f"Upload rollup rebuild: {len(changed)} of {len(actual)} buckets changed, {len(removed)} removed")
+    return {"buckets": len(actual), "changed": len(changed), "removed": len(removed)}
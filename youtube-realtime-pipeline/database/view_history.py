@@ -0,0 +1,216 @@
+import os
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+import logging
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VIEW_HISTORY_COLLECTION = "view_history"
+
+# Raw points are kept this long, then each day is reduced to its summary; whole days are dropped after retention
+VIEW_HISTORY_RAW_DAYS = int(os.getenv("VIEW_HISTORY_RAW_DAYS", "30"))
+VIEW_HISTORY_RETENTION_DAYS = int(os.getenv("VIEW_HISTORY_RETENTION_DAYS", "730"))
+# Guard against a runaway writer growing one bucket without bound (a 5-minute poll adds 288 a day)
+VIEW_HISTORY_MAX_SAMPLES = int(os.getenv("VIEW_HISTORY_MAX_SAMPLES", "500"))
+
+# Everything in a bucket except its raw points
+_SUMMARY_PROJECTION = {
+    "_id": 0, "video_id": 1, "channel_id": 1, "day": 1, "resolution": 1, "n": 1,
+    "first_at": 1, "last_at": 1, "first_views": 1, "last_views": 1, "last_likes": 1, "views_gained": 1
+}
+
+def day_bucket(moment: datetime) -> datetime:
+    """Midnight UTC of the day containing `moment`"""
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def observation_operation(video_id: str, channel_id: str, at: datetime, views: int, likes: int, gained: int) -> UpdateOne:
+    """
+    Append one statistics observation to its video's bucket for that day
+
+    A bucket holds the day's raw points plus a running summary (first/last
+    observation, last counts and views gained since the previous observation),
+    so series queries can read summaries without touching the points.
+    """
+    return UpdateOne(
+        {"video_id": video_id, "day": day_bucket(at)},
+        {
+            "$push": {"samples": {"$each": [{"t": at, "views": views, "likes": likes}], "$slice": -VIEW_HISTORY_MAX_SAMPLES}},
+            "$inc": {"n": 1, "views_gained": gained},
+            "$min": {"first_at": at},
+            "$max": {"last_at": at},
+            "$set": {"channel_id": channel_id, "last_views": views, "last_likes": likes},
+            "$setOnInsert": {"resolution": "raw", "first_views": views}
+        },
+        upsert=True
+    )
+
+class ViewHistoryObserver:
+    """
+    Appends a view_history observation for every written video whose counts are new or changed
+
+    Attach to an AsyncBulkUpserter (observers=[...]). Before each flush it reads
+    the stored counts of the videos about to be written; after the flush every
+    video whose view or like count changed (or that is new) gets one
+    observation_operation, with the views gained since its stored count, in a
+    single bulk write.
+    """
+
+    def __init__(self, db, key: str = "video_id"):
+        self.videos = db['videos']
+        self.history = db[VIEW_HISTORY_COLLECTION]
+        self.key = key
+
+    async def before_flush(self, pending: dict) -> dict:
+        previous = {}
+        cursor = self.videos.find(
+            {self.key: {"$in": list(pending)}},
+            {"_id": 0, self.key: 1, "channel_id": 1, "view_count": 1, "like_count": 1}
+        )
+        async for video in cursor:
+            previous[video[self.key]] = video
+        return previous
+
+    async def after_flush(self, pending: dict, previous: dict, failed_keys: set):
+        if previous is None:
+            # The pre-flush read failed; without the old counts nothing gained can be recorded
+            return
+        now = datetime.utcnow()
+        observations = []
+        for key_value, (fields, upsert) in pending.items():
+            if key_value in failed_keys or not ("view_count" in fields or "like_count" in fields):
+                continue
+            old = previous.get(key_value)
+            if old is None and not upsert:
+                continue
+            new = {**(old or {}), **fields}
+            if not new.get("channel_id"):
+                continue
+            views, likes = new.get("view_count") or 0, new.get("like_count") or 0
+            if old is not None and ((old.get("view_count") or 0), (old.get("like_count") or 0)) == (views, likes):
+                continue
+            gained = views - (old.get("view_count") or 0) if old is not None else 0
+            observations.append(observation_operation(key_value, new["channel_id"], now, views, likes, gained))
+        if observations:
+            await self.history.bulk_write(observations, ordered=False)
+
+def _since(days: int) -> datetime:
+    return day_bucket(datetime.utcnow()) - timedelta(days=days - 1)
+
+def _video_points(buckets: list, raw: bool) -> list:
+    points = []
+    for bucket in buckets:
+        if raw and bucket.get("samples"):
+            points.extend(bucket["samples"])
+        elif raw:
+            # Compacted day: its last observation stands in for the points
+            points.append({"t": bucket["last_at"], "views": bucket["last_views"], "likes": bucket.get("last_likes", 0)})
+        else:
+            points.append({
+                "day": bucket["day"],
+                "views": bucket["last_views"],
+                "likes": bucket.get("last_likes", 0),
+                "views_gained": bucket.get("views_gained", 0),
+                "observations": bucket.get("n", 0)
+            })
+    return points
+
+def _video_query(video_id: str, days: int, raw: bool) -> tuple:
+    projection = dict(_SUMMARY_PROJECTION)
+    if raw:
+        projection["samples"] = 1
+    return {"video_id": video_id, "day": {"$gte": _since(days)}}, projection
+
+def video_view_series(db, video_id: str, days: int = 30, raw: bool = False) -> list:
+    """
+    View history of one video over the last `days` days (pymongo)
+
+    Returns:
+        list: One point per day (day, views at the day's last observation,
+        likes, views_gained, observations), or with `raw` every stored
+        observation (t, views, likes); oldest first
+    """
+    query, projection = _video_query(video_id, days, raw)
+    return _video_points(list(db[VIEW_HISTORY_COLLECTION].find(query, projection).sort("day", 1)), raw)
+
+async def video_view_series_async(db, video_id: str, days: int = 30, raw: bool = False) -> list:
+    """video_view_series for a motor database"""
+    query, projection = _video_query(video_id, days, raw)
+    buckets = await db[VIEW_HISTORY_COLLECTION].find(query, projection).sort("day", 1).to_list(length=None)
+    return _video_points(buckets, raw)
+
+def _channel_pipeline(channel_ids: list, days: int) -> list:
+    return [
+        {"$match": {"channel_id": {"$in": channel_ids}, "day": {"$gte": _since(days)}}},
+        {"$group": {
+            "_id": "$day",
+            "views_gained": {"$sum": "$views_gained"},
+            "videos_observed": {"$sum": 1}
+        }},
+        {"$sort": {"_id": 1}}
+    ]
+
+def _channel_points(groups: list) -> list:
+    points = []
+    cumulative = 0
+    for group in groups:
+        cumulative += group["views_gained"]
+        points.append({
+            "day": group["_id"],
+            "views_gained": group["views_gained"],
+            "cumulative_gained": cumulative,
+            "videos_observed": group["videos_observed"]
+        })
+    return points
+
+def channel_view_series(db, channel_ids: list, days: int = 30) -> list:
+    """
+    Daily views gained across a channel's videos (pymongo)
+
+    Sums the per-bucket views_gained summaries, so no raw points are read.
+    A video not observed on a day contributes nothing that day; its growth is
+    counted on the day it is next observed.
+
+    Returns:
+        list: day, views_gained, cumulative_gained and videos_observed; oldest first
+    """
+    return _channel_points(list(db[VIEW_HISTORY_COLLECTION].aggregate(_channel_pipeline(channel_ids, days))))
+
+async def channel_view_series_async(db, channel_ids: list, days: int = 30) -> list:
+    """channel_view_series for a motor database"""
+    groups = await db[VIEW_HISTORY_COLLECTION].aggregate(_channel_pipeline(channel_ids, days)).to_list(length=None)
+    return _channel_points(groups)
+
+def _compaction(raw_days: int, retention_days: int) -> tuple:
+    today = day_bucket(datetime.utcnow())
+    downsample = (
+        {"resolution": "raw", "day": {"$lt": today - timedelta(days=raw_days)}},
+        {"$unset": {"samples": ""}, "$set": {"resolution": "daily"}}
+    )
+    expire = {"day": {"$lt": today - timedelta(days=retention_days)}}
+    return downsample, expire
+
+def compact_view_history(db, raw_days: int = VIEW_HISTORY_RAW_DAYS, retention_days: int = VIEW_HISTORY_RETENTION_DAYS) -> dict:
+    """
+    Apply retention (pymongo): drop raw points older than `raw_days`, keeping
+    each day's summary, and delete days older than `retention_days`
+
+    Returns:
+        dict: downsampled and deleted bucket counts
+    """
+    downsample, expire = _compaction(raw_days, retention_days)
+    downsampled = db[VIEW_HISTORY_COLLECTION].update_many(*downsample).modified_count
+    deleted = db[VIEW_HISTORY_COLLECTION].delete_many(expire).deleted_count
+    logger.info(f"View history compaction: {downsampled} days downsampled, {deleted} expired")
+    return {"downsampled": downsampled, "deleted": deleted}
+
+async def compact_view_history_async(db, raw_days: int = VIEW_HISTORY_RAW_DAYS, retention_days: int = VIEW_HISTORY_RETENTION_DAYS) -> dict:
+    """compact_view_history for a motor database"""
+    downsample, expire = _compaction(raw_days, retention_days)
+    downsampled = (await db[VIEW_HISTORY_COLLECTION].update_many(*downsample)).modified_count
+    deleted = (await db[VIEW_HISTORY_COLLECTION].delete_many(expire)).deleted_count
+    logger.info(f"View history compaction: {downsampled} days downsampled, {deleted} expired")
+    return {"downsampled": downsampled, "deleted": deleted}
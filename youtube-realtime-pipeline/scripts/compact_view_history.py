@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Apply view history retention
+Usage: python scripts/compact_view_history.py [--raw-days 30] [--retention-days 730]
+
+The stats refresher runs this once a day; run it by hand after changing the
+retention settings. Days older than --raw-days keep only their summary
+(last counts and views gained); days older than --retention-days are deleted.
+"""
+
+from database.mongodb_client import get_sync_database
+from database.view_history import compact_view_history, VIEW_HISTORY_RAW_DAYS, VIEW_HISTORY_RETENTION_DAYS
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Downsample and expire view history")
+    parser.add_argument("--raw-days", type=int, default=VIEW_HISTORY_RAW_DAYS, help="Days of raw observations to keep")
+    parser.add_argument("--retention-days", type=int, default=VIEW_HISTORY_RETENTION_DAYS, help="Days of history to keep")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("View history compaction")
+    print("="*60 + "\n")
+
+    result = compact_view_history(get_sync_database(), args.raw_days, args.retention_days)
+
+    print(f"📉 {result['downsampled']:,} day(s) reduced to daily summaries (older than {args.raw_days} days)")
+    print(f"🗑️  {result['deleted']:,} day(s) deleted (older than {args.retention_days} days)")
+    print("="*60 + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Concurrency load test for the metadata API
+Usage: python scripts/load_test.py --url http://localhost:8000 --requests 200 --concurrency 1 8 32
+
+Fires the same set of requests at each concurrency level and reports throughput
+and latency percentiles. With a non-blocking query layer, throughput should
+keep rising as concurrency grows instead of flattening at one request at a time.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/videos/recent?limit=10",
+    "/api/videos/trending?limit=10",
+    "/api/videos/search?keyword=news&limit=10",
+    "/api/videos/count/ANI",
+    "/api/videos/channel/Bloomberg/stats",
+    "/api/videos/channel/ANI/recent?hours=24",
+]
+
+def _percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run_level(client: httpx.AsyncClient, paths: list, total: int, concurrency: int) -> dict:
+    """Send `total` requests with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(index: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.get(paths[index % len(paths)])
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": total / elapsed if elapsed else 0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+    }
+
+async def run(url: str, api_key: str, total: int, levels: list, paths: list) -> list:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=url, headers={"X-API-Key": api_key}, limits=limits, timeout=30) as client:
+        # Warm up connections and server-side caches before measuring
+        await run_level(client, paths, len(paths), 1)
+        return [await run_level(client, paths, total, concurrency) for concurrency in levels]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API throughput at increasing concurrency")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", "my-secret-key-123"), help="X-API-Key header value")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels to test")
+    parser.add_argument("--path", action="append", help="Endpoint path to hit (repeatable; default: a mix of all endpoints)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.api_key, args.requests, args.concurrency, args.path or DEFAULT_PATHS))
+
+    print("\n" + "="*60)
+    print(f"Load test against {args.url}")
+    print("="*60)
+    print(f"{'Concurrency':>11} {'Req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'Errors':>7}")
+    for result in results:
+        print(
+            f"{result['concurrency']:>11} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} "
+            f"{result['p95_ms']:>9.1f} {result['errors']:>7}"
+        )
+    baseline = results[0]["rps"]
+    if baseline:
+        print(f"\nSpeed-up at concurrency {results[-1]['concurrency']}: {results[-1]['rps'] / baseline:.1f}x")
+    print("="*60 + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Create indexes and report how often each one is used
+Usage: python scripts/manage_indexes.py ensure
+       python scripts/manage_indexes.py stats [--collection videos]
+"""
+
+from database.mongodb_client import get_sync_database
+from database.indexes import ensure_indexes_sync, index_usage
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes")
+    parser.add_argument("command", choices=["ensure", "stats"], help="ensure: create missing indexes; stats: report usage")
+    parser.add_argument("--collection", action="append", help="Limit stats to this collection (repeatable)")
+    args = parser.parse_args()
+
+    db = get_sync_database()
+
+    print("\n" + "="*60)
+    if args.command == "ensure":
+        print("Ensuring indexes")
+        print("="*60 + "\n")
+        for collection_name, names in ensure_indexes_sync(db).items():
+            print(f"📁 {collection_name}: {', '.join(names) if names else 'failed (see log)'}")
+    else:
+        print("Index usage")
+        print("="*60 + "\n")
+        report = index_usage(db, args.collection)
+        print(f"{'Collection':<22} {'Index':<24} {'Ops':>10}  Since")
+        print("-" * 60)
+        for index in report:
+            flag = "  ⚠️  unused" if index["unused"] else ""
+            print(f"{index['collection']:<22} {index['name']:<24} {index['ops']:>10}  {index['since']}{flag}")
+        unused = [index for index in report if index["unused"]]
+        if unused:
+            print(f"\n{len(unused)} index(es) had no operations since the server last started;")
+            print("check again after a representative period before dropping any.")
+    print("="*60 + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Convert stored upload_date, ingested_at and stats_updated_at strings to BSON datetimes
+Usage: python scripts/migrate_upload_dates.py --batch-size 1000 --pause 0.2
+
+Runs online: documents are converted in small _id-ordered batches with a pause
+in between. Concurrent writers store upload_date as a datetime parsed from the
+same publishedAt, so a conversion that races one of them writes the same
+value; a racing ingested_at/stats_updated_at stamp can at worst be set back to
+its previous time. Progress is checkpointed in the `migrations` collection;
+re-running continues after the last converted _id (use --restart to scan from
+the beginning).
+"""
+
+from database.mongodb_client import get_sync_database
+from database.bulk_writer import BulkUpserter
+from data_ingestion.metadata_processor import parse_timestamps
+from datetime import datetime
+import argparse
+import time
+
+MIGRATION_NAME = "video_timestamps_to_datetime"
+
+# Fields that older writers stored as ISO-8601 strings
+TIMESTAMP_FIELDS = ("upload_date", "ingested_at", "stats_updated_at")
+
+def migrate(batch_size: int = 1000, pause: float = 0.2, restart: bool = False, dry_run: bool = False) -> dict:
+    """Convert every string timestamp; returns converted/skipped document counts"""
+    db = get_sync_database()
+    videos = db['videos']
+    migrations = db['migrations']
+
+    state = migrations.find_one({"name": MIGRATION_NAME}) or {}
+    last_id = None if restart else state.get("last_id")
+    totals = {"converted": 0, "unparseable": 0, "missing": 0}
+    # One flush per batch, so the checkpoint below never runs ahead of the writes
+    writer = BulkUpserter(videos, key="_id", max_batch=batch_size + 1, max_latency=float("inf"))
+
+    while True:
+        query = {"$or": [{field: {"$type": "string"}} for field in TIMESTAMP_FIELDS]}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(
+            videos.find(query, {"_id": 1, **{field: 1 for field in TIMESTAMP_FIELDS}})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        if not batch:
+            break
+
+        # One vectorized parse per field over the whole batch
+        parsed = {
+            field: dict(zip(
+                [video["_id"] for video in batch if isinstance(video.get(field), str)],
+                parse_timestamps([video[field] for video in batch if isinstance(video.get(field), str)])
+            ))
+            for field in TIMESTAMP_FIELDS
+        }
+        converted_ids = []
+        unset_ids = []
+        for video in batch:
+            fields = {field: parsed[field][video["_id"]] for field in TIMESTAMP_FIELDS if video["_id"] in parsed[field]}
+            bad = [field for field, value in fields.items() if value is None]
+            if bad:
+                totals["unparseable"] += 1
+                print(f"   ⚠️  Cannot parse {', '.join(f'{field} {video[field]!r}' for field in bad)} on {video['_id']}")
+                fields = {field: value for field, value in fields.items() if value is not None}
+            if not fields:
+                continue
+            converted_ids.append(video["_id"])
+            if "upload_date" in fields:
+                unset_ids.append(video["_id"])
+            if not dry_run:
+                writer.update(video["_id"], fields)
+
+        converted = len(converted_ids)
+        if converted_ids and not dry_run:
+            converted = writer.flush()["matched"]
+            if unset_ids:
+                # published_at only mirrored upload_date while it was a string
+                videos.update_many({"_id": {"$in": unset_ids}}, {"$unset": {"published_at": ""}})
+            totals["missing"] += len(converted_ids) - converted
+        totals["converted"] += converted
+
+        last_id = batch[-1]["_id"]
+        if not dry_run:
+            migrations.update_one(
+                {"name": MIGRATION_NAME},
+                {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}, "$inc": {"converted": converted}},
+                upsert=True
+            )
+        print(f"   Converted {totals['converted']} so far (last _id {last_id})")
+        time.sleep(pause)
+
+    if not dry_run:
+        migrations.update_one(
+            {"name": MIGRATION_NAME},
+            {"$set": {"completed_at": datetime.utcnow(), "last_id": last_id}},
+            upsert=True
+        )
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert timestamp strings to datetimes")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per batch")
+    parser.add_argument("--pause", type=float, default=0.2, help="Seconds to sleep between batches")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and scan from the first document")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and report without writing")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("Migrating video timestamps to BSON datetime" + (" (dry run)" if args.dry_run else ""))
+    print("="*60 + "\n")
+
+    totals = migrate(args.batch_size, args.pause, args.restart, args.dry_run)
+
+    print(f"\n✅ Converted: {totals['converted']}")
+    print(f"   Unparseable: {totals['unparseable']}")
+    print(f"   Deleted concurrently (skipped): {totals['missing']}")
+    print("="*60 + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Rebuild the channel_stats totals and hourly upload rollup from the videos collection
+Usage: python scripts/repair_channel_stats.py [--dry-run]
+
+Ingest keeps channel_stats and upload_counts_hourly current with $inc deltas;
+this recomputes every channel and hour from scratch, reports how far the stored
+values had drifted and overwrites them (unless --dry-run). Until it has run
+once, reads aggregate over videos instead of trusting totals that would only
+cover videos ingested since deploy.
+"""
+
+from database.mongodb_client import get_sync_database
+from database.channel_stats import repair_channel_stats
+from database.upload_rollup import rebuild_upload_rollup
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute per-channel statistics")
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without writing")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("Channel stats repair" + (" (dry run)" if args.dry_run else ""))
+    print("="*60 + "\n")
+
+    db = get_sync_database()
+    drift = repair_channel_stats(db, apply=not args.dry_run)
+    rollup = rebuild_upload_rollup(db, apply=not args.dry_run)
+
+    if not drift:
+        print("✅ All channel totals match the videos collection")
+    for channel in drift:
+        print(f"📺 {channel['channel_title'] or channel['channel_id']}")
+        if not channel["fields"]:
+            print("   missing from channel_stats")
+        for field, values in channel["fields"].items():
+            print(f"   {field}: stored {values['stored']:,} → actual {values['actual']:,} ({values['actual'] - values['stored']:+,})")
+    print(f"\n🕐 Hourly upload rollup: {rollup['changed']:,} of {rollup['buckets']:,} buckets corrected, {rollup['removed']:,} removed")
+    print("="*60 + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""In-memory stand-ins for the pymongo/motor collection calls the pipeline makes"""
+import copy
+from datetime import datetime
+from types import SimpleNamespace
+
+_TYPES = {"string": str, "date": datetime, "number": (int, float)}
+
+_COMPARISONS = {
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+}
+
+def _compare(value, operator: str, operand) -> bool:
+    """Range match; like MongoDB, values of another type (or missing ones) never match"""
+    try:
+        return value is not None and _COMPARISONS[operator](value, operand)
+    except TypeError:
+        return False
+
+def _matches(document: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+            continue
+        value = document.get(field)
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            for operator, operand in condition.items():
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$exists" and (field in document) != operand:
+                    return False
+                if operator == "$type" and not isinstance(value, _TYPES[operand]):
+                    return False
+                if operator in _COMPARISONS and not _compare(value, operator, operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+def _apply(document: dict, update: dict, inserted: bool = False):
+    if inserted:
+        document.update(update.get("$setOnInsert", {}))
+    for field, value in update.get("$set", {}).items():
+        document[field] = value
+    for field in update.get("$unset", {}):
+        document.pop(field, None)
+    for field, value in update.get("$inc", {}).items():
+        document[field] = document.get(field, 0) + value
+    for field, value in update.get("$max", {}).items():
+        if document.get(field) is None or value > document[field]:
+            document[field] = value
+    for field, value in update.get("$min", {}).items():
+        if document.get(field) is None or value < document[field]:
+            document[field] = value
+    for field, value in update.get("$push", {}).items():
+        items = document.get(field, []) + list(value["$each"] if isinstance(value, dict) else [value])
+        if isinstance(value, dict) and "$slice" in value:
+            items = items[value["$slice"]:]
+        document[field] = items
+
+def _value(document: dict, expression):
+    if isinstance(expression, str) and expression.startswith("$"):
+        return document.get(expression[1:])
+    return expression
+
+def _aggregate(documents: list, pipeline: list) -> list:
+    """The $match/$group($sum)/$sort stages the rollup reads use"""
+    for stage in pipeline:
+        if "$match" in stage:
+            documents = [document for document in documents if _matches(document, stage["$match"])]
+        elif "$group" in stage:
+            spec = dict(stage["$group"])
+            group_key = spec.pop("_id")
+            groups = {}
+            for document in documents:
+                key = _value(document, group_key)
+                group = groups.setdefault(key, {"_id": key, **{field: 0 for field in spec}})
+                for field, accumulator in spec.items():
+                    group[field] += _value(document, accumulator["$sum"]) or 0
+            documents = list(groups.values())
+        elif "$sort" in stage:
+            documents = _Cursor(documents).sort(list(stage["$sort"].items()))
+    return [copy.deepcopy(document) for document in documents]
+
+class _Cursor(list):
+    """find() result supporting pymongo's chained sort/limit"""
+
+    def sort(self, key, direction: int = 1):
+        keys = [(key, direction)] if isinstance(key, str) else key
+        documents = list(self)
+        # Stable sorts applied from the last key to the first give a compound order
+        for field, field_direction in reversed(keys):
+            documents.sort(key=lambda document: document[field], reverse=field_direction < 0)
+        return _Cursor(documents)
+
+    def limit(self, count: int):
+        return _Cursor(self[:count] if count else self)
+
+class FakeCollection:
+    """A list of documents behind the handful of pymongo methods the pipeline uses"""
+
+    def __init__(self, name: str = "collection", documents: list = None):
+        self.name = name
+        self.documents = [dict(document) for document in documents or []]
+        self.bulk_writes = []
+        self.indexes = []
+
+    def _update(self, query: dict, update: dict, upsert: bool) -> str:
+        """Apply `update` to the first match; returns "matched", "upserted" or None"""
+        for document in self.documents:
+            if _matches(document, query):
+                _apply(document, update)
+                return "matched"
+        if not upsert:
+            return None
+        document = {field: value for field, value in query.items() if not isinstance(value, dict)}
+        _apply(document, update, inserted=True)
+        self.documents.append(document)
+        return "upserted"
+
+    def _bulk(self, operations: list):
+        self.bulk_writes.append(list(operations))
+        outcomes = [self._update(operation._filter, operation._doc, operation._upsert) for operation in operations]
+        matched = outcomes.count("matched")
+        return SimpleNamespace(upserted_count=outcomes.count("upserted"), modified_count=matched, matched_count=matched)
+
+    def first(self, query: dict):
+        """Synchronous find_one for assertions, whatever the collection flavour"""
+        return next((copy.deepcopy(document) for document in self.documents if _matches(document, query)), None)
+
+    def find_one(self, query: dict, projection: dict = None):
+        return self.first(query)
+
+    def find(self, query: dict = None, projection: dict = None):
+        return _Cursor(copy.deepcopy(document) for document in self.documents if _matches(document, query or {}))
+
+    def update_one(self, query: dict, update: dict, upsert: bool = False):
+        return SimpleNamespace(upserted_id=True if self._update(query, update, upsert) == "upserted" else None)
+
+    def aggregate(self, pipeline: list):
+        return _Cursor(_aggregate(self.documents, pipeline))
+
+    def update_many(self, query: dict, update: dict):
+        matched = [document for document in self.documents if _matches(document, query)]
+        for document in matched:
+            _apply(document, update)
+        return SimpleNamespace(matched_count=len(matched), modified_count=len(matched))
+
+    def delete_many(self, query: dict):
+        kept = [document for document in self.documents if not _matches(document, query)]
+        deleted, self.documents = len(self.documents) - len(kept), kept
+        return SimpleNamespace(deleted_count=deleted)
+
+    def count_documents(self, query: dict) -> int:
+        return sum(1 for document in self.documents if _matches(document, query))
+
+    def estimated_document_count(self) -> int:
+        return len(self.documents)
+
+    def bulk_write(self, operations: list, ordered: bool = True):
+        return self._bulk(operations)
+
+    def create_indexes(self, models: list) -> list:
+        self.indexes.extend(model.document for model in models)
+        return [model.document["name"] for model in models]
+
+class _AsyncCursor:
+    def __init__(self, documents: list):
+        self.documents = documents
+
+    def sort(self, key, direction: int = 1):
+        return _AsyncCursor(_Cursor(self.documents).sort(key, direction))
+
+    def limit(self, count: int):
+        return _AsyncCursor(_Cursor(self.documents).limit(count))
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+    async def to_list(self, length=None):
+        return self.documents[:length]
+
+class AsyncFakeCollection(FakeCollection):
+    """FakeCollection with motor's awaitable methods"""
+
+    def find(self, query: dict = None, projection: dict = None):
+        return _AsyncCursor(FakeCollection.find(self, query, projection))
+
+    def aggregate(self, pipeline: list):
+        return _AsyncCursor(_aggregate(self.documents, pipeline))
+
+    async def find_one(self, query: dict, projection: dict = None):
+        return self.first(query)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        return FakeCollection.update_one(self, query, update, upsert)
+
+    async def count_documents(self, query: dict) -> int:
+        return FakeCollection.count_documents(self, query)
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        return self._bulk(operations)
+
+    async def create_indexes(self, models: list) -> list:
+        return FakeCollection.create_indexes(self, models)
+
+class FakeDatabase(dict):
+    """db[name] returns the same fake collection every time"""
+
+    def __init__(self, collection_class=FakeCollection):
+        super().__init__()
+        self.collection_class = collection_class
+
+    def __missing__(self, name: str):
+        collection = self[name] = self.collection_class(name)
+        return collection
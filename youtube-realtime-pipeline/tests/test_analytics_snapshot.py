@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+import numpy as np
+from database.analytics_snapshot import AnalyticsSnapshot, MISSING_DATE
+
+def _snapshot(videos: list) -> AnalyticsSnapshot:
+    snapshot = AnalyticsSnapshot()
+    snapshot._apply(videos, full=True)
+    return snapshot
+
+def _video(video_id: str, views: int = 0, likes: int = 0, upload_date: datetime = None, channel_id: str = "UC1") -> dict:
+    return {
+        "video_id": video_id, "channel_id": channel_id, "channel_title": channel_id,
+        "view_count": views, "like_count": likes, "upload_date": upload_date
+    }
+
+def test_top_n_upload_date_skips_undated_videos():
+    snapshot = _snapshot([
+        _video("old", upload_date=datetime(2024, 1, 1)),
+        _video("undated"),
+        _video("new", upload_date=datetime(2024, 6, 1)),
+        _video("mid", upload_date=datetime(2024, 3, 1)),
+    ])
+    newest = snapshot.top_n("upload_date", 10)
+    assert [row["video_id"] for row in newest] == ["new", "mid", "old"]
+    assert all(row["value"] != MISSING_DATE for row in newest)
+    oldest = snapshot.top_n("upload_date", 2, ascending=True)
+    assert [row["video_id"] for row in oldest] == ["old", "mid"]
+
+def test_top_n_orders_and_limits():
+    snapshot = _snapshot([_video(f"v{views}", views=views) for views in (5, 50, 1, 500, 20)])
+    assert [row["value"] for row in snapshot.top_n("view_count", 3)] == [500, 50, 20]
+    assert [row["value"] for row in snapshot.top_n("view_count", 2, ascending=True)] == [1, 5]
+    assert snapshot.top_n("view_count", 0) == []
+
+def test_top_n_respects_mask():
+    snapshot = _snapshot([
+        _video("a", views=100, channel_id="UC1"),
+        _video("b", views=900, channel_id="UC2"),
+        _video("c", views=300, channel_id="UC1"),
+    ])
+    top = snapshot.top_n("view_count", 5, mask=snapshot.mask(channel_ids=["UC1"]))
+    assert [row["video_id"] for row in top] == ["c", "a"]
+
+def test_like_rate_is_a_fraction_like_stored_documents():
+    snapshot = _snapshot([_video("a", views=200, likes=50), _video("b", views=0, likes=3)])
+    rates = {row["video_id"]: row["value"] for row in snapshot.top_n("like_rate", 2)}
+    assert rates == {"a": 0.25, "b": 0.0}
+
+def test_incremental_apply_overwrites_and_appends():
+    snapshot = _snapshot([_video("a", views=1), _video("b", views=2)])
+    snapshot._apply([_video("b", views=20), _video("c", views=3)], full=False)
+    assert len(snapshot) == 3
+    assert snapshot.totals()["total_views"] == 24
+
+class _Videos:
+    def __init__(self, videos: list):
+        self.videos = videos
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        return self
+
+    def batch_size(self, size):
+        return list(self.videos)
+
+def test_refresh_watermark_follows_datetime_stamps():
+    videos = _Videos([
+        {**_video("a"), "ingested_at": datetime(2024, 3, 1, 12)},
+        {**_video("b"), "ingested_at": datetime(2024, 3, 1, 9), "stats_updated_at": datetime(2024, 3, 2, 6)},
+    ])
+    snapshot = AnalyticsSnapshot()
+    snapshot.refresh({"videos": videos})
+    snapshot.refresh({"videos": videos})
+    since = videos.queries[-1]["$or"][0]["ingested_at"]["$gt"]
+    assert isinstance(since, datetime) and since < datetime(2024, 3, 2, 6)
+    assert datetime(2024, 3, 2, 6) - since < timedelta(minutes=10)
+
+def test_group_by_channel_sums_stay_integers():
+    snapshot = _snapshot([
+        _video("a", views=10, channel_id="UC1"),
+        _video("b", views=15, channel_id="UC1"),
+        _video("c", views=40, channel_id="UC2"),
+    ])
+    groups = snapshot.group_by_channel("view_count", agg="sum")
+    assert [(group["channel_id"], group["value"]) for group in groups] == [("UC2", 40), ("UC1", 25)]
+    assert all(isinstance(group["value"], int) for group in groups)
+
+def test_uploads_per_day_ignores_missing_dates():
+    snapshot = _snapshot([
+        _video("a", upload_date=datetime(2024, 1, 1, 8)),
+        _video("b", upload_date=datetime(2024, 1, 1, 20)),
+        _video("c"),
+    ])
+    per_day = snapshot.uploads_per_day()
+    assert per_day["days"] == [datetime(2024, 1, 1)]
+    assert per_day["counts"] == [2]
+    assert np.count_nonzero(snapshot._columns.upload_date == MISSING_DATE) == 1
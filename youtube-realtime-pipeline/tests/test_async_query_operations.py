@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from database import async_query_operations
+from database.async_query_operations import (
+    count_videos_by_channel, count_videos_in_timerange, get_channel_statistics, get_recent_videos, get_trending_videos
+)
+from tests.fakes import AsyncFakeCollection, FakeDatabase
+
+class _Directory:
+    """Resolves "bloomberg" to one channel and "news" to two"""
+
+    NAMES = {"bloomberg": ["UC1"], "news": ["UC1", "UC2"]}
+
+    async def resolve_async(self, db, channel_name):
+        return self.NAMES.get(channel_name, [])
+
+    def title(self, channel_id):
+        return {"UC1": "Bloomberg", "UC2": "ANI"}[channel_id]
+
+class _Result:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return self.documents
+
+@pytest.fixture
+def db(monkeypatch):
+    database = FakeDatabase(AsyncFakeCollection)
+    now = datetime.utcnow()
+    database["videos"].documents = [
+        {"_id": ObjectId(), "video_id": "a", "channel_id": "UC1", "upload_date": now - timedelta(hours=1), "view_count": 5},
+        {"_id": ObjectId(), "video_id": "b", "channel_id": "UC2", "upload_date": now - timedelta(hours=30), "view_count": 50},
+        {"_id": ObjectId(), "video_id": "c", "channel_id": "UC1", "upload_date": now - timedelta(hours=3), "view_count": 20},
+    ]
+    monkeypatch.setattr(async_query_operations, "get_database", lambda: database)
+    monkeypatch.setattr(async_query_operations, "get_channel_directory", _Directory)
+    return database
+
+def test_listings_page_with_cursors_and_stringify_ids(db):
+    recent, cursor = asyncio.run(get_recent_videos(2))
+    assert [video["video_id"] for video in recent] == ["a", "c"]
+    assert all(isinstance(video["_id"], str) for video in recent)
+    rest, last = asyncio.run(get_recent_videos(2, cursor))
+    assert [video["video_id"] for video in rest] == ["b"]
+    assert last is None
+
+    trending, cursor = asyncio.run(get_trending_videos(1))
+    assert [video["video_id"] for video in trending] == ["b"]
+    assert [video["video_id"] for video in asyncio.run(get_trending_videos(3, cursor))[0]] == ["c", "a"]
+
+def test_listings_skip_untyped_sort_keys_on_every_page(db):
+    db["videos"].documents += [
+        {"_id": ObjectId(), "video_id": "unmigrated", "channel_id": "UC1", "upload_date": "2024-03-01T09:00:00Z", "view_count": "9"},
+        {"_id": ObjectId(), "video_id": "undated", "channel_id": "UC1"},
+    ]
+    first, cursor = asyncio.run(get_recent_videos(10))
+    assert [video["video_id"] for video in first] == ["a", "c", "b"]
+    assert cursor is None
+    pages = [asyncio.run(get_recent_videos(1))]
+    while pages[-1][1]:
+        pages.append(asyncio.run(get_recent_videos(1, pages[-1][1])))
+    # Paging one at a time reaches exactly the same videos as one big page
+    assert [video["video_id"] for videos, _ in pages for video in videos] == ["a", "c", "b"]
+    assert [video["video_id"] for video in asyncio.run(get_trending_videos(10))[0]] == ["b", "c", "a"]
+
+def test_channel_counts_filter_on_resolved_ids(db):
+    assert asyncio.run(count_videos_by_channel("bloomberg")) == 2
+    assert asyncio.run(count_videos_by_channel("news")) == 3
+    assert asyncio.run(count_videos_by_channel("unknown")) == 0
+
+def test_time_window_counts_come_from_the_rollup(db, monkeypatch):
+    windows = []
+
+    async def from_rollup(database, channel_ids, hours):
+        windows.append((channel_ids, hours))
+        return 7
+
+    monkeypatch.setattr(async_query_operations, "count_uploads_in_window_async", from_rollup)
+    assert asyncio.run(count_videos_in_timerange("news", 24)) == 7
+    assert asyncio.run(count_videos_in_timerange("unknown", 24)) == 0
+    assert windows == [(["UC1", "UC2"], 24)]
+
+def test_statistics_prefer_materialized_totals(db, monkeypatch):
+    async def materialized(database, channel_ids):
+        return {"channel_ids": channel_ids, "video_count": 2}
+
+    monkeypatch.setattr(async_query_operations, "read_channel_stats_async", materialized)
+    stats = asyncio.run(get_channel_statistics("news"))
+    assert stats == {"channel_ids": ["UC1", "UC2"], "video_count": 2, "channels": ["Bloomberg", "ANI"]}
+    assert asyncio.run(get_channel_statistics("unknown")) is None
+
+def test_statistics_aggregate_when_totals_are_missing(db, monkeypatch):
+    async def missing(database, channel_ids):
+        return None
+
+    pipelines = []
+
+    def aggregate(pipeline):
+        pipelines.append(pipeline)
+        return _Result([{"_id": None, "channel_ids": ["UC1"], "video_count": 2}])
+
+    monkeypatch.setattr(async_query_operations, "read_channel_stats_async", missing)
+    db["videos"].aggregate = aggregate
+    stats = asyncio.run(get_channel_statistics("bloomberg"))
+    assert stats == {"channel_ids": ["UC1"], "video_count": 2, "channels": ["Bloomberg"]}
+    assert pipelines[0][0] == {"$match": {"channel_id": "UC1"}}
@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+from database.bulk_writer import AsyncBulkUpserter, BulkUpserter
+
+class _Result:
+    upserted_count = 0
+    modified_count = 0
+    matched_count = 0
+
+class _SyncFlakyCollection:
+    name = "videos"
+
+    def __init__(self, failures: int = 0, rejected: str = None):
+        self.failures = failures
+        self.rejected = rejected
+        self.written = []
+
+    def bulk_write(self, operations, ordered=False):
+        if self.failures:
+            self.failures -= 1
+            raise AutoReconnect("connection closed")
+        errors = []
+        for index, operation in enumerate(operations):
+            if operation._doc["$set"]["video_id"] == self.rejected:
+                errors.append({"index": index, "code": 121, "errmsg": "Document failed validation"})
+            else:
+                self.written.append(operation._doc["$set"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nUpserted": len(operations) - len(errors)})
+        result = _Result()
+        result.upserted_count = len(operations)
+        return result
+
+class _FlakyCollection(_SyncFlakyCollection):
+    async def bulk_write(self, operations, ordered=False):
+        return _SyncFlakyCollection.bulk_write(self, operations, ordered)
+
+class _Observer:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    def before_flush(self, pending):
+        if self.fail:
+            raise RuntimeError("observer broke")
+        return sorted(pending)
+
+    def after_flush(self, pending, state, failed_keys):
+        self.calls.append((state, failed_keys))
+
+def test_failed_flush_keeps_the_batch():
+    async def scenario():
+        collection = _FlakyCollection(failures=1)
+        writer = AsyncBulkUpserter(collection, max_batch=2)
+        await writer.upsert({"video_id": "a", "view_count": 1})
+        with pytest.raises(AutoReconnect):
+            await writer.upsert({"video_id": "b", "view_count": 2})
+        assert writer.pending == 2
+        # A newer write for a kept document wins over the failed one
+        await writer.update("a", {"view_count": 10})
+        return collection, writer
+
+    collection, writer = asyncio.run(scenario())
+    assert writer.pending == 0
+    assert sorted(collection.written, key=lambda fields: fields["video_id"]) == [
+        {"video_id": "a", "view_count": 10},
+        {"video_id": "b", "view_count": 2},
+    ]
+
+def test_sync_failed_flush_keeps_the_batch():
+    collection = _SyncFlakyCollection(failures=1)
+    writer = BulkUpserter(collection, max_batch=2)
+    writer.upsert({"video_id": "a", "view_count": 1})
+    with pytest.raises(AutoReconnect):
+        writer.upsert({"video_id": "b", "view_count": 2})
+    assert writer.pending == 2
+    writer.update("a", {"view_count": 10})
+    assert writer.pending == 0
+    assert sorted(collection.written, key=lambda fields: fields["video_id"]) == [
+        {"video_id": "a", "view_count": 10},
+        {"video_id": "b", "view_count": 2},
+    ]
+
+def test_sync_observers_see_each_flush_and_its_failed_keys():
+    broken, observer = _Observer(fail=True), _Observer()
+    writer = BulkUpserter(_SyncFlakyCollection(rejected="b"), max_batch=10, observers=[broken, observer])
+    with writer:
+        writer.upsert({"video_id": "a"})
+        writer.upsert({"video_id": "b"})
+    # A failing observer gets None as its state and does not stop the others
+    assert broken.calls == [(None, {"b"})]
+    assert observer.calls == [(["a", "b"], {"b"})]
+    assert writer.summary()["errors"] == 1
+
+class _AsyncObserver(_Observer):
+    async def before_flush(self, pending):
+        return _Observer.before_flush(self, pending)
+
+    async def after_flush(self, pending, state, failed_keys):
+        _Observer.after_flush(self, pending, state, failed_keys)
+
+class _AfterOnly:
+    def __init__(self):
+        self.flushed = []
+
+    async def after_flush(self, pending, state, failed_keys):
+        self.flushed.append(sorted(pending))
+
+def test_async_writer_feeds_every_observer_its_own_state():
+    first, broken, after_only = _AsyncObserver(), _AsyncObserver(fail=True), _AfterOnly()
+
+    async def scenario():
+        async with AsyncBulkUpserter(_FlakyCollection(), max_batch=10, observers=[first, broken, after_only]) as writer:
+            await writer.upsert({"video_id": "a"})
+
+    asyncio.run(scenario())
+    assert first.calls == [(["a"], set())]
+    assert broken.calls == [(None, set())]
+    assert after_only.flushed == [["a"]]
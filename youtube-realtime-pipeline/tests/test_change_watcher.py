@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+import pytest
+from pymongo.errors import AutoReconnect
+from database import change_watcher
+from database.change_watcher import ChangeWatcher, invalidations_for_change
+from database.query_cache import (
+    FAMILIES, RECENT, TRENDING, SEARCH, UPLOADS, CHANNEL_COUNT, CHANNEL_STATS, CHANNEL_WINDOW
+)
+from tests.fakes import FakeCollection, FakeDatabase
+
+EVERYTHING = {(family, None) for family in FAMILIES}
+NEW_IN_UC1 = {
+    (RECENT, None), (TRENDING, None), (SEARCH, None), (UPLOADS, None),
+    (CHANNEL_COUNT, "UC1"), (CHANNEL_STATS, "UC1"), (CHANNEL_WINDOW, "UC1")
+}
+
+def _update(updated: dict = None, removed: list = None, channel_id: str = "UC1") -> dict:
+    return {
+        "operationType": "update",
+        "fullDocument": {"channel_id": channel_id} if channel_id else None,
+        "updateDescription": {"updatedFields": updated or {}, "removedFields": removed or []}
+    }
+
+@pytest.mark.parametrize("change, expected", [
+    ({"operationType": "insert", "fullDocument": {"channel_id": "UC1"}}, NEW_IN_UC1),
+    ({"operationType": "replace", "fullDocument": {"channel_id": "UC1"}}, NEW_IN_UC1),
+    # Without the document the channel-scoped families widen to the whole family
+    ({"operationType": "insert"}, {
+        (RECENT, None), (TRENDING, None), (SEARCH, None), (UPLOADS, None),
+        (CHANNEL_COUNT, None), (CHANNEL_STATS, None), (CHANNEL_WINDOW, None)
+    }),
+    ({"operationType": "delete"}, EVERYTHING),
+    ({"operationType": "drop"}, EVERYTHING),
+    (_update({"view_count": 120}), {(TRENDING, None), (CHANNEL_STATS, "UC1")}),
+    (_update({"like_count": 4, "like_rate": 0.1}), {(TRENDING, None), (CHANNEL_STATS, "UC1")}),
+    (_update({"upload_date": datetime(2024, 3, 1)}), {(RECENT, None), (UPLOADS, None), (CHANNEL_WINDOW, "UC1")}),
+    (_update({"tags.0": "markets"}), {(SEARCH, None)}),
+    (_update(removed=["description"]), {(SEARCH, None)}),
+    (_update({"channel_id": "UC2"}), EVERYTHING),
+    (_update({"view_count": 120}, channel_id=None), {(TRENDING, None), (CHANNEL_STATS, None)}),
+    (_update({"thumbnail_url": "https://i.ytimg.com/a.jpg", "stats_updated_at": datetime(2024, 3, 1)}), set()),
+])
+def test_invalidations_for_change(change, expected):
+    assert invalidations_for_change(change) == expected
+
+class _Stop:
+    """Stands in for the watcher's stop event: each wait() runs the next step, and polling stops once none are left"""
+
+    def __init__(self, steps: list):
+        self.steps = list(steps)
+
+    def is_set(self) -> bool:
+        return not self.steps
+
+    def wait(self, timeout=None):
+        self.steps.pop(0)()
+
+def test_polling_publishes_new_refreshed_and_deleted_videos(monkeypatch):
+    published = []
+    monkeypatch.setattr(change_watcher, "publish_invalidations", lambda invalidations, everything=False: published.append(invalidations))
+    db = FakeDatabase(FakeCollection)
+    videos = db["videos"]
+    # Stamped inside the overlap window before the watcher started
+    videos.documents = [{"video_id": "old", "channel_id": "UC2", "ingested_at": datetime.utcnow() - timedelta(seconds=5)}]
+    real_find = videos.find
+    failures = []
+
+    def find(query=None, projection=None):
+        if failures:
+            raise failures.pop()
+        return real_find(query, projection)
+
+    videos.find = find
+
+    def insert():
+        videos.documents.append({"video_id": "new", "channel_id": "UC1", "ingested_at": datetime.utcnow()})
+
+    def refresh():
+        videos.documents[-1]["stats_updated_at"] = datetime.utcnow() + timedelta(seconds=1)
+
+    def delete():
+        videos.documents = [video for video in videos.documents if video["video_id"] != "old"]
+
+    steps = [
+        lambda: published.append("started"),
+        insert,
+        lambda: published.append("idle"),
+        lambda: failures.append(AutoReconnect("connection closed")),
+        refresh,
+        delete,
+        lambda: None,
+    ]
+    watcher = ChangeWatcher(db, mode="poll")
+    watcher._stop = _Stop(steps)
+    watcher._poll()
+
+    assert published == [
+        # What was already there when polling began is not reported
+        "started",
+        NEW_IN_UC1,
+        # Seen videos with unchanged stamps are skipped, and a failed poll publishes nothing
+        "idle",
+        NEW_IN_UC1,
+        EVERYTHING,
+    ]
+    assert watcher.stats() == {"mode": "poll", "events": 2, "publishes": 3}
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from database.channel_directory import CHANNELS_COLLECTION, ChannelDirectory
+from tests.fakes import AsyncFakeCollection, FakeCollection, FakeDatabase
+
+BLOOMBERG = "UCnKJeK_r90jDdIuzHXC0Org"
+ANI = "UCFx1nseXKTc1Culiu3neeSQ"
+
+CHANNELS = [
+    # Both tracked channels also get their built-in CHANNEL_ALIASES
+    {"channel_id": BLOOMBERG, "channel_title": "Bloomberg Television"},
+    {"channel_id": ANI, "channel_title": "ANI News"},
+    {"channel_id": "UC3", "channel_title": "NDTV News", "aliases": ["ndtv", "NDTV 24x7"]},
+    {"channel_id": "UC4", "channel_title": "Markets Today"},
+]
+
+@pytest.fixture
+def directory():
+    directory = ChannelDirectory()
+    directory.load(CHANNELS)
+    return directory
+
+@pytest.mark.parametrize("name, expected", [
+    # Channel IDs pass straight through
+    ("UC3", ["UC3"]),
+    # Exact titles and aliases, compared case- and punctuation-insensitively
+    ("Bloomberg Television", [BLOOMBERG]),
+    ("ani-news!", [ANI]),
+    ("bloomberg tv", [BLOOMBERG]),
+    ("NDTV  24x7", ["UC3"]),
+    # An exact alias wins over titles that merely contain the word
+    ("markets", [BLOOMBERG]),
+    # Every word must prefix some word of the name
+    ("bloom", [BLOOMBERG]),
+    ("ndtv new", ["UC3"]),
+    ("today", ["UC4"]),
+    # Ambiguous fragments return every channel, in directory order
+    ("news", [ANI, "UC3"]),
+    ("market", [BLOOMBERG, "UC4"]),
+    # Close spellings when nothing contains the words
+    ("blomberg", [BLOOMBERG]),
+    ("ani nwes", [ANI]),
+    # Nothing usable
+    ("cnn", []),
+    ("", []),
+    (" !? ", []),
+    (None, []),
+])
+def test_lookup(directory, name, expected):
+    assert directory.lookup(name) == expected
+
+def test_titles_fall_back_to_the_channel_id(directory):
+    assert directory.title(ANI) == "ANI News"
+    assert directory.title("UC9") == "UC9"
+
+def test_resolve_loads_once_and_reloads_after_invalidate():
+    db = FakeDatabase(FakeCollection)
+    db[CHANNELS_COLLECTION].documents = [dict(channel) for channel in CHANNELS]
+    directory = ChannelDirectory(ttl_seconds=3600)
+    assert directory.resolve(db, "ndtv") == ["UC3"]
+
+    db[CHANNELS_COLLECTION].documents.append({"channel_id": "UC5", "channel_title": "WION"})
+    # Still within the TTL, so the new channel is not visible yet
+    assert directory.resolve(db, "wion") == []
+    directory.invalidate()
+    assert directory.resolve(db, "wion") == ["UC5"]
+
+def test_resolve_reloads_once_the_ttl_has_passed():
+    db = FakeDatabase(FakeCollection)
+    directory = ChannelDirectory(ttl_seconds=-1)
+    db[CHANNELS_COLLECTION].documents = [{"channel_id": "UC5", "channel_title": "WION"}]
+    assert directory.resolve(db, "wion") == ["UC5"]
+    db[CHANNELS_COLLECTION].documents = [{"channel_id": "UC6", "channel_title": "WION World"}]
+    assert directory.resolve(db, "wion") == ["UC6"]
+
+@pytest.mark.parametrize("name, expected", [
+    ("Bloomberg", ["Bloomberg Television"]),
+    ("ANI", ["ANI News"]),
+    ("Market Today", ["Markets Today"]),
+    ("zzzzzz", []),
+])
+def test_suggest_and_suggest_async_agree(name, expected):
+    db = FakeDatabase(FakeCollection)
+    db[CHANNELS_COLLECTION].documents = [dict(channel) for channel in CHANNELS]
+    assert ChannelDirectory().suggest(db, name, limit=1) == expected
+
+    async_db = FakeDatabase(AsyncFakeCollection)
+    async_db[CHANNELS_COLLECTION].documents = [dict(channel) for channel in CHANNELS]
+    assert asyncio.run(ChannelDirectory().suggest_async(async_db, name, limit=1)) == expected
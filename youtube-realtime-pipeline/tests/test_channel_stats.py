@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+from database.channel_stats import CHANNEL_STATS_COLLECTION, ChannelStatsObserver
+from tests.fakes import AsyncFakeCollection, FakeDatabase
+
+MARCH_1 = datetime(2024, 3, 1, 9, 30)
+MARCH_2 = datetime(2024, 3, 2, 18, 0)
+MARCH_3 = datetime(2024, 3, 3, 7, 15)
+
+def _video(video_id: str, channel_id: str = "UC1", views: int = 10, likes: int = 2, upload_date: datetime = MARCH_1) -> dict:
+    return {"video_id": video_id, "channel_id": channel_id, "view_count": views, "like_count": likes, "upload_date": upload_date}
+
+def _flush(stored: list, pending: dict, failed_keys: set = frozenset(), previous_read_fails: bool = False) -> dict:
+    """Run one observed flush over `stored` videos; returns channel_id -> channel_stats update"""
+    db = FakeDatabase(AsyncFakeCollection)
+    db["videos"].documents = [dict(video) for video in stored]
+    observer = ChannelStatsObserver(db)
+
+    async def scenario():
+        previous = None if previous_read_fails else await observer.before_flush(pending)
+        await observer.after_flush(pending, previous, set(failed_keys))
+
+    asyncio.run(scenario())
+    return {
+        operation._filter["channel_id"]: operation._doc
+        for batch in db[CHANNEL_STATS_COLLECTION].bulk_writes
+        for operation in batch
+    }
+
+def test_new_videos_add_their_counts_and_widen_the_upload_range():
+    updates = _flush([], {
+        "a": [_video("a", views=10, likes=2, upload_date=MARCH_2), True],
+        "b": [_video("b", views=5, likes=1, upload_date=MARCH_1), True],
+        "c": [_video("c", views=1, likes=0, upload_date=MARCH_3), True],
+    })
+    assert updates["UC1"]["$inc"] == {"video_count": 3, "total_views": 16, "total_likes": 3}
+    assert updates["UC1"]["$min"] == {"first_upload": MARCH_1}
+    assert updates["UC1"]["$max"] == {"last_upload": MARCH_3}
+
+def test_existing_videos_only_add_their_count_changes():
+    updates = _flush([_video("a", views=10, likes=2)], {
+        "a": [{"video_id": "a", "view_count": 25, "like_count": 2}, False],
+    })
+    assert updates["UC1"]["$inc"] == {"total_views": 15}
+    # The upload range only moves for videos new to the channel
+    assert "$min" not in updates["UC1"] and "$max" not in updates["UC1"]
+
+def test_unchanged_existing_video_writes_nothing():
+    assert _flush([_video("a")], {"a": [_video("a"), True]}) == {}
+
+def test_video_moving_channels_is_taken_out_of_the_old_one():
+    updates = _flush([_video("a", channel_id="UC1", views=10, likes=2)], {
+        "a": [{"video_id": "a", "channel_id": "UC2", "view_count": 12}, True],
+    })
+    assert updates["UC1"]["$inc"] == {"video_count": -1, "total_views": -10, "total_likes": -2}
+    assert "$min" not in updates["UC1"]
+    assert updates["UC2"]["$inc"] == {"video_count": 1, "total_views": 12, "total_likes": 2}
+    assert (updates["UC2"]["$min"], updates["UC2"]["$max"]) == ({"first_upload": MARCH_1}, {"last_upload": MARCH_1})
+
+def test_failed_writes_and_unknown_updates_are_skipped():
+    updates = _flush([], {
+        "a": [_video("a"), True],
+        # A plain update of a video that was never stored changes nothing
+        "b": [{"video_id": "b", "view_count": 3}, False],
+    }, failed_keys={"a"})
+    assert updates == {}
+
+def test_nothing_is_written_when_the_pre_flush_read_failed():
+    assert _flush([], {"a": [_video("a"), True]}, previous_read_fails=True) == {}
+
+def test_channel_title_rides_along_with_the_deltas():
+    updates = _flush([], {"a": [{**_video("a"), "channel_title": "Markets"}, True]})
+    assert updates["UC1"]["$set"]["channel_title"] == "Markets"
+    assert isinstance(updates["UC1"]["$set"]["updated_at"], datetime)
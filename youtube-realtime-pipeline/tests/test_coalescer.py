@@ -0,0 +1,94 @@
+import asyncio
+import gc
+from webhook_service.coalescer import MetadataCoalescer
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_concurrent_fetches_share_one_batch():
+    calls = []
+
+    async def fetch_batch(video_ids):
+        calls.append(list(video_ids))
+        return {video_id: {"video_id": video_id} for video_id in video_ids}
+
+    async def scenario():
+        coalescer = MetadataCoalescer(fetch_batch, max_wait_ms=20, max_batch=50)
+        results = await asyncio.gather(*(coalescer.fetch(f"v{i}") for i in range(10)))
+        return coalescer, results
+
+    coalescer, results = _run(scenario())
+    assert len(calls) == 1
+    assert sorted(calls[0]) == [f"v{i}" for i in range(10)]
+    assert [result["video_id"] for result in results] == [f"v{i}" for i in range(10)]
+    assert coalescer.metrics()["api_calls_saved"] == 9
+
+def test_full_batch_flushes_without_waiting():
+    calls = []
+
+    async def fetch_batch(video_ids):
+        calls.append(len(video_ids))
+        return {}
+
+    async def scenario():
+        # A wait far longer than the test: only the size trigger can finish it in time
+        coalescer = MetadataCoalescer(fetch_batch, max_wait_ms=60000, max_batch=5)
+        await asyncio.wait_for(asyncio.gather(*(coalescer.fetch(f"v{i}") for i in range(5))), timeout=1)
+        return coalescer
+
+    coalescer = _run(scenario())
+    assert calls == [5]
+    assert coalescer.metrics()["size_triggered_flushes"] == 1
+
+def test_duplicate_ids_are_fetched_once():
+    calls = []
+
+    async def fetch_batch(video_ids):
+        calls.append(list(video_ids))
+        return {"v1": {"video_id": "v1"}}
+
+    async def scenario():
+        coalescer = MetadataCoalescer(fetch_batch, max_wait_ms=10)
+        return await asyncio.gather(coalescer.fetch("v1"), coalescer.fetch("v1"), coalescer.fetch("missing"))
+
+    first, second, missing = _run(scenario())
+    assert calls == [["v1", "missing"]]
+    assert first == second == {"video_id": "v1"}
+    assert missing is None
+
+def test_failed_batch_reaches_every_waiter():
+    async def fetch_batch(video_ids):
+        raise RuntimeError("quota")
+
+    async def scenario():
+        coalescer = MetadataCoalescer(fetch_batch, max_wait_ms=10)
+        results = await asyncio.gather(coalescer.fetch("a"), coalescer.fetch("b"), return_exceptions=True)
+        return coalescer, results
+
+    coalescer, results = _run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert coalescer.metrics()["failed_batches"] == 1
+
+def test_running_batches_are_referenced_until_done():
+    release = None
+
+    async def fetch_batch(video_ids):
+        await release.wait()
+        return {video_id: video_id for video_id in video_ids}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        coalescer = MetadataCoalescer(fetch_batch, max_wait_ms=1)
+        waiter = asyncio.ensure_future(coalescer.fetch("a"))
+        await asyncio.sleep(0.05)
+        gc.collect()
+        assert coalescer.metrics()["in_flight_batches"] == 1
+        release.set()
+        result = await asyncio.wait_for(waiter, timeout=1)
+        await asyncio.sleep(0)
+        return coalescer, result
+
+    coalescer, result = _run(scenario())
+    assert result == "a"
+    assert coalescer.metrics()["in_flight_batches"] == 0
@@ -0,0 +1,44 @@
+import asyncio
+from pymongo.errors import OperationFailure
+from database.indexes import INDEXES, ensure_indexes, ensure_indexes_sync, index_usage
+from tests.fakes import AsyncFakeCollection, FakeCollection, FakeDatabase
+
+def test_every_index_has_a_unique_name_per_collection():
+    for collection_name, models in INDEXES.items():
+        names = [model.document["name"] for model in models]
+        assert len(names) == len(set(names)), collection_name
+
+def test_ensure_creates_every_index_on_both_drivers():
+    db = FakeDatabase()
+    created = ensure_indexes_sync(db)
+    assert set(created) == set(INDEXES)
+    assert created["videos"] == [model.document["name"] for model in INDEXES["videos"]]
+
+    motor_db = FakeDatabase(AsyncFakeCollection)
+    assert asyncio.run(ensure_indexes(motor_db)) == created
+
+def test_conflicting_index_is_logged_and_the_rest_still_created(caplog):
+    class Conflicting(FakeCollection):
+        def create_indexes(self, models):
+            raise OperationFailure("Index already exists with different options", code=85)
+
+    db = FakeDatabase()
+    db["videos"] = Conflicting("videos")
+    created = ensure_indexes_sync(db)
+    assert created["videos"] == []
+    assert created["backfill_checkpoints"] == ["channel_id_unique"]
+    assert "exists with different options" in caplog.text
+
+def test_index_usage_flags_indexes_without_operations():
+    class WithStats(FakeCollection):
+        def aggregate(self, pipeline):
+            assert pipeline == [{"$indexStats": {}}]
+            return [
+                {"name": "_id_", "key": {"_id": 1}, "accesses": {"ops": 0, "since": None}},
+                {"name": "view_count", "key": {"view_count": -1}, "accesses": {"ops": 12, "since": None}},
+                {"name": "channel_title", "key": {"channel_title": 1}, "accesses": {"ops": 0, "since": None}},
+            ]
+
+    db = FakeDatabase(WithStats)
+    report = index_usage(db, ["videos"])
+    assert [(index["name"], index["unused"]) for index in report] == [("_id_", False), ("view_count", False), ("channel_title", True)]
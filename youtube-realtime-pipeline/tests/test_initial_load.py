@@ -0,0 +1,251 @@
+import asyncio
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+from data_ingestion import initial_load
+from data_ingestion.checkpoints import CHECKPOINT_COLLECTION, BackfillCheckpoints
+from data_ingestion.initial_load import _buffered, load_channel
+from database.enrichment_backlog import ENRICHMENT_BACKLOG_COLLECTION
+from tests.fakes import AsyncFakeCollection, FakeDatabase
+
+async def _numbers(count: int, produced: list):
+    for number in range(count):
+        produced.append(number)
+        yield number
+
+def test_buffered_keeps_order_and_bounds_run_ahead():
+    produced = []
+
+    async def scenario():
+        consumed = []
+        async for number in _buffered(_numbers(20, produced), maxsize=2):
+            # The producer may be at most the queue size (plus the item in hand) ahead
+            await asyncio.sleep(0)
+            assert len(produced) - len(consumed) <= 4
+            consumed.append(number)
+        return consumed
+
+    assert asyncio.run(scenario()) == list(range(20))
+
+def test_buffered_reraises_producer_errors():
+    async def failing():
+        yield 1
+        raise RuntimeError("page fetch failed")
+
+    async def scenario():
+        seen = []
+        async for item in _buffered(failing(), maxsize=2):
+            seen.append(item)
+        return seen
+
+    with pytest.raises(RuntimeError, match="page fetch failed"):
+        asyncio.run(scenario())
+
+def _page(number: int, next_page: bool = True) -> dict:
+    return {
+        "video_ids": [f"p{number}v{i}" for i in range(3)],
+        "page_token": str(number) if number else None,
+        "next_page_token": str(number + 1) if next_page else None,
+        "newest_published_at": f"2024-0{5 - number}-02T00:00:00Z",
+        "oldest_published_at": f"2024-0{5 - number}-01T00:00:00Z"
+    }
+
+@pytest.fixture
+def playlist(monkeypatch):
+    """Serve pages 0-3 from a fake uploads playlist; records each walk's arguments"""
+    walks = []
+    state = {"fail_at": None, "enrich_fail_at": None}
+
+    async def fake_pages(channel_id, max_results, published_after, page_token):
+        walks.append({"max_results": max_results, "published_after": published_after, "page_token": page_token})
+        for number in range(int(page_token or 0), 4):
+            if number == state["fail_at"]:
+                raise RuntimeError("playlist page failed")
+            yield _page(number, next_page=number < 3)
+
+    async def fake_enrich(pages):
+        async for page in pages:
+            if page["page_token"] is not None and page["page_token"] == state["enrich_fail_at"]:
+                page["videos"], page["failed_ids"] = [], list(page["video_ids"])
+            else:
+                page["videos"] = [{"video_id": video_id} for video_id in page["video_ids"] if not video_id.endswith("v2")]
+                page["failed_ids"] = []
+            yield page
+
+    monkeypatch.setattr(initial_load, "iter_upload_playlist_pages", fake_pages)
+    monkeypatch.setattr(initial_load, "enrich_video_pages", fake_enrich)
+    return walks, state
+
+def _database() -> FakeDatabase:
+    return FakeDatabase(AsyncFakeCollection)
+
+def test_full_run_streams_every_page_and_commits_the_watermark(playlist):
+    db = _database()
+    summary = asyncio.run(load_channel(db, "UC1", max_results=100))
+    assert summary["streamed"] == summary["inserted"] == 8
+    assert len(db["videos"].documents) == 8
+    checkpoint = db[CHECKPOINT_COLLECTION].documents[0]
+    assert checkpoint["status"] == "complete"
+    assert checkpoint["videos_loaded"] == 8
+    assert checkpoint["newest_published_at"] == "2024-05-02T00:00:00Z"
+    assert checkpoint["oldest_published_at"] == "2024-02-01T00:00:00Z"
+
+def test_every_page_is_checkpointed_while_writes_stay_batched(playlist, monkeypatch):
+    monkeypatch.setattr(initial_load, "WRITE_BATCH_SIZE", 4)
+    recorded = []
+    record_page = BackfillCheckpoints.record_page
+
+    async def spy(self, channel_id, page, videos_written):
+        recorded.append((page["next_page_token"], videos_written))
+        await record_page(self, channel_id, page, videos_written)
+
+    monkeypatch.setattr(BackfillCheckpoints, "record_page", spy)
+    db = _database()
+    asyncio.run(load_channel(db, "UC1", max_results=100))
+    assert len(db["videos"].bulk_writes) == 2
+    assert recorded == [("1", 2), ("2", 2), ("3", 2), (None, 2)]
+
+def test_failed_run_keeps_its_page_token_and_resume_continues_there(playlist):
+    walks, state = playlist
+    db = _database()
+    state["fail_at"] = 2
+    with pytest.raises(RuntimeError):
+        asyncio.run(load_channel(db, "UC1", max_results=100))
+    checkpoint = db[CHECKPOINT_COLLECTION].documents[0]
+    assert (checkpoint["status"], checkpoint["page_token"], checkpoint["videos_loaded"]) == ("failed", "2", 4)
+    # The committed watermark only moves when a run completes
+    assert "newest_published_at" not in checkpoint
+
+    state["fail_at"] = None
+    summary = asyncio.run(load_channel(db, "UC1", max_results=100, mode="resume"))
+    assert walks[-1] == {"max_results": 96, "published_after": None, "page_token": "2"}
+    assert summary["streamed"] == 4
+    assert db[CHECKPOINT_COLLECTION].documents[0]["status"] == "complete"
+
+    skipped = asyncio.run(load_channel(db, "UC1", max_results=100, mode="resume"))
+    assert skipped["status"] == "skipped"
+
+class _UnreachableVideos(AsyncFakeCollection):
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        raise AutoReconnect("connection closed")
+
+class _RejectingVideos(AsyncFakeCollection):
+    """Fails the write of one video the way an unordered bulk_write reports it"""
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        keep = [operation for operation in operations if operation._filter["video_id"] != "p1v0"]
+        result = self._bulk(keep)
+        if len(keep) == len(operations):
+            return result
+        index = next(i for i, operation in enumerate(operations) if operation._filter["video_id"] == "p1v0")
+        raise BulkWriteError({
+            "writeErrors": [{"index": index, "code": 121, "errmsg": "Document failed validation"}],
+            "nUpserted": result.upserted_count, "nModified": 0, "nMatched": 0
+        })
+
+def test_pages_are_not_checkpointed_before_their_videos_are_written(playlist):
+    db = _database()
+    db["videos"] = _UnreachableVideos("videos")
+    with pytest.raises(AutoReconnect):
+        asyncio.run(load_channel(db, "UC1", max_results=100))
+    checkpoint = db[CHECKPOINT_COLLECTION].documents[0]
+    assert (checkpoint["status"], checkpoint["page_token"], checkpoint["videos_loaded"]) == ("failed", None, 0)
+    assert "run_newest_published_at" not in checkpoint
+    assert "oldest_published_at" not in checkpoint
+
+def test_failed_enrichments_are_backlogged_before_their_page_is_passed(playlist):
+    walks, state = playlist
+    state["enrich_fail_at"] = "1"
+    db = _database()
+    summary = asyncio.run(load_channel(db, "UC1", max_results=100))
+    assert summary["streamed"] == 6
+    backlog = sorted(document["video_id"] for document in db[ENRICHMENT_BACKLOG_COLLECTION].documents)
+    assert backlog == ["p1v0", "p1v1", "p1v2"]
+    checkpoint = db[CHECKPOINT_COLLECTION].documents[0]
+    assert (checkpoint["status"], checkpoint["videos_loaded"]) == ("complete", 6)
+
+def test_rejected_writes_are_backlogged_and_not_counted(playlist):
+    db = _database()
+    db["videos"] = _RejectingVideos("videos")
+    summary = asyncio.run(load_channel(db, "UC1", max_results=100))
+    assert summary["streamed"] == 7
+    assert [document["video_id"] for document in db[ENRICHMENT_BACKLOG_COLLECTION].documents] == ["p1v0"]
+    assert db[CHECKPOINT_COLLECTION].documents[0]["videos_loaded"] == 7
+
+def test_incremental_run_walks_back_to_the_stored_watermark(playlist):
+    walks, state = playlist
+    db = _database()
+    asyncio.run(load_channel(db, "UC1", max_results=100))
+    summary = asyncio.run(load_channel(db, "UC1", max_results=100, mode="incremental"))
+    assert summary["mode"] == "incremental"
+    assert walks[-1]["published_after"] == "2024-05-02T00:00:00Z"
+
+def test_incremental_without_a_watermark_runs_in_full(playlist):
+    walks, state = playlist
+    summary = asyncio.run(load_channel(_database(), "UC1", max_results=100, mode="incremental"))
+    assert summary["mode"] == "full"
+    assert walks[-1]["published_after"] is None
+
+def test_record_page_only_widens_the_published_range():
+    db = _database()
+    checkpoints = BackfillCheckpoints(db)
+
+    async def scenario():
+        await checkpoints.start_run("UC1", "full")
+        await checkpoints.record_page("UC1", _page(1), 3)
+        await checkpoints.record_page("UC1", _page(3), 3)
+        await checkpoints.record_page("UC1", _page(2), 3)
+        return await checkpoints.get("UC1")
+
+    checkpoint = asyncio.run(scenario())
+    assert checkpoint["run_newest_published_at"] == "2024-04-02T00:00:00Z"
+    assert checkpoint["oldest_published_at"] == "2024-02-01T00:00:00Z"
+    assert checkpoint["page_token"] == "3"
+    assert checkpoint["videos_loaded"] == 9
+
+def test_finish_run_never_moves_the_committed_watermark_back():
+    db = _database()
+    checkpoints = BackfillCheckpoints(db)
+
+    async def scenario():
+        await checkpoints.start_run("UC1", "full")
+        await checkpoints.record_page("UC1", _page(0), 3)
+        await checkpoints.finish_run("UC1")
+        # An incremental run that only re-reads older uploads
+        await checkpoints.start_run("UC1", "incremental")
+        await checkpoints.record_page("UC1", _page(2), 3)
+        await checkpoints.finish_run("UC1")
+        return await checkpoints.get("UC1")
+
+    checkpoint = asyncio.run(scenario())
+    assert checkpoint["newest_published_at"] == "2024-05-02T00:00:00Z"
+    assert checkpoint["oldest_published_at"] == "2024-03-01T00:00:00Z"
+    assert checkpoint["status"] == "complete"
+
+def test_channels_load_in_parallel_up_to_the_limit(monkeypatch):
+    running = 0
+    peak = 0
+    limiters = set()
+
+    async def fake_load_channel(db, channel_id, max_results, write_limiter, mode):
+        nonlocal running, peak
+        limiters.add(id(write_limiter))
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if channel_id == "bad":
+            raise RuntimeError("channel gone")
+        return {"streamed": 1, "inserted": 1, "modified": 0, "errors": 0, "mode": mode}
+
+    monkeypatch.setattr(initial_load, "get_database", _database)
+    monkeypatch.setattr(initial_load, "load_channel", fake_load_channel)
+    monkeypatch.setattr(initial_load, "get_response_cache", lambda: None)
+
+    channels = {f"UC{i}": f"Channel {i}" for i in range(6)}
+    channels["bad"] = "Broken channel"
+    results = asyncio.run(initial_load.load_initial_data(channels, parallel=3))
+
+    assert peak == 3
+    assert len(limiters) == 1
+    assert results["bad"]["status"] == "failed"
+    assert sum(summary["status"] == "ok" for summary in results.values()) == 6
@@ -0,0 +1,59 @@
+from datetime import datetime
+from data_ingestion.metadata_processor import normalize_video_batch, parse_timestamps
+
+def _item(video_id: str, **overrides) -> dict:
+    item = {
+        "id": video_id,
+        "snippet": {
+            "title": "Markets Open",
+            "description": "d" * 600,
+            "publishedAt": "2024-03-01T14:30:00Z",
+            "channelId": "UC1",
+            "channelTitle": "Channel",
+            "tags": [" Stocks", "stocks", "NEWS", ""],
+        },
+        "statistics": {"viewCount": "200", "likeCount": "50"},
+        "contentDetails": {"duration": "PT1H2M3S"},
+    }
+    for section, fields in overrides.items():
+        item[section] = {**item[section], **fields}
+    return item
+
+def test_normalizes_fields():
+    [video] = normalize_video_batch([_item("a")])
+    assert video["video_id"] == "a"
+    assert video["url"] == "https://www.youtube.com/watch?v=a"
+    assert video["upload_date"] == datetime(2024, 3, 1, 14, 30)
+    assert (video["view_count"], video["like_count"]) == (200, 50)
+    assert video["like_rate"] == 0.25
+    assert isinstance(video["ingested_at"], datetime)
+    assert video["duration_seconds"] == 3723
+    assert video["tags"] == ["stocks", "news"]
+    assert len(video["description"]) == 500
+    assert video["title_length"] == len("Markets Open")
+
+def test_hidden_statistics_and_missing_duration_default_to_zero():
+    item = _item("a")
+    item["statistics"] = {}
+    item.pop("contentDetails")
+    [video] = normalize_video_batch([item])
+    assert (video["view_count"], video["like_count"], video["like_rate"]) == (0, 0, 0.0)
+    assert video["duration_seconds"] == 0
+
+def test_durations_with_days_and_partial_units():
+    items = [_item(str(index), contentDetails={"duration": duration}) for index, duration in enumerate(["P1DT3H", "PT45S", "PT4M", "bogus"])]
+    assert [video["duration_seconds"] for video in normalize_video_batch(items)] == [97200, 45, 240, 0]
+
+def test_malformed_items_are_dropped_in_order():
+    bad = _item("bad")
+    del bad["snippet"]["channelId"]
+    videos = normalize_video_batch([_item("a"), bad, _item("c")])
+    assert [video["video_id"] for video in videos] == ["a", "c"]
+
+def test_empty_batch():
+    assert normalize_video_batch([]) == []
+
+def test_parse_timestamps_converts_zones_to_naive_utc():
+    assert parse_timestamps(["2024-03-01T14:30:00+05:30", "2024-03-01T09:00:00Z", "nope", None]) == [
+        datetime(2024, 3, 1, 9, 0), datetime(2024, 3, 1, 9, 0), None, None
+    ]
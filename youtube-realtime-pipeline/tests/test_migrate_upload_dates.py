@@ -0,0 +1,48 @@
+from datetime import datetime
+from scripts import migrate_upload_dates
+from scripts.migrate_upload_dates import MIGRATION_NAME, migrate
+from tests.fakes import FakeDatabase
+
+def _database(monkeypatch, videos: list) -> FakeDatabase:
+    db = FakeDatabase()
+    db["videos"].documents = videos
+    monkeypatch.setattr(migrate_upload_dates, "get_sync_database", lambda: db)
+    return db
+
+def test_strings_become_datetimes_and_bad_values_are_left(monkeypatch):
+    db = _database(monkeypatch, [
+        {"_id": 1, "upload_date": "2024-03-01T14:30:00Z", "published_at": datetime(2024, 3, 1, 14, 30)},
+        {"_id": 2, "upload_date": "2024-03-01T14:30:00+02:00"},
+        {"_id": 3, "upload_date": "yesterday"},
+        {"_id": 4, "upload_date": datetime(2024, 1, 1)},
+    ])
+    totals = migrate(batch_size=2, pause=0)
+    assert totals == {"converted": 2, "unparseable": 1, "missing": 0}
+    assert db["videos"].first({"_id": 1}) == {"_id": 1, "upload_date": datetime(2024, 3, 1, 14, 30)}
+    assert db["videos"].first({"_id": 2})["upload_date"] == datetime(2024, 3, 1, 12, 30)
+    assert db["videos"].first({"_id": 3})["upload_date"] == "yesterday"
+    state = db["migrations"].first({"name": MIGRATION_NAME})
+    assert state["last_id"] == 3 and "completed_at" in state
+
+def test_ingest_and_refresh_stamps_are_converted_too(monkeypatch):
+    db = _database(monkeypatch, [
+        {"_id": 1, "upload_date": datetime(2024, 3, 1), "ingested_at": "2024-03-01T10:00:00.250000"},
+        {"_id": 2, "upload_date": "2024-03-01T00:00:00Z", "published_at": "x", "stats_updated_at": "2024-03-02T08:00:00"},
+        {"_id": 3, "upload_date": datetime(2024, 3, 1), "ingested_at": datetime(2024, 3, 1)},
+    ])
+    assert migrate(pause=0) == {"converted": 2, "unparseable": 0, "missing": 0}
+    assert db["videos"].first({"_id": 1}) == {"_id": 1, "upload_date": datetime(2024, 3, 1), "ingested_at": datetime(2024, 3, 1, 10, 0, 0, 250000)}
+    assert db["videos"].first({"_id": 2}) == {"_id": 2, "upload_date": datetime(2024, 3, 1), "stats_updated_at": datetime(2024, 3, 2, 8)}
+
+def test_rerun_continues_after_the_checkpoint(monkeypatch):
+    db = _database(monkeypatch, [{"_id": 1, "upload_date": "2024-03-01T00:00:00Z"}, {"_id": 2, "upload_date": "2024-03-02T00:00:00Z"}])
+    db["migrations"].documents = [{"name": MIGRATION_NAME, "last_id": 1}]
+    assert migrate(pause=0)["converted"] == 1
+    assert db["videos"].first({"_id": 1})["upload_date"] == "2024-03-01T00:00:00Z"
+    assert migrate(pause=0, restart=True)["converted"] == 1
+
+def test_dry_run_writes_nothing(monkeypatch):
+    db = _database(monkeypatch, [{"_id": 1, "upload_date": "2024-03-01T00:00:00Z"}])
+    assert migrate(pause=0, dry_run=True)["converted"] == 1
+    assert db["videos"].first({"_id": 1})["upload_date"] == "2024-03-01T00:00:00Z"
+    assert db["migrations"].documents == []
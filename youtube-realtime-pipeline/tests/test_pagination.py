@@ -0,0 +1,47 @@
+from datetime import datetime
+import pytest
+from database.pagination import (
+    RECENT_SORT, RECENT_LEAD_TYPE, TRENDING_SORT, InvalidCursor, decode_cursor, encode_cursor, keyset_filter, page_of,
+    page_query
+)
+
+def test_cursor_round_trips_datetimes_and_ids():
+    video = {"video_id": "abc", "upload_date": datetime(2024, 5, 1, 12, 30), "view_count": 7}
+    cursor = encode_cursor("recent", RECENT_SORT, video)
+    assert "=" not in cursor
+    assert decode_cursor("recent", RECENT_SORT, cursor) == [datetime(2024, 5, 1, 12, 30), "abc"]
+
+def test_cursor_from_another_listing_is_rejected():
+    cursor = encode_cursor("trending", TRENDING_SORT, {"video_id": "abc", "view_count": 7})
+    with pytest.raises(InvalidCursor):
+        decode_cursor("recent", RECENT_SORT, cursor)
+
+@pytest.mark.parametrize("cursor", ["not base64!", "e30", "", "eyJrIjoicmVjZW50In0"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor("recent", RECENT_SORT, cursor)
+
+def test_keyset_filter_descending():
+    assert keyset_filter(TRENDING_SORT, [100, "m"]) == {
+        "view_count": {"$lte": 100},
+        "$or": [
+            {"view_count": {"$lt": 100}},
+            {"view_count": 100, "video_id": {"$lt": "m"}},
+        ]
+    }
+
+def test_keyset_filter_ascending_lead():
+    assert keyset_filter([("day", 1), ("video_id", -1)], [3, "x"])["day"] == {"$gte": 3}
+
+def test_every_page_requires_the_lead_type():
+    assert page_query(RECENT_SORT, RECENT_LEAD_TYPE) == {"upload_date": {"$type": "date"}}
+    after = page_query(RECENT_SORT, RECENT_LEAD_TYPE, [datetime(2024, 5, 1), "m"])
+    assert after["upload_date"] == {"$lte": datetime(2024, 5, 1), "$type": "date"}
+    assert after["$or"] == keyset_filter(RECENT_SORT, [datetime(2024, 5, 1), "m"])["$or"]
+
+def test_page_of_returns_cursor_only_when_more_remain():
+    documents = [{"video_id": f"v{i}", "view_count": 10 - i} for i in range(4)]
+    page, cursor = page_of("trending", TRENDING_SORT, documents, 3)
+    assert [document["video_id"] for document in page] == ["v0", "v1", "v2"]
+    assert decode_cursor("trending", TRENDING_SORT, cursor) == [8, "v2"]
+    assert page_of("trending", TRENDING_SORT, documents[:3], 3) == (documents[:3], None)
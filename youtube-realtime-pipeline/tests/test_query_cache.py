@@ -0,0 +1,58 @@
+import threading
+from database.query_cache import (
+    MISS, RECENT, CHANNEL_COUNT, QueryCache, publish_invalidations, register_cache, unregister_cache
+)
+
+def test_result_computed_across_an_invalidation_is_not_stored():
+    cache = QueryCache()
+    generation = cache.generation
+    # A change lands while the query is still running
+    cache.invalidate(RECENT)
+    cache.put(RECENT, "list", ["stale"], generation=generation)
+    assert cache.get(RECENT, "list") is MISS
+
+    cache.put(RECENT, "list", ["fresh"], generation=cache.generation)
+    assert cache.get(RECENT, "list") == ["fresh"]
+
+def test_clear_and_unrelated_invalidations_also_advance_the_generation():
+    cache = QueryCache()
+    generation = cache.generation
+    cache.clear()
+    cache.put(RECENT, "list", ["stale"], generation=generation)
+    assert cache.get(RECENT, "list") is MISS
+
+    # The guard is per cache, not per family: any invalidation discards in-flight results
+    generation = cache.generation
+    cache.invalidate(CHANNEL_COUNT, ["UC9"])
+    cache.put(RECENT, "list", ["stale"], generation=generation)
+    assert cache.get(RECENT, "list") is MISS
+
+def test_invalidation_racing_a_query_thread_wins():
+    cache = QueryCache()
+    register_cache(cache)
+    started, invalidated = threading.Event(), threading.Event()
+
+    def query():
+        generation = cache.generation
+        started.set()
+        invalidated.wait(5)
+        cache.put(CHANNEL_COUNT, "bloomberg", 3, ["UC1"], generation=generation)
+
+    worker = threading.Thread(target=query)
+    try:
+        worker.start()
+        started.wait(5)
+        publish_invalidations({(CHANNEL_COUNT, "UC1")})
+        invalidated.set()
+        worker.join(5)
+    finally:
+        unregister_cache(cache)
+    assert cache.get(CHANNEL_COUNT, "bloomberg") is MISS
+
+def test_channel_invalidation_only_drops_tagged_entries():
+    cache = QueryCache()
+    cache.put(CHANNEL_COUNT, "bloomberg", 3, ["UC1"])
+    cache.put(CHANNEL_COUNT, "ani", 5, ["UC2"])
+    assert cache.invalidate(CHANNEL_COUNT, ["UC1"]) == 1
+    assert cache.get(CHANNEL_COUNT, "bloomberg") is MISS
+    assert cache.get(CHANNEL_COUNT, "ani") == 5
@@ -0,0 +1,37 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from database import query_operations
+from database.query_cache import QueryCache
+from database.query_operations import count_videos_by_channel, get_channel_statistics, get_recent_videos
+from tests.fakes import FakeCollection, FakeDatabase
+
+class _Directory:
+    def resolve(self, db, channel_name):
+        return {"bloomberg": ["UC1"]}.get(channel_name, [])
+
+    def title(self, channel_id):
+        return "Bloomberg"
+
+@pytest.fixture
+def analytics(monkeypatch):
+    database = FakeDatabase(FakeCollection)
+    database["videos"].documents = [
+        {"_id": ObjectId(), "video_id": "a", "channel_id": "UC1", "view_count": 5, "like_count": 1,
+         "upload_date": datetime(2024, 3, 1)},
+        {"_id": ObjectId(), "video_id": "b", "channel_id": "UC2", "view_count": 50, "like_count": 4,
+         "upload_date": datetime(2024, 3, 2)},
+    ]
+    # Only the lag-tolerant analytics handle is available; the primary must not be touched
+    monkeypatch.setattr(query_operations, "get_analytics_database", lambda: database)
+    monkeypatch.setattr(query_operations, "get_channel_directory", _Directory)
+    monkeypatch.setattr(query_operations, "get_query_cache", lambda cache=QueryCache(): cache)
+    return database
+
+def test_reads_go_to_the_analytics_database(analytics, monkeypatch):
+    monkeypatch.setattr(query_operations, "read_channel_stats", lambda db, channel_ids: (
+        {"channel_ids": channel_ids, "total_videos": 1} if db is analytics else None
+    ))
+    assert count_videos_by_channel("bloomberg") == 1
+    assert get_channel_statistics("bloomberg") == {"channel_ids": ["UC1"], "total_videos": 1, "channels": ["Bloomberg"]}
+    assert [video["video_id"] for video in get_recent_videos(5)] == ["b", "a"]
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from data_ingestion.quota import (
+    Priority, QuotaExhaustedError, QuotaScheduler, _pacific_midnight_after
+)
+
+def _scheduler(**options) -> QuotaScheduler:
+    options.setdefault("daily_quota", 100)
+    options.setdefault("rate_per_second", 1000)
+    options.setdefault("burst", 1000)
+    options.setdefault("shares", {Priority.WEBHOOK: 1.0, Priority.BACKFILL: 0.5, Priority.STATS: 0.2})
+    return QuotaScheduler(**options)
+
+def test_calls_are_charged_their_resource_cost():
+    scheduler = _scheduler(daily_quota=1000)
+
+    async def scenario():
+        await scheduler.acquire("videos", Priority.WEBHOOK)
+        await scheduler.acquire("search", Priority.WEBHOOK)
+
+    asyncio.run(scenario())
+    snapshot = scheduler.snapshot()
+    assert snapshot["used"] == 101
+    assert snapshot["calls_by_resource"] == {"videos": 1, "search": 1}
+    assert snapshot["units_by_priority"]["webhook"] == 101
+
+def test_lower_priorities_leave_headroom():
+    scheduler = _scheduler()
+
+    async def scenario():
+        for _ in range(20):
+            await scheduler.acquire("videos", Priority.STATS)
+        with pytest.raises(QuotaExhaustedError):
+            await scheduler.acquire("videos", Priority.STATS)
+        # Backfill and webhook still have room above the stats share
+        await scheduler.acquire("videos", Priority.BACKFILL)
+        await scheduler.acquire("videos", Priority.WEBHOOK)
+
+    asyncio.run(scenario())
+    assert scheduler.used == 22
+    assert scheduler.rejected_by_priority["stats"] == 1
+    assert not scheduler.has_budget(Priority.STATS)
+    assert scheduler.has_budget(Priority.WEBHOOK)
+
+def test_waiters_are_released_in_priority_order():
+    # One token of burst, refilled slowly: every call after the first has to wait
+    scheduler = _scheduler(daily_quota=1000, rate_per_second=50, burst=1)
+    order = []
+
+    async def call(priority: Priority):
+        await scheduler.acquire("videos", priority)
+        order.append(priority)
+
+    async def scenario():
+        await scheduler.acquire("videos", Priority.WEBHOOK)
+        await asyncio.gather(call(Priority.STATS), call(Priority.BACKFILL), call(Priority.WEBHOOK))
+
+    asyncio.run(scenario())
+    assert order == [Priority.WEBHOOK, Priority.BACKFILL, Priority.STATS]
+
+def test_mark_exhausted_blocks_every_priority_until_reset():
+    scheduler = _scheduler()
+    scheduler.mark_exhausted()
+    with pytest.raises(QuotaExhaustedError):
+        asyncio.run(scheduler.acquire("videos", Priority.WEBHOOK))
+    assert not scheduler.has_budget(Priority.WEBHOOK)
+
+    # Once the reset time passes, the day's usage and the exhausted flag clear
+    scheduler.used = 50
+    scheduler.resets_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    asyncio.run(scheduler.acquire("videos", Priority.WEBHOOK))
+    assert scheduler.used == 1
+    assert not scheduler.exhausted
+    assert scheduler.resets_at > datetime.now(timezone.utc)
+
+def test_quota_resets_at_pacific_midnight():
+    # 10:00 UTC on a winter day is 02:00 in Los Angeles; the next reset is 08:00 UTC the following day
+    assert _pacific_midnight_after(datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc)) == datetime(2024, 1, 16, 8, 0, tzinfo=timezone.utc)
+    # 06:00 UTC is still the previous Pacific day, so the reset is two hours away
+    assert _pacific_midnight_after(datetime(2024, 1, 15, 6, 0, tzinfo=timezone.utc)) == datetime(2024, 1, 15, 8, 0, tzinfo=timezone.utc)
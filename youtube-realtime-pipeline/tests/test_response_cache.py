@@ -0,0 +1,76 @@
+import asyncio
+import sqlite3
+from data_ingestion.response_cache import ResponseCache, cache_key
+
+def test_cache_key_ignores_api_key_and_order():
+    assert cache_key("videos", {"id": "a,b", "part": "snippet", "key": "secret"}) == cache_key("videos", {"part": "snippet", "id": "a,b"})
+
+def test_memory_lru_is_bounded_by_entries_and_bytes():
+    cache = ResponseCache(path=None, max_entries=2, max_bytes=10_000)
+    cache.store("a", "e1", {"n": 1})
+    cache.store("b", "e2", {"n": 2})
+    asyncio.run(cache.lookup("a"))
+    cache.store("c", "e3", {"n": 3})
+    assert asyncio.run(cache.lookup("b")) is None
+    assert asyncio.run(cache.lookup("a"))[0] == "e1"
+    assert cache.stats()["evictions"] == 1
+
+    small = ResponseCache(path=None, max_bytes=20)
+    small.store("big", "e", {"text": "x" * 50})
+    assert small.stats()["memory_entries"] == 0
+
+def test_entries_without_an_etag_are_not_cached():
+    cache = ResponseCache(path=None)
+    cache.store("k", None, {"items": []})
+    assert asyncio.run(cache.lookup("k")) is None
+
+def test_fresh_entries_skip_revalidation():
+    cache = ResponseCache(path=None, fresh_seconds=60)
+    cache.store("k", "etag", {"items": []})
+    assert asyncio.run(cache.lookup("k")) == ("etag", {"items": []}, True)
+    assert asyncio.run(ResponseCache(path=None).lookup("k")) is None
+
+def _disk_keys(path) -> list:
+    connection = sqlite3.connect(path)
+    try:
+        return sorted(key for (key,) in connection.execute("SELECT key FROM responses"))
+    finally:
+        connection.close()
+
+def test_disk_writes_are_batched_and_evict_least_recently_used(tmp_path):
+    path = tmp_path / "responses.sqlite3"
+
+    async def scenario():
+        cache = ResponseCache(path=str(path), max_entries=1, disk_max_entries=2, flush_seconds=0.01, evict_seconds=0)
+        cache.store("old", "e1", {"n": 1})
+        cache.store("used", "e2", {"n": 2})
+        # Nothing reaches the disk until the batch is flushed
+        assert cache.stats()["disk_pending"] > 0
+        await asyncio.sleep(0.05)
+        assert _disk_keys(path) == ["old", "used"]
+        # A disk hit refreshes "old", so the next trim drops "used" instead
+        assert (await cache.lookup("old"))[1] == {"n": 1}
+        cache.store("new", "e3", {"n": 3})
+        await asyncio.sleep(0.05)
+        cache.close()
+
+    asyncio.run(scenario())
+    assert _disk_keys(path) == ["new", "old"]
+
+def test_revalidation_survives_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+
+    async def first_run():
+        cache = ResponseCache(path=path, flush_seconds=60)
+        cache.store("k", "etag", {"items": []})
+        await cache.flush()
+        cache.close()
+
+    async def second_run():
+        cache = ResponseCache(path=path)
+        entry = await cache.lookup("k")
+        cache.close()
+        return entry
+
+    asyncio.run(first_run())
+    assert asyncio.run(second_run()) == ("etag", {"items": []}, False)
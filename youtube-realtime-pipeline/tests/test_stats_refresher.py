@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from data_ingestion import stats_refresher
+from data_ingestion.quota import QuotaExhaustedError
+from data_ingestion.stats_refresher import REFRESH_STATE_COLLECTION, TIERS, StatsRefresher, _tier_query
+from tests.fakes import AsyncFakeCollection, FakeDatabase
+
+@pytest.fixture(autouse=True)
+def compactions(monkeypatch):
+    """Record view-history compactions instead of running them"""
+    calls = []
+
+    async def compact(db):
+        calls.append(db)
+
+    monkeypatch.setattr(stats_refresher, "compact_view_history_async", compact)
+    return calls
+
+def _uploaded(age: timedelta) -> datetime:
+    return datetime.utcnow() - age
+
+def _database(videos: list) -> FakeDatabase:
+    db = FakeDatabase(AsyncFakeCollection)
+    db["videos"].documents = videos
+    return db
+
+def test_tiers_split_videos_by_age():
+    now = datetime(2024, 6, 8, 12, 0)
+    hot, warm, cold = (_tier_query(now, youngest, oldest) for _, youngest, oldest, _ in TIERS)
+    assert hot == {"upload_date": {"$lte": now, "$gt": datetime(2024, 6, 7, 12, 0)}}
+    assert warm == {"upload_date": {"$lte": datetime(2024, 6, 7, 12, 0), "$gt": datetime(2024, 6, 1, 12, 0)}}
+    assert cold == {"upload_date": {"$lte": datetime(2024, 6, 1, 12, 0)}}
+
+def test_only_changed_counts_are_written(monkeypatch):
+    polled = []
+
+    async def fake_statistics(video_ids, priority):
+        polled.append(sorted(video_ids))
+        return {"same": {"view_count": 5, "like_count": 1}, "grew": {"view_count": 9, "like_count": 1}}
+
+    monkeypatch.setattr(stats_refresher, "fetch_videos_statistics", fake_statistics)
+    db = _database([
+        {"video_id": "same", "upload_date": _uploaded(timedelta(hours=1)), "view_count": 5, "like_count": 1},
+        {"video_id": "grew", "upload_date": _uploaded(timedelta(hours=2)), "view_count": 5, "like_count": 1},
+        {"video_id": "gone", "upload_date": _uploaded(timedelta(hours=3)), "view_count": 5, "like_count": 1},
+        {"video_id": "old", "upload_date": _uploaded(timedelta(days=30)), "view_count": 5, "like_count": 1},
+    ])
+
+    counts = asyncio.run(StatsRefresher(db).refresh_tier(*TIERS[0][:3]))
+    assert polled == [["gone", "grew", "same"]]
+    assert counts == {"polled": 3, "changed": 1, "missing": 1, "api_calls": 1}
+    grew = db["videos"].first({"video_id": "grew"})
+    assert grew["view_count"] == 9 and isinstance(grew["stats_updated_at"], datetime)
+    assert "stats_updated_at" not in db["videos"].first({"video_id": "same"})
+    assert db[REFRESH_STATE_COLLECTION].first({"tier": "hot"})["changed"] == 1
+
+def test_run_due_skips_tiers_inside_their_interval(monkeypatch):
+    async def fake_statistics(video_ids, priority):
+        return {}
+
+    monkeypatch.setattr(stats_refresher, "fetch_videos_statistics", fake_statistics)
+    db = _database([])
+    db[REFRESH_STATE_COLLECTION].documents = [
+        {"tier": "hot", "last_pass_at": datetime.utcnow() - timedelta(minutes=1)},
+        {"tier": "warm", "last_pass_at": datetime.utcnow() - timedelta(hours=2)},
+    ]
+    assert set(asyncio.run(StatsRefresher(db).run_due())) == {"warm", "cold"}
+
+def test_quota_exhaustion_leaves_the_tier_due(monkeypatch):
+    async def exhausted(video_ids, priority):
+        raise QuotaExhaustedError("no quota")
+
+    monkeypatch.setattr(stats_refresher, "fetch_videos_statistics", exhausted)
+    db = _database([{"video_id": "a", "upload_date": _uploaded(timedelta(hours=1)), "view_count": 1}])
+    assert asyncio.run(StatsRefresher(db).run_due()) == {}
+    assert db[REFRESH_STATE_COLLECTION].documents == []
+
+def test_history_is_compacted_at_most_daily(compactions):
+    refresher = StatsRefresher(_database([]))
+    refresher.tiers = []
+    asyncio.run(refresher.run_due())
+    asyncio.run(refresher.run_due())
+    assert len(compactions) == 1
@@ -0,0 +1,34 @@
+from database.pagination import SEARCH_SORT
+from database.text_search import build_text_query, text_search, text_search_pipeline
+
+def test_plain_words_pass_through():
+    assert build_text_query("stock market news") == "stock market news"
+
+def test_phrases_are_kept_and_listed_first():
+    assert build_text_query('india "budget 2024" live') == '"budget 2024" india live'
+
+def test_unbalanced_quote_is_dropped():
+    assert build_text_query('fed "rate cut') == "fed rate cut"
+
+def test_negation_survives_and_noise_is_removed():
+    assert build_text_query("oil -opec ($$$) !!") == "oil -opec"
+    assert build_text_query("- ' --") == ""
+
+def test_empty_keyword_has_no_pipeline():
+    assert text_search_pipeline("  ?! ", 10) is None
+    assert text_search_pipeline(None, 10) is None
+
+def test_pipeline_ranks_pages_and_projects_score():
+    pipeline = text_search_pipeline("markets", 5, projection={"_id": 0, "title": 1}, after=[1.5, None, "v9"])
+    assert pipeline[0] == {"$match": {"$text": {"$search": "markets"}}}
+    assert pipeline[2]["$match"]["score"] == {"$lte": 1.5}
+    assert pipeline[3] == {"$sort": dict(SEARCH_SORT)}
+    assert pipeline[4] == {"$limit": 5}
+    assert pipeline[5] == {"$project": {"_id": 0, "title": 1, "score": 1}}
+
+def test_search_without_terms_skips_the_query():
+    class Untouchable:
+        def aggregate(self, pipeline):
+            raise AssertionError("no query expected")
+
+    assert text_search(Untouchable(), "  ?! ") == []
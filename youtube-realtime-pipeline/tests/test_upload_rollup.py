@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta
+from database import upload_rollup
+from database.upload_rollup import (
+    UPLOAD_ROLLUP_COLLECTION, UploadRollupObserver, _window, count_uploads_in_window, hour_bucket, rollup_operations
+)
+from tests.fakes import AsyncFakeCollection, FakeCollection, FakeDatabase
+
+NINE = datetime(2024, 3, 1, 9, 0)
+
+def test_hour_bucket_truncates_to_the_hour():
+    assert hour_bucket(datetime(2024, 3, 1, 9, 59, 59, 999999)) == NINE
+    assert hour_bucket(NINE) == NINE
+
+def test_rollup_operations_skip_buckets_that_net_to_zero():
+    operations = rollup_operations({("UC1", NINE): 2, ("UC2", NINE): 0})
+    assert [(operation._filter, operation._doc["$inc"]) for operation in operations] == [
+        ({"channel_id": "UC1", "hour": NINE}, {"video_count": 2})
+    ]
+
+def _flush(stored: list, pending: dict, failed_keys: set = frozenset()) -> dict:
+    """Run one observed flush; returns the rollup buckets afterwards"""
+    db = FakeDatabase(AsyncFakeCollection)
+    db["videos"].documents = [dict(video) for video in stored]
+    observer = UploadRollupObserver(db)
+
+    async def scenario():
+        previous = await observer.before_flush(pending)
+        await observer.after_flush(pending, previous, set(failed_keys))
+
+    asyncio.run(scenario())
+    return {(bucket["channel_id"], bucket["hour"]): bucket["video_count"] for bucket in db[UPLOAD_ROLLUP_COLLECTION].documents}
+
+def _video(video_id: str, channel_id: str = "UC1", upload_date=NINE + timedelta(minutes=20)) -> dict:
+    return {"video_id": video_id, "channel_id": channel_id, "upload_date": upload_date}
+
+def test_new_videos_land_in_their_upload_hour():
+    buckets = _flush([], {
+        "a": [_video("a"), True],
+        "b": [_video("b", upload_date=NINE + timedelta(minutes=59)), True],
+        "c": [_video("c", upload_date="2024-03-01T09:10:00Z"), True],
+    })
+    # String dates are left to the migration and the rebuild
+    assert buckets == {("UC1", NINE): 2}
+
+def test_changed_channel_or_upload_date_moves_the_video_between_buckets():
+    stored = [_video("a"), _video("b")]
+    buckets = _flush(stored, {
+        "a": [{"channel_id": "UC2"}, False],
+        "b": [{"upload_date": NINE + timedelta(hours=1, minutes=5)}, False],
+    })
+    assert buckets == {("UC1", NINE): -2, ("UC2", NINE): 1, ("UC1", NINE + timedelta(hours=1)): 1}
+
+def test_count_updates_and_failed_writes_leave_the_buckets_alone():
+    buckets = _flush([_video("a")], {
+        "a": [{"view_count": 100}, False],
+        "b": [_video("b"), True],
+    }, failed_keys={"b"})
+    assert buckets == {}
+
+def test_window_counts_the_partial_first_hour_from_videos_and_the_rest_from_buckets(monkeypatch):
+    monkeypatch.setattr(upload_rollup, "is_built", lambda db, name: True)
+    start, boundary = _window(3)
+    db = FakeDatabase(FakeCollection)
+    db["videos"].documents = [
+        _video("edge", upload_date=start + (boundary - start) / 2),
+        _video("too-old", upload_date=start - timedelta(minutes=1)),
+        _video("other-channel", channel_id="UC2", upload_date=start + (boundary - start) / 2),
+    ]
+    db[UPLOAD_ROLLUP_COLLECTION].documents = [
+        # The partial first hour is already counted from videos
+        {"channel_id": "UC1", "hour": hour_bucket(start), "video_count": 7},
+        {"channel_id": "UC1", "hour": boundary, "video_count": 2},
+        {"channel_id": "UC1", "hour": boundary + timedelta(hours=2), "video_count": 3},
+        {"channel_id": "UC2", "hour": boundary, "video_count": 5},
+    ]
+    assert count_uploads_in_window(db, ["UC1"], 3) == 6
+    assert count_uploads_in_window(db, ["UC1", "UC2"], 3) == 12
+
+def test_window_counts_videos_until_the_rollup_is_built(monkeypatch):
+    monkeypatch.setattr(upload_rollup, "is_built", lambda db, name: False)
+    db = FakeDatabase(FakeCollection)
+    db["videos"].documents = [_video("a", upload_date=datetime.utcnow() - timedelta(minutes=5))]
+    db[UPLOAD_ROLLUP_COLLECTION].documents = [{"channel_id": "UC1", "hour": hour_bucket(datetime.utcnow()), "video_count": 9}]
+    assert count_uploads_in_window(db, ["UC1"], 1) == 1
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta
+from database import view_history
+from database.view_history import (
+    VIEW_HISTORY_COLLECTION, ViewHistoryObserver, channel_view_series, compact_view_history,
+    day_bucket, observation_operation, video_view_series
+)
+from tests.fakes import AsyncFakeCollection, FakeCollection, FakeDatabase
+
+MORNING = datetime(2024, 3, 1, 8, 15)
+EVENING = datetime(2024, 3, 1, 20, 45)
+
+def test_observation_lands_in_the_day_bucket_and_keeps_a_running_summary(monkeypatch):
+    monkeypatch.setattr(view_history, "VIEW_HISTORY_MAX_SAMPLES", 2)
+    history = FakeCollection(VIEW_HISTORY_COLLECTION)
+    history.bulk_write([
+        observation_operation("a", "UC1", MORNING, 100, 5, 0),
+        observation_operation("a", "UC1", MORNING + timedelta(hours=4), 130, 6, 30),
+        observation_operation("a", "UC1", EVENING, 160, 7, 30),
+    ])
+    operation = observation_operation("a", "UC1", EVENING, 160, 7, 30)
+    assert operation._filter == {"video_id": "a", "day": datetime(2024, 3, 1)}
+    assert operation._doc["$push"]["samples"]["$slice"] == -2
+
+    [bucket] = history.documents
+    # Only the newest samples are kept, but the summary covers the whole day
+    assert [sample["views"] for sample in bucket["samples"]] == [130, 160]
+    assert (bucket["n"], bucket["views_gained"], bucket["first_views"], bucket["last_views"], bucket["last_likes"]) == (3, 60, 100, 160, 7)
+    assert (bucket["first_at"], bucket["last_at"], bucket["resolution"]) == (MORNING, EVENING, "raw")
+
+def _flush(stored: list, pending: dict, failed_keys: set = frozenset()) -> list:
+    """Run one observed flush; returns the observation operations written"""
+    db = FakeDatabase(AsyncFakeCollection)
+    db["videos"].documents = [dict(video) for video in stored]
+    observer = ViewHistoryObserver(db)
+
+    async def scenario():
+        previous = await observer.before_flush(pending)
+        await observer.after_flush(pending, previous, set(failed_keys))
+
+    asyncio.run(scenario())
+    return [operation for batch in db[VIEW_HISTORY_COLLECTION].bulk_writes for operation in batch]
+
+def test_observer_records_new_and_changed_counts_with_views_gained():
+    stored = [
+        {"video_id": "a", "channel_id": "UC1", "view_count": 100, "like_count": 5},
+        {"video_id": "b", "channel_id": "UC1", "view_count": 50, "like_count": 1},
+    ]
+    operations = _flush(stored, {
+        "a": [{"view_count": 140, "like_count": 5}, False],
+        "b": [{"view_count": 50, "like_count": 1}, False],
+        "c": [{"video_id": "c", "channel_id": "UC2", "view_count": 7, "like_count": 0}, True],
+        "d": [{"video_id": "d", "channel_id": "UC2", "view_count": 9}, True],
+        "e": [{"channel_title": "Renamed"}, False],
+    }, failed_keys={"d"})
+    recorded = {operation._filter["video_id"]: operation._doc for operation in operations}
+    assert sorted(recorded) == ["a", "c"]
+    assert recorded["a"]["$inc"] == {"n": 1, "views_gained": 40}
+    # A first observation has nothing to have gained from
+    assert recorded["c"]["$inc"] == {"n": 1, "views_gained": 0}
+    assert recorded["c"]["$set"]["channel_id"] == "UC2"
+
+def _history() -> FakeDatabase:
+    today = day_bucket(datetime.utcnow())
+    db = FakeDatabase(FakeCollection)
+    db[VIEW_HISTORY_COLLECTION].documents = [
+        {"video_id": "a", "channel_id": "UC1", "day": today - timedelta(days=1), "resolution": "daily", "n": 4,
+         "last_at": today - timedelta(hours=2), "last_views": 150, "last_likes": 6, "views_gained": 50},
+        {"video_id": "a", "channel_id": "UC1", "day": today, "resolution": "raw", "n": 2, "last_at": today + timedelta(hours=1),
+         "last_views": 180, "last_likes": 7, "views_gained": 30,
+         "samples": [{"t": today, "views": 160, "likes": 6}, {"t": today + timedelta(hours=1), "views": 180, "likes": 7}]},
+        {"video_id": "b", "channel_id": "UC1", "day": today, "resolution": "raw", "n": 1, "last_at": today,
+         "last_views": 20, "last_likes": 0, "views_gained": 5, "samples": [{"t": today, "views": 20, "likes": 0}]},
+        {"video_id": "c", "channel_id": "UC2", "day": today, "resolution": "raw", "n": 1, "last_at": today,
+         "last_views": 9, "last_likes": 0, "views_gained": 9, "samples": []},
+    ]
+    return db
+
+def test_video_series_reads_daily_summaries_or_raw_points():
+    db = _history()
+    today = day_bucket(datetime.utcnow())
+    daily = video_view_series(db, "a", days=7)
+    assert [(point["day"], point["views"], point["views_gained"], point["observations"]) for point in daily] == [
+        (today - timedelta(days=1), 150, 50, 4),
+        (today, 180, 30, 2),
+    ]
+    raw = video_view_series(db, "a", days=7, raw=True)
+    # The compacted day is represented by its last observation
+    assert [point["views"] for point in raw] == [150, 160, 180]
+    assert video_view_series(db, "a", days=1) == daily[1:]
+
+def test_channel_series_sums_views_gained_per_day():
+    today = day_bucket(datetime.utcnow())
+    series = channel_view_series(_history(), ["UC1"], days=7)
+    assert series == [
+        {"day": today - timedelta(days=1), "views_gained": 50, "cumulative_gained": 50, "videos_observed": 1},
+        {"day": today, "views_gained": 35, "cumulative_gained": 85, "videos_observed": 2},
+    ]
+
+def test_compaction_drops_old_points_then_whole_expired_days():
+    db = FakeDatabase(FakeCollection)
+    today = day_bucket(datetime.utcnow())
+    history = db[VIEW_HISTORY_COLLECTION]
+    history.documents = [
+        {"video_id": "a", "day": today - timedelta(days=days), "resolution": "raw", "samples": [{"views": days}], "last_views": days}
+        for days in (0, 5, 40, 800)
+    ]
+    result = compact_view_history(db, raw_days=30, retention_days=730)
+    assert result == {"downsampled": 2, "deleted": 1}
+    kept = {(today - bucket["day"]).days: bucket for bucket in history.documents}
+    assert sorted(kept) == [0, 5, 40]
+    assert "samples" in kept[5] and kept[5]["resolution"] == "raw"
+    assert "samples" not in kept[40] and kept[40]["resolution"] == "daily"
+    assert kept[40]["last_views"] == 40
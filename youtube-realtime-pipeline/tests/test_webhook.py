@@ -0,0 +1,40 @@
+import asyncio
+from data_ingestion import youtube_api
+from database.enrichment_backlog import ENRICHMENT_BACKLOG_COLLECTION
+from tests.fakes import AsyncFakeCollection, FakeDatabase
+from webhook_service import main
+from webhook_service.work_queue import EnrichmentQueue
+
+class _FailingClient:
+    """videos.list that always fails as a whole, like a timeout or a 5xx"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def videos_list(self, **params):
+        self.calls += 1
+        raise RuntimeError("503 backendError")
+
+def test_failed_batch_is_retried_then_kept_in_the_backlog(monkeypatch):
+    client = _FailingClient()
+    db = FakeDatabase(AsyncFakeCollection)
+    monkeypatch.setattr(youtube_api, "get_youtube_client", lambda: client)
+    monkeypatch.setattr(main, "get_database", lambda: db)
+
+    async def scenario():
+        queue = EnrichmentQueue(
+            main.enrich_and_store, maxsize=10, workers=1, drain_timeout=1,
+            retry_attempts=3, retry_backoff=0.01, on_give_up=main.keep_for_later
+        )
+        await queue.start()
+        queue.submit(["v1"])
+        await asyncio.sleep(0.3)
+        await queue.stop()
+        return queue.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert client.calls == 3
+    assert metrics["retried_total"] == 2
+    backlog = db[ENRICHMENT_BACKLOG_COLLECTION].documents
+    assert [(document["video_id"], document["failures"]) for document in backlog] == [("v1", 1)]
+    assert "503 backendError" in backlog[0]["last_error"]
@@ -0,0 +1,81 @@
+import asyncio
+from webhook_service.work_queue import EnrichmentQueue
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_failed_video_is_retried_until_it_succeeds():
+    attempts = {}
+    given_up = []
+
+    async def handler(video_id):
+        attempts[video_id] = attempts.get(video_id, 0) + 1
+        if attempts[video_id] < 3:
+            raise RuntimeError("transient")
+
+    async def on_give_up(video_ids, error):
+        given_up.extend(video_ids)
+
+    async def scenario():
+        queue = EnrichmentQueue(
+            handler, maxsize=10, workers=2, drain_timeout=1,
+            retry_attempts=5, retry_backoff=0.01, on_give_up=on_give_up
+        )
+        await queue.start()
+        queue.submit(["a"])
+        await asyncio.sleep(0.2)
+        await queue.stop()
+        return queue.metrics()
+
+    metrics = _run(scenario())
+    assert attempts == {"a": 3}
+    assert given_up == []
+    assert metrics["processed_total"] == 1
+    assert metrics["retried_total"] == 2
+
+def test_video_is_handed_off_after_last_attempt():
+    given_up = []
+
+    async def handler(video_id):
+        raise RuntimeError("quota")
+
+    async def on_give_up(video_ids, error):
+        given_up.append((list(video_ids), error))
+
+    async def scenario():
+        queue = EnrichmentQueue(
+            handler, maxsize=10, workers=1, drain_timeout=1,
+            retry_attempts=2, retry_backoff=0.01, on_give_up=on_give_up
+        )
+        await queue.start()
+        queue.submit(["a"])
+        await asyncio.sleep(0.2)
+        await queue.stop()
+        return queue.metrics()
+
+    metrics = _run(scenario())
+    assert given_up == [(["a"], "quota")]
+    assert metrics["given_up_total"] == 1
+
+def test_stop_hands_off_pending_retries():
+    given_up = []
+
+    async def handler(video_id):
+        raise RuntimeError("down")
+
+    async def on_give_up(video_ids, error):
+        given_up.extend(video_ids)
+
+    async def scenario():
+        queue = EnrichmentQueue(
+            handler, maxsize=10, workers=1, drain_timeout=1,
+            retry_attempts=5, retry_backoff=60, on_give_up=on_give_up
+        )
+        await queue.start()
+        queue.submit(["a", "b"])
+        await asyncio.sleep(0.05)
+        assert queue.metrics()["retrying"] == 2
+        await queue.stop()
+
+    _run(scenario())
+    assert sorted(given_up) == ["a", "b"]
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from data_ingestion import youtube_api
+from data_ingestion.youtube_api import MetadataFetchError, _chunked, fetch_videos_metadata, get_uploads_playlist_id, iter_upload_playlist_pages
+
+def _item(video_id: str) -> dict:
+    return {
+        "id": video_id,
+        "snippet": {"title": video_id, "publishedAt": "2024-01-01T00:00:00Z", "channelId": "UC1", "channelTitle": "Channel"},
+        "statistics": {"viewCount": "10", "likeCount": "2"}
+    }
+
+class _FakeClient:
+    """
+    Stands in for AsyncYouTubeClient: videos.list answers every ID except
+    `missing`, and the uploads playlist is served from `pages` of
+    (videoId, videoPublishedAt)
+    """
+
+    def __init__(self, missing=(), fail=False, pages=(), channel_items=None):
+        self.missing = set(missing)
+        self.fail = fail
+        self.pages = list(pages)
+        self.channel_items = channel_items if channel_items is not None else [
+            {"contentDetails": {"relatedPlaylists": {"uploads": "UUplaylist"}}}
+        ]
+        self.calls = []
+
+    async def videos_list(self, **params):
+        self.calls.append(("videos", params))
+        if self.fail:
+            raise RuntimeError("backend error")
+        ids = params["id"].split(",")
+        return {"items": [_item(video_id) for video_id in ids if video_id not in self.missing]}
+
+    async def channels_list(self, **params):
+        self.calls.append(("channels", params))
+        return {"items": self.channel_items}
+
+    async def playlist_items_list(self, **params):
+        self.calls.append(("playlistItems", params))
+        index = int(params.get("pageToken") or 0)
+        response = {"items": [
+            {"contentDetails": {"videoId": video_id, "videoPublishedAt": published_at}}
+            for video_id, published_at in self.pages[index]
+        ]}
+        if index + 1 < len(self.pages):
+            response["nextPageToken"] = str(index + 1)
+        return response
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(**kwargs):
+        fake = _FakeClient(**kwargs)
+        monkeypatch.setattr(youtube_api, "get_youtube_client", lambda: fake)
+        return fake
+    return install
+
+async def _collect(pages) -> list:
+    return [page async for page in pages]
+
+async def _video_ids(channel_id: str, max_results: int = 5000, published_after: str = None):
+    async for page in iter_upload_playlist_pages(channel_id, max_results, published_after):
+        if page["video_ids"]:
+            yield page["video_ids"]
+
+def test_chunked_dedupes_and_caps_at_fifty():
+    ids = [f"v{i}" for i in range(120)] + ["v0", "", None]
+    chunks = list(_chunked(ids))
+    assert [len(chunk) for chunk in chunks] == [50, 50, 20]
+    assert sum(chunks, []) == [f"v{i}" for i in range(120)]
+
+def test_metadata_makes_one_call_per_fifty_ids(client):
+    fake = client(missing={"v3"})
+    results = asyncio.run(fetch_videos_metadata(f"v{i}" for i in range(75)))
+    assert [len(params["id"].split(",")) for resource, params in fake.calls] == [50, 25]
+    assert len(results) == 75
+    assert results["v3"] is None
+    assert results["v70"]["view_count"] == 10
+
+def test_failed_batch_raises_with_the_ids_to_retry(client):
+    client(fail=True)
+    with pytest.raises(MetadataFetchError) as error:
+        asyncio.run(fetch_videos_metadata(["a", "b"]))
+    assert error.value.video_ids == ["a", "b"]
+    assert error.value.results == {}
+
+_PAGES = [
+    [("a", "2024-03-03T00:00:00Z"), ("b", "2024-03-02T00:00:00Z")],
+    [("c", "2024-03-01T00:00:00Z"), ("d", "2024-02-01T00:00:00Z")],
+]
+
+def test_uploads_playlist_falls_back_to_uu_prefix(client):
+    client(channel_items=[])
+    assert asyncio.run(get_uploads_playlist_id("UCabc")) == "UUabc"
+    with pytest.raises(ValueError):
+        asyncio.run(get_uploads_playlist_id("not-a-channel"))
+
+def test_walker_pages_through_the_uploads_playlist(client):
+    fake = client(pages=_PAGES)
+    assert asyncio.run(_collect(_video_ids("UC1"))) == [["a", "b"], ["c", "d"]]
+    assert all(params["playlistId"] == "UUplaylist" for resource, params in fake.calls if resource == "playlistItems")
+
+def test_walker_stops_at_the_watermark_and_max_results(client):
+    client(pages=_PAGES)
+    assert asyncio.run(_collect(_video_ids("UC1", published_after="2024-03-01T00:00:00Z"))) == [["a", "b"]]
+    assert asyncio.run(_collect(_video_ids("UC1", max_results=3))) == [["a", "b"], ["c"]]
@@ -0,0 +1,171 @@
+import asyncio
+import httpx
+import pytest
+from data_ingestion import youtube_client
+from data_ingestion.quota import Priority, QuotaExhaustedError, QuotaScheduler
+from data_ingestion.response_cache import ResponseCache
+from data_ingestion.youtube_client import YOUTUBE_API_BASE_URL, AsyncYouTubeClient, YouTubeAPIError, get_youtube_client
+
+@pytest.fixture(autouse=True)
+def quota(monkeypatch):
+    """A private scheduler per test, so exhaustion in one test never leaks into the next"""
+    scheduler = QuotaScheduler(daily_quota=1000, rate_per_second=1000, burst=1000)
+    monkeypatch.setattr(youtube_client, "get_quota_scheduler", lambda: scheduler)
+    return scheduler
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """A memory-only response cache per test"""
+    responses = ResponseCache(path=None)
+    monkeypatch.setattr(youtube_client, "get_response_cache", lambda: responses)
+    return responses
+
+def _client(handler, **kwargs) -> AsyncYouTubeClient:
+    client = AsyncYouTubeClient("secret", **kwargs)
+    client._http = httpx.AsyncClient(base_url=YOUTUBE_API_BASE_URL, transport=httpx.MockTransport(handler))
+    return client
+
+def test_get_drops_unset_params_and_sends_the_key():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url)
+        return httpx.Response(200, json={"items": []})
+
+    async def scenario():
+        client = _client(handler)
+        try:
+            return await client.videos_list(part="snippet", id="a,b", pageToken=None)
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(scenario()) == {"items": []}
+    assert seen[0].path.endswith("/videos")
+    assert dict(seen[0].params) == {"part": "snippet", "id": "a,b", "key": "secret"}
+
+def test_error_responses_raise_with_the_api_reason():
+    def handler(request):
+        return httpx.Response(403, json={"error": {"message": "Daily limit", "errors": [{"reason": "quotaExceeded"}]}})
+
+    async def scenario():
+        client = _client(handler)
+        try:
+            await client.channels_list(id="UC1")
+        finally:
+            await client.aclose()
+
+    with pytest.raises(YouTubeAPIError) as error:
+        asyncio.run(scenario())
+    assert (error.value.status_code, error.value.reason) == (403, "quotaExceeded")
+
+def test_calls_are_charged_to_their_priority(quota):
+    def handler(request):
+        return httpx.Response(200, json={})
+
+    async def scenario():
+        client = _client(handler)
+        try:
+            await client.videos_list(priority=Priority.WEBHOOK, id="a")
+            await client.playlist_items_list(playlistId="UU1")
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+    assert quota.snapshot()["units_by_priority"] == {"webhook": 1, "backfill": 1, "stats": 0}
+
+def test_quota_exceeded_response_pauses_every_call(quota):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(403, json={"error": {"message": "Daily limit", "errors": [{"reason": "quotaExceeded"}]}})
+
+    async def scenario():
+        client = _client(handler)
+        try:
+            with pytest.raises(YouTubeAPIError):
+                await client.videos_list(id="a")
+            with pytest.raises(QuotaExhaustedError):
+                await client.videos_list(priority=Priority.WEBHOOK, id="b")
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+    assert quota.exhausted
+    assert len(calls) == 1
+
+def test_not_modified_returns_the_cached_body(cache):
+    sent = []
+
+    def handler(request):
+        sent.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"items": [1]}, headers={"ETag": '"v1"'})
+
+    async def scenario():
+        client = _client(handler)
+        try:
+            return [await client.videos_list(id="a") for _ in range(2)]
+        finally:
+            await client.aclose()
+
+    first, second = asyncio.run(scenario())
+    assert sent == [None, '"v1"']
+    assert first == second == {"items": [1]}
+    assert cache.stats()["not_modified"] == 1
+
+def test_concurrency_is_bounded_by_the_semaphore():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={})
+
+    async def scenario():
+        client = _client(handler, max_concurrency=3)
+        try:
+            await asyncio.gather(*(client.videos_list(id=str(i)) for i in range(10)))
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+    assert peak == 3
+
+def test_shared_client_is_reused_within_a_loop(monkeypatch):
+    monkeypatch.setattr(youtube_client, "_client", None)
+    monkeypatch.setattr(youtube_client, "_client_loop", None)
+
+    async def scenario():
+        first = get_youtube_client()
+        assert get_youtube_client() is first
+        await youtube_client.close_youtube_client()
+        return first
+
+    asyncio.run(scenario())
+    assert youtube_client._client is None
+
+def test_client_from_an_earlier_loop_is_closed_when_replaced(monkeypatch):
+    monkeypatch.setenv("YOUTUBE_API_KEY", "secret")
+    monkeypatch.setattr(youtube_client, "_client", None)
+    monkeypatch.setattr(youtube_client, "_client_loop", None)
+
+    async def first_run():
+        return get_youtube_client()
+
+    async def second_run():
+        client = get_youtube_client()
+        await youtube_client.close_youtube_client()
+        return client
+
+    stale = asyncio.run(first_run())
+    assert not stale._http.is_closed
+    fresh = asyncio.run(second_run())
+    assert fresh is not stale
+    assert stale._http.is_closed and fresh._http.is_closed
+    assert not youtube_client._retiring
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class MetadataCoalescer:
+    """
+    Micro-batches concurrent single-video metadata lookups
+
+    Callers await fetch(video_id); IDs are collected until either `max_batch`
+    are pending or `max_wait_ms` has passed since the first one arrived, then a
+    single batched lookup is issued and each caller receives its own result.
+    """
+
+    def __init__(self, fetch_batch, max_wait_ms: float = 50, max_batch: int = 50):
+        """
+        Args:
+            fetch_batch: Coroutine function taking a list of IDs and returning
+                a dict of video ID -> metadata (or None)
+            max_wait_ms: Longest time an ID waits for companions
+            max_batch: Flush as soon as this many IDs are pending
+        """
+        self.fetch_batch = fetch_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._pending = {}
+        self._timer = None
+        # Running batch lookups; the event loop only keeps weak references to tasks
+        self._tasks = set()
+        self._batches = 0
+        self._requested = 0
+        self._fetched_ids = 0
+        self._size_flushes = 0
+        self._failed_batches = 0
+
+    async def fetch(self, video_id: str) -> dict:
+        """Get metadata for one video, sharing an API call with concurrent callers"""
+        self._requested += 1
+        future = self._pending.get(video_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[video_id] = future
+
+            if len(self._pending) >= self.max_batch:
+                self._size_flushes += 1
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+
+        # Shield so one cancelled waiter doesn't cancel the shared result
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        """Hand the pending IDs to a background batch lookup"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: dict):
+        """Issue one batched lookup and fan results out to the waiters"""
+        self._batches += 1
+        self._fetched_ids += len(batch)
+        try:
+            results = await self.fetch_batch(list(batch))
+        except Exception as e:
+            self._failed_batches += 1
+            logger.error(f"Batched metadata fetch for {len(batch)} videos failed: {str(e)}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for video_id, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(video_id))
+
+    def metrics(self) -> dict:
+        """Batching effectiveness counters"""
+        return {
+            "pending": len(self._pending),
+            "in_flight_batches": len(self._tasks),
+            "requests_total": self._requested,
+            "batches_total": self._batches,
+            "size_triggered_flushes": self._size_flushes,
+            "failed_batches": self._failed_batches,
+            "avg_batch_size": round(self._fetched_ids / self._batches, 2) if self._batches else 0.0,
+            "api_calls_saved": self._requested - self._batches
+        }
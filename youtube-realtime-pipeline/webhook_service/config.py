@@ -0,0 +1,26 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Metadata lookup coalescing
+WEBHOOK_COALESCE_MAX_WAIT_MS = float(os.getenv("WEBHOOK_COALESCE_MAX_WAIT_MS", "50"))
+WEBHOOK_COALESCE_MAX_BATCH = int(os.getenv("WEBHOOK_COALESCE_MAX_BATCH", "50"))
+
+# Enrichment work queue
+WEBHOOK_QUEUE_MAXSIZE = int(os.getenv("WEBHOOK_QUEUE_MAXSIZE", "1000"))
+# Workers mostly wait on coalesced lookups; fewer than WEBHOOK_COALESCE_MAX_BATCH
+# of them can never fill a batch, leaving every flush to the max-wait timer
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "64"))
+WEBHOOK_DRAIN_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT_SECONDS", "30"))
+WEBHOOK_RETRY_AFTER_SECONDS = int(os.getenv("WEBHOOK_RETRY_AFTER_SECONDS", "30"))
+# Failed enrichments are retried with exponential backoff, then kept in enrichment_backlog
+WEBHOOK_ENRICH_ATTEMPTS = int(os.getenv("WEBHOOK_ENRICH_ATTEMPTS", "5"))
+WEBHOOK_ENRICH_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_ENRICH_BACKOFF_SECONDS", "5"))
+WEBHOOK_ENRICH_BACKOFF_MAX_SECONDS = float(os.getenv("WEBHOOK_ENRICH_BACKOFF_MAX_SECONDS", "300"))
+# How often the backlog is handed back to the queue (skipped while the quota is spent)
+WEBHOOK_BACKLOG_SWEEP_SECONDS = float(os.getenv("WEBHOOK_BACKLOG_SWEEP_SECONDS", "300"))
+
+# Buffered MongoDB writes
+WEBHOOK_WRITE_MAX_BATCH = int(os.getenv("WEBHOOK_WRITE_MAX_BATCH", "100"))
+WEBHOOK_WRITE_MAX_LATENCY_MS = float(os.getenv("WEBHOOK_WRITE_MAX_LATENCY_MS", "500"))
@@ -1,12 +1,135 @@
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse
 from database.mongodb_client import get_database
-from data_ingestion.youtube_api import fetch_video_metadata
+from database.indexes import ensure_indexes
+from database.channel_directory import register_channels
+from database.channel_stats import ChannelStatsObserver
+from database.upload_rollup import UploadRollupObserver
+from database.view_history import ViewHistoryObserver
+from database.bulk_writer import AsyncBulkUpserter
+from database.enrichment_backlog import record_failed_enrichments, backlog_video_ids, clear_backlog
+from data_ingestion.youtube_api import fetch_videos_metadata, MAX_IDS_PER_REQUEST
+from data_ingestion.youtube_client import close_youtube_client
+from data_ingestion.quota import Priority, get_quota_scheduler
+from data_ingestion.response_cache import get_response_cache
+from webhook_service.config import (
+    WEBHOOK_QUEUE_MAXSIZE,
+    WEBHOOK_WORKERS,
+    WEBHOOK_DRAIN_TIMEOUT_SECONDS,
+    WEBHOOK_RETRY_AFTER_SECONDS,
+    WEBHOOK_ENRICH_ATTEMPTS,
+    WEBHOOK_ENRICH_BACKOFF_SECONDS,
+    WEBHOOK_ENRICH_BACKOFF_MAX_SECONDS,
+    WEBHOOK_BACKLOG_SWEEP_SECONDS,
+    WEBHOOK_COALESCE_MAX_WAIT_MS,
+    WEBHOOK_COALESCE_MAX_BATCH,
+    WEBHOOK_WRITE_MAX_BATCH,
+    WEBHOOK_WRITE_MAX_LATENCY_MS
+)
+from webhook_service.coalescer import MetadataCoalescer
+from webhook_service.work_queue import EnrichmentQueue
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import hashlib
+import asyncio
+import functools
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Concurrent workers share batched videos.list calls, scheduled ahead of backfill and stats
+coalescer = MetadataCoalescer(
+    functools.partial(fetch_videos_metadata, priority=Priority.WEBHOOK),
+    max_wait_ms=WEBHOOK_COALESCE_MAX_WAIT_MS,
+    max_batch=min(WEBHOOK_COALESCE_MAX_BATCH, MAX_IDS_PER_REQUEST)
+)
+
+async def enrich_and_store(video_id: str):
+    """
+    Fetch complete metadata for a video and upsert it (runs in a queue worker)
+
+    A failed lookup raises, so the queue retries the video and finally keeps
+    it in the enrichment backlog.
+    """
+    # Fetch complete metadata using YouTube Data API (batched with other workers)
+    metadata = await coalescer.fetch(video_id)
+    if not metadata:
+        return
+    
+    # Buffered upsert keyed on video_id, flushed with unordered bulk_write
+    await get_writer().upsert(metadata)
+    await register_channels(get_database(), [metadata])
+
+# Shared bulk writer for the videos collection, created on startup
+writer = None
+quota_sync_task = None
+
+def get_writer() -> AsyncBulkUpserter:
+    """Get the webhook service's videos bulk writer"""
+    global writer
+    if writer is None:
+        writer = AsyncBulkUpserter(
+            get_database()['videos'],
+            max_batch=WEBHOOK_WRITE_MAX_BATCH,
+            max_latency=WEBHOOK_WRITE_MAX_LATENCY_MS / 1000,
+            observers=[
+                ChannelStatsObserver(get_database()),
+                UploadRollupObserver(get_database()),
+                ViewHistoryObserver(get_database())
+            ]
+        )
+        writer.start()
+    return writer
+
+async def keep_for_later(video_ids: list, error: str):
+    """Persist acknowledged notifications the queue could not process"""
+    added = await record_failed_enrichments(get_database(), video_ids, error)
+    logger.warning(f"Kept {len(video_ids)} video(s) in the enrichment backlog ({added} new): {error}")
+
+work_queue = EnrichmentQueue(
+    enrich_and_store,
+    maxsize=WEBHOOK_QUEUE_MAXSIZE,
+    workers=WEBHOOK_WORKERS,
+    drain_timeout=WEBHOOK_DRAIN_TIMEOUT_SECONDS,
+    retry_attempts=WEBHOOK_ENRICH_ATTEMPTS,
+    retry_backoff=WEBHOOK_ENRICH_BACKOFF_SECONDS,
+    retry_backoff_max=WEBHOOK_ENRICH_BACKOFF_MAX_SECONDS,
+    on_give_up=keep_for_later
+)
+backlog_task = None
+
+async def sweep_backlog(interval: float = WEBHOOK_BACKLOG_SWEEP_SECONDS):
+    """Hand backlogged videos back to the queue while there is quota and room for them"""
+    while True:
+        try:
+            if get_quota_scheduler().has_budget(Priority.WEBHOOK):
+                # Leave half the queue for fresh notifications
+                room = WEBHOOK_QUEUE_MAXSIZE // 2 - work_queue.depth
+                video_ids = await backlog_video_ids(get_database(), room)
+                if video_ids:
+                    accepted, _ = work_queue.submit(video_ids)
+                    await clear_backlog(get_database(), accepted)
+                    logger.info(f"Retrying {len(accepted)} video(s) from the enrichment backlog")
+        except Exception as e:
+            logger.error(f"Enrichment backlog sweep failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+@app.on_event("startup")
+async def startup_event():
+    """Ensure indexes, then start the bulk writer, quota ledger sync, enrichment workers and backlog sweep"""
+    global quota_sync_task, backlog_task
+    try:
+        await ensure_indexes(get_database())
+    except Exception as e:
+        logger.warning(f"Could not ensure indexes: {str(e)}")
+    get_writer()
+    quota_sync_task = asyncio.create_task(get_quota_scheduler().run_usage_sync(get_database()))
+    await work_queue.start()
+    backlog_task = asyncio.create_task(sweep_backlog())
+
 @app.get("/webhook")
 async def verify_subscription(request: Request):
     """Verify PubSubHubbub subscription"""
@@ -17,35 +140,61 @@ async def verify_subscription(request: Request):
         return challenge
     return HTTPException(status_code=400)
 
-@app.post("/webhook")
+@app.post("/webhook", status_code=202)
 async def receive_notification(request: Request):
-    """Receive YouTube video notifications"""
+    """Receive YouTube video notifications and queue them for enrichment"""
     body = await request.body()
-    xml_content = body.decode('utf-8')
     
     # Parse Atom feed
-    root = ET.fromstring(xml_content)
+    try:
+        root = ET.fromstring(body.decode('utf-8'))
+    except (ET.ParseError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid Atom feed")
+    
     ns = {'yt': 'http://www.youtube.com/xml/schemas/2015',
           'atom': 'http://www.w3.org/2005/Atom'}
     
-    video_id = root.find('.//yt:videoId', ns).text
-    channel_id = root.find('.//yt:channelId', ns).text
+    video_ids = [el.text for el in root.findall('.//yt:videoId', ns) if el.text]
     
-    # Fetch complete metadata using YouTube Data API
-    metadata = await fetch_video_metadata(video_id)
+    accepted, rejected = work_queue.submit(video_ids)
     
-    # Store in MongoDB with idempotency
-    db = get_database()
-    collection = db['videos']
+    if rejected:
+        # Ask the hub to redeliver later; upserts are idempotent so replays are safe
+        return JSONResponse(
+            status_code=503,
+            content={"status": "busy", "queued": accepted, "rejected": rejected},
+            headers={"Retry-After": str(WEBHOOK_RETRY_AFTER_SECONDS)}
+        )
     
-    # Use video_id as unique identifier for idempotency
-    await collection.update_one(
-        {"video_id": video_id},
-        {"$set": metadata},
-        upsert=True
-    )
-    
-    return {"status": "success", "video_id": video_id}
+    return {"status": "accepted", "video_ids": accepted}
+
+@app.get("/webhook/metrics")
+async def queue_metrics():
+    """Enrichment queue backpressure, lookup batching, quota and response cache metrics"""
+    cache = get_response_cache()
+    return {
+        "status": "success",
+        "queue": work_queue.metrics(),
+        "coalescer": coalescer.metrics(),
+        "writes": get_writer().summary(),
+        "quota": get_quota_scheduler().snapshot(),
+        "response_cache": cache.stats() if cache is not None else None
+    }
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain queued work, flush buffered writes, then release pooled YouTube API connections"""
+    if backlog_task is not None:
+        backlog_task.cancel()
+        await asyncio.gather(backlog_task, return_exceptions=True)
+    await work_queue.stop()
+    if writer is not None:
+        summary = await writer.close()
+        logger.info(f"Webhook writes: {summary['inserted']} inserted, {summary['modified']} modified")
+    if quota_sync_task is not None:
+        quota_sync_task.cancel()
+        await asyncio.gather(quota_sync_task, return_exceptions=True)
+    await close_youtube_client()
 
 if __name__ == "__main__":
     import uvicorn
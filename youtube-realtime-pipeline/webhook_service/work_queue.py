@@ -0,0 +1,211 @@
+import asyncio
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EnrichmentQueue:
+    """
+    Bounded in-process queue of video IDs drained by a pool of worker tasks
+
+    The webhook endpoint only enqueues; metadata enrichment and database writes
+    happen in the workers, so PubSubHubbub deliveries are acknowledged quickly.
+    A video whose handler raises is queued again after an exponential backoff;
+    once `retry_attempts` are used up (or on shutdown, for anything still
+    queued or waiting to retry) it is handed to `on_give_up`, so an
+    acknowledged notification is never dropped silently.
+    """
+
+    def __init__(
+        self,
+        handler,
+        maxsize: int,
+        workers: int,
+        drain_timeout: float,
+        retry_attempts: int = 5,
+        retry_backoff: float = 5.0,
+        retry_backoff_max: float = 300.0,
+        on_give_up=None
+    ):
+        """
+        Args:
+            handler: Coroutine function called with one video ID per work item
+            maxsize: Maximum number of queued video IDs
+            workers: Number of concurrent worker tasks
+            drain_timeout: Seconds to wait for queued work on shutdown
+            retry_attempts: Handler calls per video before giving up on it
+            retry_backoff: Delay before the first retry; doubles per attempt
+            retry_backoff_max: Longest delay between attempts
+            on_give_up: Coroutine function called with (video IDs, error text)
+                for videos that will not be retried here
+        """
+        self.handler = handler
+        self.maxsize = maxsize
+        self.worker_count = workers
+        self.drain_timeout = drain_timeout
+        self.retry_attempts = retry_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.on_give_up = on_give_up
+        self._queue = None
+        self._workers = []
+        # video_id -> timer handle of a scheduled retry
+        self._retries = {}
+        self._accepting = False
+        self._in_flight = 0
+        self._high_water_mark = 0
+        self._enqueued = 0
+        self._rejected = 0
+        self._processed = 0
+        self._failed = 0
+        self._retried = 0
+        self._given_up = 0
+        self._total_wait = 0.0
+
+    async def start(self):
+        """Create the queue and launch the worker pool"""
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"enrichment-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        self._accepting = True
+        logger.info(f"Enrichment queue started ({self.worker_count} workers, capacity {self.maxsize})")
+
+    def submit(self, video_ids: list) -> tuple:
+        """
+        Enqueue video IDs without waiting
+
+        Returns:
+            tuple: (accepted IDs, rejected IDs); IDs are rejected when the queue
+            is full or shutting down
+        """
+        accepted, rejected = [], []
+        for video_id in video_ids:
+            if not self._accepting:
+                rejected.append(video_id)
+                continue
+            try:
+                self._queue.put_nowait((video_id, time.monotonic(), 0))
+                accepted.append(video_id)
+            except asyncio.QueueFull:
+                rejected.append(video_id)
+
+        self._enqueued += len(accepted)
+        self._rejected += len(rejected)
+        if self._queue is not None:
+            self._high_water_mark = max(self._high_water_mark, self._queue.qsize())
+        if rejected:
+            logger.warning(f"Enrichment queue rejected {len(rejected)} video(s) (depth {self.depth}/{self.maxsize})")
+        return accepted, rejected
+
+    async def _worker(self, worker_id: int):
+        """Process queued video IDs until cancelled"""
+        while True:
+            video_id, enqueued_at, attempt = await self._queue.get()
+            self._total_wait += time.monotonic() - enqueued_at
+            self._in_flight += 1
+            try:
+                await self.handler(video_id)
+                self._processed += 1
+            except Exception as e:
+                self._failed += 1
+                await self._retry_or_give_up(worker_id, video_id, attempt, e)
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def _retry_or_give_up(self, worker_id: int, video_id: str, attempt: int, error: Exception):
+        if self._accepting and attempt + 1 < self.retry_attempts:
+            delay = min(self.retry_backoff * 2 ** attempt, self.retry_backoff_max)
+            self._retried += 1
+            logger.warning(
+                f"Worker {worker_id} failed to process video {video_id} "
+                f"(attempt {attempt + 1}/{self.retry_attempts}), retrying in {delay:.0f}s: {str(error)}"
+            )
+            self._schedule_retry(video_id, attempt + 1, delay)
+        else:
+            logger.error(f"Worker {worker_id} gave up on video {video_id} after {attempt + 1} attempt(s): {str(error)}")
+            await self._give_up([video_id], str(error))
+
+    def _schedule_retry(self, video_id: str, attempt: int, delay: float):
+        previous = self._retries.pop(video_id, None)
+        if previous is not None:
+            previous.cancel()
+        self._retries[video_id] = asyncio.get_running_loop().call_later(delay, self._requeue, video_id, attempt, delay)
+
+    def _requeue(self, video_id: str, attempt: int, delay: float):
+        self._retries.pop(video_id, None)
+        try:
+            self._queue.put_nowait((video_id, time.monotonic(), attempt))
+            self._high_water_mark = max(self._high_water_mark, self._queue.qsize())
+        except asyncio.QueueFull:
+            # Fresh notifications filled the queue; try again later rather than drop it
+            self._schedule_retry(video_id, attempt, delay)
+
+    async def _give_up(self, video_ids: list, error: str):
+        """Hand videos that will not be retried here to on_give_up"""
+        if not video_ids:
+            return
+        self._given_up += len(video_ids)
+        if self.on_give_up is None:
+            logger.error(f"Dropping {len(video_ids)} unprocessed video(s): {', '.join(video_ids[:10])}")
+            return
+        try:
+            await self.on_give_up(video_ids, error)
+        except Exception as e:
+            logger.error(f"Could not hand off {len(video_ids)} unprocessed video(s) ({', '.join(video_ids[:10])}): {str(e)}")
+
+    async def stop(self):
+        """Stop accepting work, drain what is queued, cancel the workers and hand off anything left"""
+        self._accepting = False
+        if self._queue is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+            logger.info("Enrichment queue drained")
+        except asyncio.TimeoutError:
+            logger.warning(f"Drain timed out after {self.drain_timeout}s with {self.depth} video(s) still queued")
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # Whatever is left was acknowledged but never processed
+        unprocessed = []
+        while not self._queue.empty():
+            unprocessed.append(self._queue.get_nowait()[0])
+            self._queue.task_done()
+        for video_id, handle in self._retries.items():
+            handle.cancel()
+            unprocessed.append(video_id)
+        self._retries = {}
+        await self._give_up(list(dict.fromkeys(unprocessed)), "service stopped before enrichment")
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def metrics(self) -> dict:
+        """Backpressure and throughput counters"""
+        dequeued = self._processed + self._failed + self._in_flight
+        return {
+            "accepting": self._accepting,
+            "workers": len(self._workers),
+            "depth": self.depth,
+            "capacity": self.maxsize,
+            "utilization": round(self.depth / self.maxsize, 3) if self.maxsize else 0.0,
+            "high_water_mark": self._high_water_mark,
+            "in_flight": self._in_flight,
+            "retrying": len(self._retries),
+            "enqueued_total": self._enqueued,
+            "rejected_total": self._rejected,
+            "processed_total": self._processed,
+            "failed_total": self._failed,
+            "retried_total": self._retried,
+            "given_up_total": self._given_up,
+            "avg_queue_wait_ms": round(self._total_wait / dequeued * 1000, 2) if dequeued else 0.0
+        }